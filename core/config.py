@@ -16,8 +16,15 @@ SUPPORT_BOT_TOKEN = os.getenv("SUPPORT_BOT_TOKEN", "")
 ADMIN_BOT_TOKEN = os.getenv("ADMIN_BOT_TOKEN", "")
 ADMIN_USER_ID = int(os.getenv("ADMIN_USER_ID", 0))
 ETH_RPC_URL = os.getenv("ETH_RPC_URL", "")
+ETH_RPC_URLS = [u.strip() for u in os.getenv("ETH_RPC_URLS", ETH_RPC_URL).split(",") if u.strip()]
+ETH_RPC_HEDGE_DELAY_MS = int(os.getenv("ETH_RPC_HEDGE_DELAY_MS", 400))
 SOLANA_RPC_URL = os.getenv("SOLANA_RPC_URL", "")
 ETHERSCAN_API_KEY = os.getenv("ETHERSCAN_API_KEY", "")
+ETHERSCAN_CALLS_PER_SECOND = float(os.getenv("ETHERSCAN_CALLS_PER_SECOND", 5))
+WALLET_POLL_CONCURRENCY = int(os.getenv("WALLET_POLL_CONCURRENCY", 4))
+COINGECKO_CALLS_PER_MINUTE = int(os.getenv("COINGECKO_CALLS_PER_MINUTE", 30))
+COINGECKO_PRIORITY = os.getenv("COINGECKO_PRIORITY", "background")
+SYMBOL_INDEX_PATH = os.getenv("SYMBOL_INDEX_PATH", "data/coin_index.json")
 
 if DATABASE_URL:
     if DATABASE_URL.startswith("postgres://"):
@@ -28,6 +35,9 @@ if DATABASE_URL:
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
 
+ENTITLEMENT_CACHE_TTL = int(os.getenv("ENTITLEMENT_CACHE_TTL", 600))
+ENTITLEMENT_CHANNEL = os.getenv("ENTITLEMENT_CHANNEL", "")
+
 
 def is_owner(user_id: int) -> bool:
     return user_id == ADMIN_USER_ID and ADMIN_USER_ID != 0
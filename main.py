@@ -8,6 +8,8 @@ from cachetools import TTLCache
 
 from core.config import PORT, WEBHOOK_SECRET
 from core.logger import setup_logger
+from zenith_crypto_bot import entitlements
+from zenith_crypto_bot.repository import engine as crypto_engine
 
 import run_group_bot
 import run_ai_bot
@@ -60,6 +62,7 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.error(f"{name} failed to start: {e}")
 
+    await entitlements.start_invalidation_listener(crypto_engine)
     await asyncio.gather(
         safe_start("GROUP", run_group_bot.start_service),
         safe_start("AI", run_ai_bot.start_service),
@@ -69,6 +72,7 @@ async def lifespan(app: FastAPI):
     )
     yield
     logger.info("🛑 MONOLITH SHUTDOWN")
+    await entitlements.stop_invalidation_listener()
     try:
         await asyncio.wait_for(
             asyncio.gather(
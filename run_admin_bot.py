@@ -20,6 +20,7 @@ from zenith_admin_bot.ui import (
     format_subscription_list, format_ticket_list, format_ticket_detail,
     format_ticket_metrics, format_user_list, format_group_list,
     format_group_search, format_db_stats, format_revenue_detailed,
+    format_portfolio_exposure,
     format_key_history, format_faq_list, format_canned_list,
     get_tickets_keyboard, get_faq_keyboard,
     get_system_keyboard, get_bulk_keygen_keyboard,
@@ -594,6 +595,15 @@ async def cmd_revenue_report(update: Update, context: ContextTypes.DEFAULT_TYPE)
     )
 
 
+@admin_only
+async def cmd_exposure(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    report = await MonitoringRepo.get_portfolio_exposure()
+    await update.message.reply_text(
+        format_portfolio_exposure(report),
+        parse_mode="HTML",
+    )
+
+
 @admin_only
 async def cmd_key_history(update: Update, context: ContextTypes.DEFAULT_TYPE):
     keys = await MonitoringRepo.get_key_usage_history(limit=20)
@@ -990,6 +1000,7 @@ async def start_service():
     bot_app.add_handler(CommandHandler("bulkkeygen", cmd_bulk_keygen))
     bot_app.add_handler(CommandHandler("dbstats", cmd_dbstats))
     bot_app.add_handler(CommandHandler("revenue", cmd_revenue_report))
+    bot_app.add_handler(CommandHandler("exposure", cmd_exposure))
     bot_app.add_handler(CommandHandler("keyhistory", cmd_key_history))
     bot_app.add_handler(CommandHandler("ticketmetrics", cmd_ticket_metrics))
     bot_app.add_handler(CommandHandler("stale", cmd_stale_tickets))
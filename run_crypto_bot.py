@@ -1,15 +1,17 @@
 import html
+import time
 import random
 import asyncio
-from datetime import datetime, timezone
+from functools import partial
+from datetime import datetime, timezone, timedelta
 from fastapi import APIRouter, Request
 from fastapi.responses import Response
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ApplicationBuilder, CommandHandler, CallbackQueryHandler, ContextTypes
-from telegram.error import RetryAfter, BadRequest, Forbidden
+from telegram.error import RetryAfter, BadRequest
 
 from core.logger import setup_logger
-from core.config import CRYPTO_BOT_TOKEN, WEBHOOK_URL, WEBHOOK_SECRET, ADMIN_USER_ID
+from core.config import CRYPTO_BOT_TOKEN, WEBHOOK_URL, WEBHOOK_SECRET, ADMIN_USER_ID, WALLET_POLL_CONCURRENCY
 from zenith_crypto_bot.repository import (
     init_crypto_db, dispose_crypto_engine, SubscriptionRepo,
     PriceAlertRepo, WalletTrackerRepo,
@@ -17,9 +19,22 @@ from zenith_crypto_bot.repository import (
 from zenith_crypto_bot.ui import (
     get_main_dashboard, get_back_button, get_audits_keyboard,
     get_welcome_msg, get_alerts_keyboard, get_wallets_keyboard,
+    get_snapshot_age_line,
 )
 from zenith_crypto_bot.market_service import (
-    get_prices, get_wallet_recent_txns, get_new_pairs, close_market_client,
+    get_prices, get_wallet_txns_since, close_market_client,
+    PRIORITY_BACKGROUND, WETH_ADDRESS,
+)
+from zenith_crypto_bot.market_snapshot import get_snapshot, snapshot_refresher, symbol_index_refresher
+from zenith_crypto_bot.alert_scheduler import AlertPollScheduler, MIN_POLL_SECONDS
+from zenith_crypto_bot.wallet_scheduler import WalletPollScheduler, DEFAULT_POLL_SECONDS, record_cycle
+from zenith_crypto_bot import security_store, pair_indexer
+from zenith_crypto_bot.eth_rpc import close_rpc_client
+from zenith_crypto_bot.alert_delivery import alert_delivery
+from zenith_crypto_bot.portfolio_analytics import load_positions, evaluate
+from zenith_crypto_bot import price_history
+from zenith_crypto_bot.token_metadata import (
+    get_token_metadata, decode_token_transfer, format_token_amount, token_label,
 )
 from zenith_crypto_bot.pro_handlers import (
     cmd_alert, cmd_alerts, cmd_delalert,
@@ -31,9 +46,17 @@ from zenith_crypto_bot.pro_handlers import (
 logger = setup_logger("CRYPTO")
 router = APIRouter()
 bot_app = None
-alert_queue = asyncio.Queue(maxsize=500)
 background_tasks = set()
 
+ALERT_TICK_SECONDS = MIN_POLL_SECONDS
+ALERT_RELOAD_SECONDS = 30
+WALLET_TICK_SECONDS = 1
+WALLET_RELOAD_SECONDS = 60
+WALLET_LAG_WARN_SECONDS = 30
+MAX_WALLET_ALERTS = 3
+SUB_MONITOR_SECONDS = 3600
+EXPIRED_NOTICE_HOURS = 24
+
 
 def track_task(task):
     background_tasks.add(task)
@@ -213,6 +236,7 @@ async def handle_dashboard(update: Update, context: ContextTypes.DEFAULT_TYPE):
             if not audits:
                 await query.edit_message_text("🗂️ <b>Audit Vault</b>\n\nEmpty. Run a scan: <code>/audit [contract]</code>", reply_markup=get_back_button(), parse_mode="HTML")
             else:
+                security_store.prewarm([a.contract for a in audits])
                 await query.edit_message_text("🗂️ <b>Audit Vault</b>\n\nSelect a record:", reply_markup=get_audits_keyboard(audits), parse_mode="HTML")
 
         elif query.data.startswith("ui_del_audit_"):
@@ -260,42 +284,41 @@ async def handle_dashboard(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await query.edit_message_text(pulse, reply_markup=InlineKeyboardMarkup(kb), parse_mode="HTML")
 
         elif query.data == "ui_market":
-            await query.edit_message_text("<i>Scanning global market sentiment...</i>", parse_mode="HTML")
             from zenith_crypto_bot.pro_handlers import _build_gauge
-            from zenith_crypto_bot.market_service import get_fear_greed_index, get_top_movers
-            fng, (gainers, losers), btc_data = await asyncio.gather(
-                get_fear_greed_index(), get_top_movers(), get_prices(["bitcoin", "ethereum"])
-            )
+            snap = await get_snapshot()
+            fng = snap.fear_greed
             fng_val = fng["value"] if fng else 0
             fng_class = fng["classification"] if fng else "N/A"
             gauge = _build_gauge(fng_val)
-            btc_p = btc_data.get("bitcoin", {}).get("usd", 0)
-            btc_c = btc_data.get("bitcoin", {}).get("usd_24h_change", 0)
-            eth_p = btc_data.get("ethereum", {}).get("usd", 0)
-            eth_c = btc_data.get("ethereum", {}).get("usd_24h_change", 0)
+            btc_p = snap.btc.get("current_price") or 0
+            btc_c = snap.btc.get("price_change_percentage_24h") or 0
+            eth_p = snap.eth.get("current_price") or 0
+            eth_c = snap.eth.get("price_change_percentage_24h") or 0
             lines = [
                 "<b>📊 MARKET INTELLIGENCE</b>\n━━━━━━━━━━━━━━━━━━━━━━━━\n",
                 f"<b>Fear & Greed:</b> {fng_val}/100 — <b>{fng_class}</b>", gauge, "",
                 f"<b>BTC:</b> ${btc_p:,.0f} ({btc_c:+.1f}%)",
                 f"<b>ETH:</b> ${eth_p:,.0f} ({eth_c:+.1f}%)\n",
             ]
-            if is_pro and gainers:
+            if is_pro and snap.gainers:
+                if snap.btc_dominance is not None:
+                    lines.append(f"<b>BTC Dominance:</b> {snap.btc_dominance:.1f}%\n")
                 lines.append("<b>🟢 Top Gainers</b>")
-                for g in gainers[:5]:
+                for g in snap.gainers[:5]:
                     pct = g.get("price_change_percentage_24h", 0) or 0
                     lines.append(f"  • {g['symbol'].upper()} ${g.get('current_price', 0):,.4f} ({pct:+.1f}%)")
                 lines.append("\n<b>🔴 Top Losers</b>")
-                for l in losers[:5]:
+                for l in snap.losers[:5]:
                     pct = l.get("price_change_percentage_24h", 0) or 0
                     lines.append(f"  • {l['symbol'].upper()} ${l.get('current_price', 0):,.4f} ({pct:+.1f}%)")
             else:
                 lines.append("<i>Top Gainers/Losers: [Pro Required]</i>")
+            lines.append("\n" + get_snapshot_age_line(snap.age_seconds))
             await query.edit_message_text("\n".join(lines), reply_markup=get_back_button(), parse_mode="HTML")
 
         elif query.data == "ui_gas":
-            await query.edit_message_text("<i>Reading Ethereum mempool...</i>", parse_mode="HTML")
-            from zenith_crypto_bot.market_service import get_gas_prices
-            gas = await get_gas_prices()
+            snap = await get_snapshot()
+            gas = snap.gas
             if not gas:
                 await query.edit_message_text("⚠️ Gas data unavailable.", reply_markup=get_back_button())
                 return
@@ -311,7 +334,8 @@ async def handle_dashboard(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await query.edit_message_text(
                 f"<b>⛽ GAS TRACKER</b>\n━━━━━━━━━━━━━━━━━━━━━━━━\n\n"
                 f"<b>Gas:</b> {gwei:.1f} Gwei — {lv}\n<b>Base Fee:</b> {gas['base_fee_gwei']:.1f} Gwei\n\n"
-                f"<b>Priority:</b>\n🐢 {gas['priority_low']:.1f} | 🚶 {gas['priority_medium']:.1f} | 🚀 {gas['priority_high']:.1f} Gwei",
+                f"<b>Priority:</b>\n🐢 {gas['priority_low']:.1f} | 🚶 {gas['priority_medium']:.1f} | 🚀 {gas['priority_high']:.1f} Gwei\n\n"
+                f"{get_snapshot_age_line(snap.age_seconds)}",
                 reply_markup=get_back_button(), parse_mode="HTML",
             )
 
@@ -324,22 +348,14 @@ async def handle_dashboard(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     reply_markup=get_back_button(), parse_mode="HTML",
                 )
             else:
-                token_ids = [t.token_id for t in tokens]
-                prices = await get_prices(token_ids)
+                positions = load_positions(tokens)
+                result = evaluate(positions, await get_prices(list(positions.token_ids)))
                 lines = ["<b>💰 PORTFOLIO</b>\n━━━━━━━━━━━━━━━━━━━━━━━━\n"]
-                total_inv, total_cur = 0, 0
-                for t in tokens:
-                    cp = prices.get(t.token_id, {}).get("usd", 0)
-                    inv = t.entry_price * t.quantity
-                    cur = cp * t.quantity
-                    pnl = ((cp - t.entry_price) / t.entry_price * 100) if t.entry_price > 0 else 0
-                    total_inv += inv
-                    total_cur += cur
-                    ic = "🟢" if pnl >= 0 else "🔴"
-                    lines.append(f"{ic} <b>{t.token_symbol}</b> ×{t.quantity}\n   ${t.entry_price:,.2f}→${cp:,.2f} ({pnl:+.1f}%)\n")
-                tp = total_cur - total_inv
-                tpct = ((total_cur - total_inv) / total_inv * 100) if total_inv > 0 else 0
-                lines.append(f"━━━━━━━━━━━━━━━━━━━━━━━━\n{'🟢' if tp >= 0 else '🔴'} <b>P/L: ${tp:+,.2f} ({tpct:+.1f}%)</b>")
+                for row in result.rows():
+                    ic = "🟢" if row["pnl_pct"] >= 0 else "🔴"
+                    lines.append(f"{ic} <b>{row['symbol']}</b> ×{row['quantity']}\n   ${row['entry']:,.2f}→${row['price']:,.2f} ({row['pnl_pct']:+.1f}%)\n")
+                tp = result.total_pnl
+                lines.append(f"━━━━━━━━━━━━━━━━━━━━━━━━\n{'🟢' if tp >= 0 else '🔴'} <b>P/L: ${tp:+,.2f} ({result.total_pnl_pct:+.1f}%)</b>")
                 await query.edit_message_text("\n".join(lines), reply_markup=get_back_button(), parse_mode="HTML")
 
         elif query.data == "ui_price_alerts":
@@ -406,42 +422,54 @@ async def handle_dashboard(update: Update, context: ContextTypes.DEFAULT_TYPE):
             logger.error(f"UI Error: {e}")
 
 
-async def alert_dispatcher():
-    while True:
-        chat_id, text = await alert_queue.get()
-        try:
-            await bot_app.bot.send_message(chat_id=chat_id, text=text, parse_mode="HTML", disable_web_page_preview=True)
-        except RetryAfter as e:
-            await asyncio.sleep(e.retry_after + 1)
-            await alert_queue.put((chat_id, text))
-        except Forbidden:
-            await SubscriptionRepo.toggle_alerts(chat_id, False)
-        except Exception as e:
-            logger.error(f"Dispatch failed: {e}")
-        finally:
-            alert_queue.task_done()
-            await asyncio.sleep(0.05)
+async def send_alert(chat_id: int, text: str):
+    await bot_app.bot.send_message(chat_id=chat_id, text=text, parse_mode="HTML", disable_web_page_preview=True)
+
+
+async def disable_alerts(chat_id: int):
+    await SubscriptionRepo.toggle_alerts(chat_id, False)
 
 
 async def price_alert_checker():
+    scheduler = AlertPollScheduler()
+    alerts_by_token = {}
+    last_reload = None
+
     while True:
-        await asyncio.sleep(60)
+        await asyncio.sleep(ALERT_TICK_SECONDS)
         try:
-            alerts = await PriceAlertRepo.get_all_active_alerts()
-            if not alerts:
+            now = time.monotonic()
+            if last_reload is None or now - last_reload >= ALERT_RELOAD_SECONDS:
+                previous = {t: {a.id for a in group} for t, group in alerts_by_token.items()}
+                alerts_by_token = {}
+                for a in await PriceAlertRepo.get_all_active_alerts():
+                    alerts_by_token.setdefault(a.token_id, []).append(a)
+                scheduler.sync(alerts_by_token.keys(), now)
+                for token_id, group in alerts_by_token.items():
+                    if {a.id for a in group} - previous.get(token_id, set()):
+                        scheduler.poll_now(token_id, now)
+                last_reload = now
+
+            due = scheduler.due(now)
+            if not due:
                 continue
-            token_ids = list(set(a.token_id for a in alerts))
-            prices = await get_prices(token_ids)
+            prices = await get_prices(due, priority=PRIORITY_BACKGROUND)
 
-            for alert in alerts:
-                current = prices.get(alert.token_id, {}).get("usd")
+            for token_id in due:
+                current = prices.get(token_id, {}).get("usd")
                 if current is None:
+                    scheduler.defer(token_id, now)
                     continue
-                triggered = (
-                    (alert.direction == "above" and current >= alert.target_price) or
-                    (alert.direction == "below" and current <= alert.target_price)
-                )
-                if triggered:
+
+                pending = []
+                for alert in alerts_by_token.get(token_id, []):
+                    triggered = (
+                        (alert.direction == "above" and current >= alert.target_price) or
+                        (alert.direction == "below" and current <= alert.target_price)
+                    )
+                    if not triggered:
+                        pending.append(alert)
+                        continue
                     await PriceAlertRepo.trigger_alert(alert.id)
                     icon = "📈" if alert.direction == "above" else "📉"
                     text = (
@@ -452,44 +480,117 @@ async def price_alert_checker():
                         f"<b>Current:</b> ${current:,.2f}\n\n"
                         f"<i>Set another alert with /alert</i>"
                     )
-                    try:
-                        alert_queue.put_nowait((alert.user_id, text))
-                    except asyncio.QueueFull:
-                        pass
+                    alert_delivery.submit(alert.user_id, text)
+
+                if pending:
+                    alerts_by_token[token_id] = pending
+                    scheduler.schedule(token_id, current, pending, now)
+                else:
+                    alerts_by_token.pop(token_id, None)
+                    scheduler.drop(token_id)
         except Exception as e:
             logger.error(f"Price alert checker error: {e}")
 
 
-async def wallet_watcher():
-    while True:
-        await asyncio.sleep(120)
+async def check_wallet(address: str, watchers: list) -> tuple[bool, float | None]:
+    blocks = [w.last_seen_block for w in watchers if w.last_seen_block is not None]
+    start_block = min(blocks) if blocks else None
+    last_hash = next((w.last_checked_tx for w in watchers if w.last_checked_tx), None)
+    result = await get_wallet_txns_since(address, start_block, last_hash)
+    if result is None:
+        return False, None
+    txns, cursor = result
+    if cursor is not None and (txns or cursor != start_block):
+        tx_hash = txns[0].get("hash") if txns else None
+        await WalletTrackerRepo.advance_cursor(address, cursor, tx_hash)
+        # Watcher rows are reloaded less often than a hot wallet is polled; move them on too so
+        # the next poll starts from the new cursor instead of alerting the same blocks again.
+        for w in watchers:
+            w.last_seen_block = cursor
+            if tx_hash:
+                w.last_checked_tx = tx_hash
+    if not txns:
+        return True, None
+
+    transfers = {tx.get("hash"): decode_token_transfer(tx) for tx in txns[:MAX_WALLET_ALERTS]}
+    metadata = await get_token_metadata([t["token"] for t in transfers.values() if t])
+    for tx in txns[:MAX_WALLET_ALERTS]:
+        direction = "📤 SENT" if tx.get("from", "").lower() == address else "📥 RECEIVED"
+        transfer = transfers.get(tx.get("hash"))
+        if transfer:
+            if not transfer["amount"]:
+                continue
+            token = transfer["token"]
+            decimals = (metadata.get(token) or {}).get("decimals")
+            amount = f"{format_token_amount(transfer['amount'], decimals)} {html.escape(token_label(token, metadata))}"
+        else:
+            val_eth = int(tx.get("value", "0")) / 1e18
+            if val_eth < 0.01:
+                continue
+            amount = f"{val_eth:.4f} ETH"
+        for w in watchers:
+            text = (
+                f"👁️ <b>WALLET ACTIVITY</b>\n"
+                f"━━━━━━━━━━━━━━━━━━━━━━━━\n\n"
+                f"<b>Wallet:</b> {w.label}\n"
+                f"<b>Action:</b> {direction}\n"
+                f"<b>Amount:</b> {amount}\n"
+                f"<b>Tx:</b> <a href='https://etherscan.io/tx/{tx.get('hash', '')}'>"
+                f"{tx.get('hash', '')[:10]}...</a>"
+            )
+            alert_delivery.submit(w.user_id, text)
+    return True, float(txns[0].get("timeStamp") or 0) or None
+
+
+async def poll_wallet(scheduler: WalletPollScheduler, semaphore: asyncio.Semaphore, address: str, watchers: list):
+    async with semaphore:
+        scheduler.start(address, time.time())
+        ok, last_activity = False, None
         try:
-            wallets = await WalletTrackerRepo.get_all_tracked_wallets()
-            for w in wallets:
-                txns = await get_wallet_recent_txns(w.wallet_address, w.last_checked_tx)
-                if txns:
-                    await WalletTrackerRepo.update_last_tx(w.id, txns[0].get("hash", ""))
-                    for tx in txns[:3]:
-                        val_eth = int(tx.get("value", "0")) / 1e18
-                        if val_eth < 0.01:
-                            continue
-                        direction = "📤 SENT" if tx.get("from", "").lower() == w.wallet_address else "📥 RECEIVED"
-                        text = (
-                            f"👁️ <b>WALLET ACTIVITY</b>\n"
-                            f"━━━━━━━━━━━━━━━━━━━━━━━━\n\n"
-                            f"<b>Wallet:</b> {w.label}\n"
-                            f"<b>Action:</b> {direction}\n"
-                            f"<b>Amount:</b> {val_eth:.4f} ETH\n"
-                            f"<b>Tx:</b> <a href='https://etherscan.io/tx/{tx.get('hash', '')}'>"
-                            f"{tx.get('hash', '')[:10]}...</a>"
-                        )
-                        try:
-                            alert_queue.put_nowait((w.user_id, text))
-                        except asyncio.QueueFull:
-                            pass
-                await asyncio.sleep(0.5)
+            ok, last_activity = await check_wallet(address, watchers)
         except Exception as e:
-            logger.error(f"Wallet watcher error: {e}")
+            logger.error(f"Wallet check failed for {address}: {e}")
+        finally:
+            scheduler.finish(address, time.time(), last_activity, failed=not ok)
+
+
+async def wallet_watcher():
+    scheduler = WalletPollScheduler()
+    semaphore = asyncio.Semaphore(WALLET_POLL_CONCURRENCY)
+    watchers_by_address = {}
+    last_reload = 0.0
+    first_load = True
+
+    while True:
+        now = time.time()
+        if now - last_reload >= WALLET_RELOAD_SECONDS:
+            if not first_load:
+                stats = scheduler.take_lag_stats()
+                record_cycle({**stats, "wallets": len(scheduler), "in_flight": scheduler.in_flight})
+                if stats["max_lag"] > WALLET_LAG_WARN_SECONDS:
+                    logger.warning(f"Wallet polling lagging: max {stats['max_lag']}s, p95 {stats['p95_lag']}s over {stats['polls']} polls")
+            try:
+                grouped = {}
+                tracked_since = {}
+                for w in await WalletTrackerRepo.get_all_tracked_wallets():
+                    grouped.setdefault(w.wallet_address, []).append(w)
+                    if w.created_at:
+                        started = w.created_at.timestamp()
+                        tracked_since[w.wallet_address] = min(started, tracked_since.get(w.wallet_address, started))
+                watchers_by_address = grouped
+                # Spread the initial load over one default interval instead of polling everything at once.
+                scheduler.sync(grouped.keys(), now, spread=DEFAULT_POLL_SECONDS if first_load else 0.0, tracked_since=tracked_since)
+                first_load = False
+            except Exception as e:
+                logger.error(f"Wallet reload failed: {e}")
+            last_reload = now
+
+        for address in scheduler.due(now):
+            watchers = watchers_by_address.get(address)
+            if watchers:
+                scheduler.claim(address)
+                track_task(asyncio.create_task(poll_wallet(scheduler, semaphore, address, watchers)))
+        await asyncio.sleep(WALLET_TICK_SECONDS)
 
 
 async def active_blockchain_watcher():
@@ -521,73 +622,58 @@ async def active_blockchain_watcher():
                 f"<b>Asset:</b> {amt_pro:,} {coin}\n<b>Dest:</b> {dest}\n"
                 f"<b>Insight:</b> {insight}\n<b>Time:</b> {utc}"
             )
-            try:
-                alert_queue.put_nowait((uid, txt))
-            except asyncio.QueueFull:
-                pass
+            alert_delivery.submit(uid, txt)
         for uid in free_users:
             txt = (
                 f"📊 <b>ON-CHAIN TRANSFER</b>\n\n"
                 f"<b>Asset:</b> {amt_free:,} {coin}\n<b>Dest:</b> {dest}\n"
                 f"<b>Insight:</b> <i>[Pro Required]</i>\n<b>Time:</b> <i>Delayed</i>"
             )
-            try:
-                alert_queue.put_nowait((uid, txt))
-            except asyncio.QueueFull:
-                pass
+            alert_delivery.submit(uid, txt)
+
+
+def _expiry_warning_text(user_id: int, expires_at: datetime) -> str:
+    days_left = max(1, (expires_at - datetime.now(timezone.utc)).days)
+    return (
+        f"⚠️ <b>SUBSCRIPTION EXPIRING SOON</b>\n"
+        f"━━━━━━━━━━━━━━━━━━━━━━━━\n\n"
+        f"Your Zenith Pro expires in <b>{days_left} day{'s' if days_left != 1 else ''}</b>.\n\n"
+        f"To renew, contact the admin and provide your ID:\n"
+        f"<code>{user_id}</code>\n\n"
+        f"<i>After payment, your subscription will be extended instantly.</i>"
+    )
 
 
-async def subscription_monitor():
-    notified_warning = set()
-    notified_expired = set()
+def _expired_text(user_id: int) -> str:
+    return (
+        f"🔴 <b>PRO SUBSCRIPTION ENDED</b>\n"
+        f"━━━━━━━━━━━━━━━━━━━━━━━━\n\n"
+        f"Your Zenith Pro access has expired.\n"
+        f"Pro features (wallet tracker, full security scans, "
+        f"extended alerts) are now locked.\n\n"
+        f"<b>To renew:</b> Contact the admin with your ID:\n"
+        f"<code>{user_id}</code>\n\n"
+        f"<i>Your data (alerts, portfolio, wallets) is preserved "
+        f"and will be available again once you renew.</i>"
+    )
+
 
+async def subscription_monitor():
+    # The ledger makes each notice once-per-period across restarts, so the expired
+    # window can cover downtime instead of just the last cycle.
     while True:
-        await asyncio.sleep(3600)
+        await asyncio.sleep(SUB_MONITOR_SECONDS)
         try:
-            expiring = await SubscriptionRepo.get_expiring_users(within_hours=72)
-            for sub in expiring:
-                if sub.user_id in notified_warning:
-                    continue
-                notified_warning.add(sub.user_id)
-                days_left = max(1, (sub.expires_at - datetime.now(timezone.utc)).days)
-                text = (
-                    f"⚠️ <b>SUBSCRIPTION EXPIRING SOON</b>\n"
-                    f"━━━━━━━━━━━━━━━━━━━━━━━━\n\n"
-                    f"Your Zenith Pro expires in <b>{days_left} day{'s' if days_left != 1 else ''}</b>.\n\n"
-                    f"To renew, contact the admin and provide your ID:\n"
-                    f"<code>{sub.user_id}</code>\n\n"
-                    f"<i>After payment, your subscription will be extended instantly.</i>"
-                )
-                try:
-                    alert_queue.put_nowait((sub.user_id, text))
-                except asyncio.QueueFull:
-                    pass
-
-            expired = await SubscriptionRepo.get_just_expired_users(within_hours=1)
-            for sub in expired:
-                if sub.user_id in notified_expired:
-                    continue
-                notified_expired.add(sub.user_id)
-                text = (
-                    f"🔴 <b>PRO SUBSCRIPTION ENDED</b>\n"
-                    f"━━━━━━━━━━━━━━━━━━━━━━━━\n\n"
-                    f"Your Zenith Pro access has expired.\n"
-                    f"Pro features (wallet tracker, full security scans, "
-                    f"extended alerts) are now locked.\n\n"
-                    f"<b>To renew:</b> Contact the admin with your ID:\n"
-                    f"<code>{sub.user_id}</code>\n\n"
-                    f"<i>Your data (alerts, portfolio, wallets) is preserved "
-                    f"and will be available again once you renew.</i>"
-                )
-                try:
-                    alert_queue.put_nowait((sub.user_id, text))
-                except asyncio.QueueFull:
-                    pass
-
-            if len(notified_warning) > 1000:
-                notified_warning.clear()
-            if len(notified_expired) > 1000:
-                notified_expired.clear()
+            now = datetime.now(timezone.utc)
+            warnings = await SubscriptionRepo.claim_expiry_notices("expiry_warning", now, now + timedelta(hours=72))
+            expired = await SubscriptionRepo.claim_expiry_notices("expired", now - timedelta(hours=EXPIRED_NOTICE_HOURS), now)
+            queued = alert_delivery.submit_many(
+                [(user_id, _expiry_warning_text(user_id, expires_at)) for user_id, expires_at in warnings]
+                + [(user_id, _expired_text(user_id)) for user_id, _ in expired]
+            )
+            if warnings or expired:
+                logger.info(f"📅 Subscription notices: {len(warnings)} warnings, {len(expired)} expired, {queued} queued")
+            await SubscriptionRepo.prune_notification_ledger()
         except Exception as e:
             logger.error(f"Subscription monitor error: {e}")
 
@@ -630,20 +716,41 @@ async def start_service():
         except Exception as e:
             logger.warning(f"Failed to set webhook: {e}")
 
-    track_task(asyncio.create_task(safe_loop("dispatcher", alert_dispatcher)))
+    alert_delivery.bind(send_alert, disable_alerts)
+    for i in range(alert_delivery.workers):
+        track_task(asyncio.create_task(safe_loop(f"dispatcher_{i}", partial(alert_delivery.worker, i))))
+    track_task(asyncio.create_task(safe_loop("alert_outbox", alert_delivery.outbox_loop)))
     track_task(asyncio.create_task(safe_loop("watcher", active_blockchain_watcher)))
     track_task(asyncio.create_task(safe_loop("price_alerts", price_alert_checker)))
     track_task(asyncio.create_task(safe_loop("wallet_watcher", wallet_watcher)))
     track_task(asyncio.create_task(safe_loop("sub_monitor", subscription_monitor)))
+    track_task(asyncio.create_task(safe_loop("market_snapshot", snapshot_refresher)))
+    track_task(asyncio.create_task(safe_loop("symbol_index", symbol_index_refresher)))
+    track_task(asyncio.create_task(safe_loop("price_history", price_history.history_persister)))
+    pair_indexer.add_listener(prescan_new_pairs)
+    track_task(asyncio.create_task(safe_loop("pair_indexer", pair_indexer.pair_indexer)))
+
+
+def prescan_new_pairs(pairs: list[dict]):
+    security_store.prewarm([t for p in pairs for t in (p["token0"], p["token1"]) if t != WETH_ADDRESS])
 
 
 async def stop_service():
     for t in list(background_tasks):
         t.cancel()
+    try:
+        await alert_delivery.persist_pending()
+    except Exception as e:
+        logger.error(f"Failed to persist pending alerts: {e}")
+    try:
+        await price_history.persist_history()
+    except Exception as e:
+        logger.error(f"Failed to persist price history: {e}")
     if bot_app:
         await bot_app.stop()
         await bot_app.shutdown()
     await close_market_client()
+    await close_rpc_client()
     await dispose_crypto_engine()
 
 
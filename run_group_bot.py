@@ -1,11 +1,10 @@
 import html
 import asyncio
-from datetime import datetime, timezone
 from fastapi import APIRouter, Request, Response
 from telegram import Update
 from telegram.ext import (
     ApplicationBuilder, CommandHandler, CallbackQueryHandler,
-    MessageHandler, filters, ContextTypes,
+    MessageHandler, ChatMemberHandler, filters, ContextTypes,
 )
 
 from core.logger import setup_logger
@@ -13,17 +12,22 @@ from core.config import GROUP_BOT_TOKEN, WEBHOOK_URL, WEBHOOK_SECRET
 from zenith_crypto_bot.repository import SubscriptionRepo
 from zenith_group_bot.repository import (
     init_group_db, dispose_group_engine,
-    SettingsRepo, ScheduleRepo,
+    SettingsRepo,
 )
 from zenith_group_bot.setup_flow import cmd_setup, setup_callback
-from zenith_group_bot.group_app import handle_message, handle_new_member, cmd_forgive, cmd_reset
+from zenith_group_bot.group_app import handle_message, handle_new_member, handle_chat_member, cmd_forgive, cmd_reset
 from zenith_group_bot.pro_handlers import (
     cmd_addword, cmd_delword, cmd_wordlist,
+    cmd_allowdomain, cmd_blockdomain, cmd_deldomain,
     cmd_schedule, cmd_schedules, cmd_delschedule,
     cmd_welcome, cmd_welcomeoff,
     cmd_analytics, cmd_auditlog, cmd_antiraid,
 )
 from zenith_group_bot.ui import get_admin_dashboard, get_back_button
+from zenith_group_bot.raid_guard import raid_monitor
+from zenith_group_bot import quarantine
+from zenith_group_bot.moderation_queue import moderation_queue
+from zenith_group_bot.message_scheduler import message_scheduler
 
 logger = setup_logger("SVC_GROUP")
 router = APIRouter()
@@ -65,6 +69,7 @@ async def cmd_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         text += (
             f"\n<b>Pro Commands</b> (use in group):\n"
             f"• <code>/addword</code> / <code>/delword</code> — Custom filters\n"
+            f"• <code>/allowdomain</code> / <code>/blockdomain</code> — Link rules\n"
             f"• <code>/antiraid</code> — Anti-raid shield\n"
             f"• <code>/analytics</code> — Moderation stats\n"
             f"• <code>/schedule</code> — Scheduled messages\n"
@@ -176,26 +181,6 @@ async def handle_dashboard(update: Update, context: ContextTypes.DEFAULT_TYPE):
             logger.error(f"Dashboard error: {e}")
 
 
-async def scheduled_message_loop():
-    while True:
-        try:
-            now = datetime.now(timezone.utc)
-            due = await ScheduleRepo.get_due_messages(now.hour, now.minute)
-            for msg in due:
-                try:
-                    await bot_app.bot.send_message(
-                        chat_id=msg.chat_id,
-                        text=msg.message_text,
-                        parse_mode="HTML",
-                    )
-                    await ScheduleRepo.mark_sent(msg.id)
-                except Exception as e:
-                    logger.warning(f"Scheduled msg send failed (chat {msg.chat_id}): {e}")
-        except Exception as e:
-            logger.error(f"Scheduled loop error: {e}")
-        await asyncio.sleep(60)
-
-
 async def start_service():
     global bot_app, bg_tasks
     if not GROUP_BOT_TOKEN:
@@ -203,6 +188,7 @@ async def start_service():
         return
 
     await init_group_db()
+    await quarantine.sync()
 
     bot_app = ApplicationBuilder().token(GROUP_BOT_TOKEN).build()
 
@@ -215,6 +201,9 @@ async def start_service():
     bot_app.add_handler(CommandHandler("addword", cmd_addword))
     bot_app.add_handler(CommandHandler("delword", cmd_delword))
     bot_app.add_handler(CommandHandler("wordlist", cmd_wordlist))
+    bot_app.add_handler(CommandHandler("allowdomain", cmd_allowdomain))
+    bot_app.add_handler(CommandHandler("blockdomain", cmd_blockdomain))
+    bot_app.add_handler(CommandHandler("deldomain", cmd_deldomain))
     bot_app.add_handler(CommandHandler("schedule", cmd_schedule))
     bot_app.add_handler(CommandHandler("schedules", cmd_schedules))
     bot_app.add_handler(CommandHandler("delschedule", cmd_delschedule))
@@ -228,6 +217,7 @@ async def start_service():
 
     bot_app.add_handler(MessageHandler(filters.ChatType.GROUPS & ~filters.COMMAND, handle_message))
     bot_app.add_handler(MessageHandler(filters.StatusUpdate.NEW_CHAT_MEMBERS, handle_new_member))
+    bot_app.add_handler(ChatMemberHandler(handle_chat_member, ChatMemberHandler.ANY_CHAT_MEMBER))
 
     await bot_app.initialize()
     await bot_app.start()
@@ -247,8 +237,14 @@ async def start_service():
         except Exception as e:
             logger.error(f"❌ Group Bot Webhook Failed: {e}")
 
-    bg_tasks.append(asyncio.create_task(scheduled_message_loop()))
+    bg_tasks.append(asyncio.create_task(message_scheduler.run(bot_app.bot)))
     logger.info("⏰ Scheduled Message Loop: Online")
+    bg_tasks.append(asyncio.create_task(raid_monitor()))
+    logger.info("🛡️ Raid Monitor: Online")
+    bg_tasks.append(asyncio.create_task(quarantine.quarantine_monitor()))
+    logger.info("🕒 Quarantine Monitor: Online")
+    bg_tasks.append(asyncio.create_task(moderation_queue.worker(bot_app.bot)))
+    logger.info("🧹 Moderation Queue: Online")
 
 
 async def stop_service():
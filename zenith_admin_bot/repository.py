@@ -421,7 +421,47 @@ class MonitoringRepo:
             stats["groups"] = (await session.execute(select(func.count()).select_from(GroupSettings))).scalar() or 0
             stats["moderation_logs"] = (await session.execute(select(func.count()).select_from(ModerationLog))).scalar() or 0
             
-            return stats
+        from zenith_crypto_bot import entitlements
+        from zenith_crypto_bot.market_service import coingecko_budget
+        from zenith_crypto_bot.eth_rpc import rpc
+        from zenith_crypto_bot import wallet_scheduler
+        from zenith_crypto_bot.alert_delivery import alert_delivery
+        from zenith_crypto_bot import security_store
+        from zenith_group_bot import admin_roster
+        from zenith_group_bot.flood_control import flood_detector
+        from zenith_group_bot.moderation_queue import moderation_queue
+        from zenith_group_bot.spam_fingerprint import fingerprint_index
+        from zenith_group_bot.message_scheduler import message_scheduler
+        from zenith_group_bot.welcome import welcome_batcher
+        from zenith_group_bot import quarantine
+        stats["entitlement_cache"] = entitlements.get_stats()
+        stats["coingecko_budget"] = coingecko_budget.get_stats()
+        if rpc.enabled:
+            stats["eth_rpc"] = rpc.get_stats()
+        stats["wallet_polling"] = wallet_scheduler.get_stats()
+        stats["alert_delivery"] = alert_delivery.get_stats()
+        stats["security_store"] = security_store.get_stats()
+        stats["admin_roster"] = admin_roster.get_stats()
+        stats["flood_control"] = flood_detector.get_stats()
+        stats["moderation_queue"] = moderation_queue.get_stats()
+        stats["spam_fingerprint"] = fingerprint_index.get_stats()
+        stats["message_scheduler"] = message_scheduler.get_stats()
+        stats["welcome"] = welcome_batcher.get_stats()
+        stats["quarantine"] = quarantine.get_stats()
+        return stats
+
+    @staticmethod
+    async def get_portfolio_exposure() -> dict:
+        from zenith_crypto_bot.repository import WatchlistRepo
+        from zenith_crypto_bot.market_service import get_prices, PRIORITY_BACKGROUND
+        from zenith_crypto_bot.portfolio_analytics import load_positions, evaluate, aggregate
+
+        rows = await WatchlistRepo.get_all_positions()
+        if not rows:
+            return {}
+        positions = load_positions(rows)
+        prices = await get_prices(list(positions.token_ids), priority=PRIORITY_BACKGROUND)
+        return aggregate(evaluate(positions, prices))
 
     @staticmethod
     async def get_revenue_report() -> dict:
@@ -420,6 +420,153 @@ def format_db_stats(stats: dict) -> str:
         f"<b>👥 Groups:</b> {stats.get('groups', 0):,}",
         f"<b>📋 Moderation Logs:</b> {stats.get('moderation_logs', 0):,}",
     ]
+    cache = stats.get("entitlement_cache")
+    if cache:
+        lines += [
+            "",
+            "<b>⚡ ENTITLEMENT CACHE</b>",
+            f"<b>Cached Users:</b> {cache.get('size', 0):,}",
+            f"<b>Hits / Misses:</b> {cache.get('hits', 0):,} / {cache.get('misses', 0):,} ({cache.get('hit_rate', 0)}%)",
+            f"<b>Invalidations:</b> {cache.get('invalidations', 0):,} (remote: {cache.get('remote_invalidations', 0):,})",
+            f"<b>Sync Channel:</b> {'🟢 Listening' if cache.get('listening') else '⚪ Local only'}",
+        ]
+    budget = stats.get("coingecko_budget")
+    if budget:
+        lines += [
+            "",
+            "<b>🦎 COINGECKO BUDGET</b>",
+            f"<b>Used (60s):</b> {budget.get('used', 0)}/{budget.get('limit', 0)} — priority: {budget.get('favoured', 'N/A')}",
+            f"<b>Calls:</b> {budget.get('calls', 0):,} | <b>Queued:</b> {budget.get('queued', 0):,}",
+            f"<b>Served Cached:</b> {budget.get('downgraded', 0):,} | <b>Rejected:</b> {budget.get('rejected', 0):,}",
+            f"<b>429s:</b> {budget.get('throttled', 0):,}" + (f" — backing off {budget['blocked_for']}s" if budget.get("blocked_for") else ""),
+        ]
+    rpc = stats.get("eth_rpc")
+    if rpc:
+        lines += [
+            "",
+            "<b>⛓️ ETH RPC</b>",
+            f"<b>Requests:</b> {rpc.get('requests', 0):,} in {rpc.get('batches', 0):,} batches",
+            f"<b>Failovers:</b> {rpc.get('failovers', 0):,} | <b>Hedges:</b> {rpc.get('hedges', 0):,} (won: {rpc.get('hedge_wins', 0):,})",
+        ]
+        for e in rpc.get("endpoints", []):
+            state = "🟢" if e["available"] else "🔴"
+            lines.append(f"{state} <code>{e['host']}</code> — {e['latency_ms']}ms, {e['errors']}/{e['requests']} errors")
+        for method, m in sorted(rpc.get("methods", {}).items()):
+            lines.append(f"• <code>{method}</code>: {m['calls']:,} calls, avg {m['avg_ms']}ms, max {m['max_ms']}ms")
+    polling = stats.get("wallet_polling")
+    if polling:
+        lines += [
+            "",
+            "<b>👁️ WALLET POLLING</b>",
+            f"<b>Wallets:</b> {polling.get('wallets', 0):,} | <b>In Flight:</b> {polling.get('in_flight', 0)}",
+            f"<b>Polls (last window):</b> {polling.get('polls', 0):,}",
+            f"<b>Lag:</b> avg {polling.get('avg_lag', 0)}s · p95 {polling.get('p95_lag', 0)}s · max {polling.get('max_lag', 0)}s",
+        ]
+    delivery = stats.get("alert_delivery")
+    if delivery:
+        lines += [
+            "",
+            "<b>📨 ALERT DELIVERY</b>",
+            f"<b>Delivered:</b> {delivery.get('delivered', 0):,} | <b>Deferred:</b> {delivery.get('deferred', 0):,} | <b>Dropped:</b> {delivery.get('dropped', 0):,}",
+            f"<b>Queued:</b> {delivery.get('queued', 0):,} {delivery.get('shards', [])}",
+            f"<b>Outbox:</b> {delivery.get('spilled', 0):,} spilled / {delivery.get('restored', 0):,} restored",
+            f"<b>Duplicates:</b> {delivery.get('duplicates', 0):,} | <b>Blocked Bot:</b> {delivery.get('forbidden', 0):,}",
+        ]
+        if delivery.get("paused_for"):
+            lines.append(f"⏸️ Flood control — resuming in {delivery['paused_for']}s")
+    security = stats.get("security_store")
+    if security:
+        lines += [
+            "",
+            "<b>🛡️ SECURITY REPORTS</b>",
+            f"<b>Cached:</b> {security.get('cached', 0):,} | <b>In Flight:</b> {security.get('inflight', 0)}",
+            f"<b>Memory / DB Hits:</b> {security.get('memory_hits', 0):,} / {security.get('db_hits', 0):,} | <b>Coalesced:</b> {security.get('coalesced', 0):,}",
+            f"<b>Fetched:</b> {security.get('fetched', 0):,} in {security.get('upstream_calls', 0):,} calls",
+        ]
+    roster = stats.get("admin_roster")
+    if roster:
+        lines += [
+            "",
+            "<b>👮 ADMIN ROSTERS</b>",
+            f"<b>Chats:</b> {roster.get('chats', 0):,} | <b>Admins:</b> {roster.get('admins', 0):,}",
+            f"<b>Hits:</b> {roster.get('hits', 0):,} | <b>Loads:</b> {roster.get('loads', 0):,} | <b>Failures:</b> {roster.get('failures', 0):,}",
+            f"<b>Member Updates:</b> {roster.get('updates', 0):,}",
+        ]
+    flood = stats.get("flood_control")
+    if flood:
+        lines += [
+            "",
+            "<b>🌊 FLOOD CONTROL</b>",
+            f"<b>Tracked:</b> {flood.get('tracked', 0):,}/{flood.get('capacity', 0):,} | <b>Evictions:</b> {flood.get('evictions', 0):,}",
+        ]
+    moderation = stats.get("moderation_queue")
+    if moderation:
+        lines += [
+            "",
+            "<b>🧹 MODERATION QUEUE</b>",
+            f"<b>Deleted:</b> {moderation.get('deleted', 0):,} in {moderation.get('delete_calls', 0):,} calls | <b>Failed:</b> {moderation.get('failed', 0):,}",
+            f"<b>Banned:</b> {moderation.get('banned', 0):,} (duplicates skipped: {moderation.get('duplicate_bans', 0):,})",
+            f"<b>Restricted / Lifted:</b> {moderation.get('restricted', 0):,} / {moderation.get('unrestricted', 0):,}",
+            f"<b>Pending:</b> {moderation.get('pending_deletes', 0):,} deletes, {moderation.get('pending_bans', 0):,} bans",
+        ]
+        if moderation.get("paused_for"):
+            lines.append(f"⏸️ Flood control — resuming in {moderation['paused_for']}s")
+    fingerprints = stats.get("spam_fingerprint")
+    if fingerprints:
+        lines += [
+            "",
+            "<b>🧬 CROSS-POST DETECTION</b>",
+            f"<b>Signatures:</b> {fingerprints.get('signatures', 0):,}/{fingerprints.get('capacity', 0):,} | <b>Flagged:</b> {fingerprints.get('flagged', 0):,}",
+        ]
+    schedules = stats.get("message_scheduler")
+    if schedules:
+        lines += [
+            "",
+            "<b>⏰ SCHEDULED MESSAGES</b>",
+            f"<b>Jobs:</b> {schedules.get('jobs', 0):,} | <b>Heap:</b> {schedules.get('heap', 0):,}",
+            f"<b>Sent:</b> {schedules.get('sent', 0):,} | <b>Failed:</b> {schedules.get('failed', 0):,} | <b>Caught Up:</b> {schedules.get('caught_up', 0):,}",
+            f"<b>Next Fire:</b> {schedules.get('next_fire') or 'N/A'}",
+        ]
+    welcome = stats.get("welcome")
+    if welcome:
+        lines += [
+            "",
+            "<b>👋 WELCOMES</b>",
+            f"<b>Members:</b> {welcome.get('members', 0):,} in {welcome.get('messages', 0):,} messages | <b>Failed:</b> {welcome.get('failed', 0):,}",
+            f"<b>Pending Chats:</b> {welcome.get('pending_chats', 0):,}",
+        ]
+    quarantined = stats.get("quarantine")
+    if quarantined:
+        lines += [
+            "",
+            "<b>🚧 NEW-MEMBER QUARANTINE</b>",
+            f"<b>Members:</b> {quarantined.get('members', 0):,} in {quarantined.get('chats', 0):,} chats",
+            f"<b>Admitted:</b> {quarantined.get('admitted', 0):,} | <b>Expired:</b> {quarantined.get('expired', 0):,} | <b>Pruned Rows:</b> {quarantined.get('pruned_rows', 0):,}",
+        ]
+    return "\n".join(lines)
+
+
+def format_portfolio_exposure(report: dict) -> str:
+    if not report:
+        return "<b>📊 PORTFOLIO EXPOSURE</b>\n━━━━━━━━━━━━━━━━━━━━━━━━\n\nNo tracked positions."
+
+    lines = [
+        "<b>📊 PORTFOLIO EXPOSURE</b>\n━━━━━━━━━━━━━━━━━━━━━━━━",
+        "",
+        f"<b>👤 Users:</b> {report['users']:,} | <b>Positions:</b> {report['positions']:,}",
+        f"<b>💼 AUM:</b> ${report['aum']:,.2f}",
+        f"<b>💵 Invested:</b> ${report['invested']:,.2f}",
+        f"<b>📈 P/L:</b> ${report['pnl_usd']:+,.2f} ({report['pnl_pct']:+.1f}%)",
+        f"<b>🟢 Users in Profit:</b> {report['users_in_profit']:,}",
+        f"<b>⚖️ Median Portfolio:</b> ${report['median_user_value']:,.2f}",
+        "",
+        "<b>🏦 TOP EXPOSURE</b>",
+    ]
+    for e in report["exposure"]:
+        lines.append(
+            f"• <code>{e['token_id']}</code> — ${e['value']:,.0f} ({e['share']:.1f}%) · "
+            f"{e['holders']} holders · P/L ${e['pnl_usd']:+,.0f}"
+        )
     return "\n".join(lines)
 
 
@@ -0,0 +1,226 @@
+import time
+import heapq
+import asyncio
+import hashlib
+import itertools
+from collections import deque
+from typing import Awaitable, Callable, Optional
+from cachetools import TTLCache
+from telegram.error import RetryAfter, Forbidden, BadRequest
+
+from core.logger import setup_logger
+from core.rate_limiter import TokenBucket
+from zenith_crypto_bot.repository import AlertOutboxRepo
+
+logger = setup_logger("ALERT_DELIVERY")
+
+WORKERS = 4
+SHARD_CAPACITY = 250
+GLOBAL_RATE = 25
+CHAT_INTERVAL = 1.0
+DEDUP_SECONDS = 600
+OUTBOX_POLL_SECONDS = 2
+OUTBOX_BATCH = 100
+MAX_SEND_ATTEMPTS = 3
+
+
+class _Shard:
+
+    def __init__(self):
+        self.chats: dict[int, deque] = {}
+        self.heap: list = []
+        self.size = 0
+        self.wakeup = asyncio.Event()
+
+
+class AlertDelivery:
+
+    def __init__(self, workers: int = WORKERS):
+        self._shards = [_Shard() for _ in range(workers)]
+        self._bucket = TokenBucket(GLOBAL_RATE)
+        self._next_send = TTLCache(maxsize=50000, ttl=CHAT_INTERVAL * 10)
+        self._recent = TTLCache(maxsize=50000, ttl=DEDUP_SECONDS)
+        self._seq = itertools.count()
+        self._spill: list[tuple[int, str]] = []
+        self._spilled_chats: dict[int, int] = {}
+        self._paused_until = 0.0
+        self._send: Optional[Callable[[int, str], Awaitable]] = None
+        self._on_forbidden: Optional[Callable[[int], Awaitable]] = None
+        self._counters = {
+            "submitted": 0, "delivered": 0, "deferred": 0, "spilled": 0,
+            "restored": 0, "requeued": 0, "duplicates": 0, "dropped": 0, "forbidden": 0,
+        }
+
+    @property
+    def workers(self) -> int:
+        return len(self._shards)
+
+    def bind(self, send: Callable[[int, str], Awaitable], on_forbidden: Callable[[int], Awaitable] = None):
+        self._send = send
+        self._on_forbidden = on_forbidden
+
+    def _shard(self, chat_id: int) -> _Shard:
+        return self._shards[chat_id % len(self._shards)]
+
+    def _enqueue(self, shard: _Shard, chat_id: int, text: str):
+        pending = shard.chats.get(chat_id)
+        if pending is None:
+            shard.chats[chat_id] = deque([text])
+            ready_at = max(time.monotonic(), self._next_send.get(chat_id, 0.0))
+            heapq.heappush(shard.heap, (ready_at, next(self._seq), chat_id))
+            shard.wakeup.set()
+        else:
+            pending.append(text)
+        shard.size += 1
+
+    def submit(self, chat_id: int, text: str) -> bool:
+        self._counters["submitted"] += 1
+        key = hashlib.sha1(f"{chat_id}:{text}".encode()).hexdigest()
+        if key in self._recent:
+            self._counters["duplicates"] += 1
+            return False
+        self._recent[key] = True
+
+        shard = self._shard(chat_id)
+        # Once a chat has messages in the outbox, later ones follow them there to keep per-chat order.
+        if shard.size >= SHARD_CAPACITY or chat_id in self._spilled_chats:
+            self._to_outbox(chat_id, text)
+            self._counters["spilled"] += 1
+            return True
+        self._enqueue(shard, chat_id, text)
+        return True
+
+    def _to_outbox(self, chat_id: int, text: str):
+        self._spill.append((chat_id, text))
+        self._spilled_chats[chat_id] = self._spilled_chats.get(chat_id, 0) + 1
+
+    def submit_many(self, entries: list[tuple[int, str]]) -> int:
+        return sum(self.submit(chat_id, text) for chat_id, text in entries)
+
+    async def _deliver(self, chat_id: int, text: str) -> bool:
+        for _ in range(MAX_SEND_ATTEMPTS):
+            pause = self._paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+            await self._bucket.acquire()
+            try:
+                await self._send(chat_id, text)
+                self._counters["delivered"] += 1
+                return True
+            except RetryAfter as e:
+                # Flood control applies to the whole bot, so every worker backs off together.
+                self._counters["deferred"] += 1
+                retry_after = e.retry_after.total_seconds() if hasattr(e.retry_after, "total_seconds") else e.retry_after
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after + 1)
+            except Forbidden:
+                self._counters["forbidden"] += 1
+                if self._on_forbidden:
+                    await self._on_forbidden(chat_id)
+                return True
+            except BadRequest as e:
+                self._counters["dropped"] += 1
+                logger.warning(f"Alert to {chat_id} rejected: {e}")
+                return True
+        # Still flood limited: park it in the outbox rather than lose it.
+        self._to_outbox(chat_id, text)
+        self._counters["requeued"] += 1
+        logger.warning(f"Alert to {chat_id} still rate limited after {MAX_SEND_ATTEMPTS} attempts, moved to outbox")
+        return False
+
+    async def worker(self, index: int):
+        shard = self._shards[index]
+        while True:
+            if not shard.heap:
+                shard.wakeup.clear()
+                await shard.wakeup.wait()
+                continue
+            ready_at, _, chat_id = shard.heap[0]
+            delay = ready_at - time.monotonic()
+            if delay > 0:
+                shard.wakeup.clear()
+                try:
+                    await asyncio.wait_for(shard.wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(shard.heap)
+            pending = shard.chats[chat_id]
+            text = pending.popleft()
+            shard.size -= 1
+            try:
+                if not await self._deliver(chat_id, text) and pending:
+                    # The rest of the chat's queue follows the requeued alert so it still goes out first.
+                    for later in pending:
+                        self._to_outbox(chat_id, later)
+                    shard.size -= len(pending)
+                    pending.clear()
+            except Exception as e:
+                self._counters["dropped"] += 1
+                logger.error(f"Dispatch failed: {e}")
+            next_at = time.monotonic() + CHAT_INTERVAL
+            self._next_send[chat_id] = next_at
+            if pending:
+                heapq.heappush(shard.heap, (next_at, next(self._seq), chat_id))
+            else:
+                del shard.chats[chat_id]
+
+    async def _flush_spill(self):
+        if not self._spill:
+            return
+        batch, self._spill = self._spill, []
+        try:
+            await AlertOutboxRepo.push(batch)
+        except Exception as e:
+            self._spill = batch + self._spill
+            logger.error(f"Alert outbox write failed: {e}")
+
+    async def _restore(self):
+        room = min(SHARD_CAPACITY - s.size for s in self._shards)
+        if room < SHARD_CAPACITY // 2:
+            return
+        rows = await AlertOutboxRepo.pop_batch(min(room, OUTBOX_BATCH))
+        for chat_id, text in rows:
+            remaining = self._spilled_chats.get(chat_id, 0) - 1
+            if remaining > 0:
+                self._spilled_chats[chat_id] = remaining
+            else:
+                self._spilled_chats.pop(chat_id, None)
+            self._enqueue(self._shard(chat_id), chat_id, text)
+            self._counters["restored"] += 1
+
+    async def _load_spilled(self):
+        # Rows left in the outbox by an earlier run still count, or new alerts would overtake them.
+        for chat_id, count in (await AlertOutboxRepo.pending_counts()).items():
+            self._spilled_chats[chat_id] = max(self._spilled_chats.get(chat_id, 0), count)
+
+    async def outbox_loop(self):
+        await self._load_spilled()
+        while True:
+            await asyncio.sleep(OUTBOX_POLL_SECONDS)
+            try:
+                await self._flush_spill()
+                await self._restore()
+            except Exception as e:
+                logger.error(f"Alert outbox cycle failed: {e}")
+
+    async def persist_pending(self):
+        for shard in self._shards:
+            for chat_id, pending in shard.chats.items():
+                self._spill.extend((chat_id, text) for text in pending)
+            shard.chats.clear()
+            shard.heap.clear()
+            shard.size = 0
+        await self._flush_spill()
+
+    def get_stats(self) -> dict:
+        return {
+            **self._counters,
+            "queued": sum(s.size for s in self._shards),
+            "shards": [s.size for s in self._shards],
+            "spill_pending": len(self._spill),
+            "paused_for": max(round(self._paused_until - time.monotonic(), 1), 0),
+        }
+
+
+alert_delivery = AlertDelivery()
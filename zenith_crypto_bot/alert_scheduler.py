@@ -0,0 +1,74 @@
+import math
+
+from zenith_crypto_bot import price_history
+
+MIN_POLL_SECONDS = 5.0
+MAX_POLL_SECONDS = 300.0
+FAILED_POLL_SECONDS = 30.0
+# Per-sqrt-second volatility assumed until a token has enough samples (~3%/day).
+DEFAULT_SIGMA = 0.0001
+# Fraction of the expected time-to-target we are willing to wait before the next look.
+SAFETY_FACTOR = 0.25
+VOLATILITY_WINDOW = 3600
+
+
+def distance_to_nearest_target(price: float, alerts: list) -> float:
+    if price <= 0:
+        return 0.0
+    nearest = math.inf
+    for alert in alerts:
+        if alert.direction == "above":
+            gap = (alert.target_price - price) / price
+        else:
+            gap = (price - alert.target_price) / price
+        nearest = min(nearest, max(gap, 0.0))
+    return nearest
+
+
+class AlertPollScheduler:
+
+    def __init__(self):
+        self._next_poll = {}
+
+    def sync(self, token_ids, now: float):
+        active = set(token_ids)
+        for token_id in list(self._next_poll):
+            if token_id not in active:
+                self.drop(token_id)
+        for token_id in active:
+            self._next_poll.setdefault(token_id, now)
+
+    def drop(self, token_id: str):
+        self._next_poll.pop(token_id, None)
+
+    def due(self, now: float) -> list[str]:
+        return [t for t, at in self._next_poll.items() if at <= now]
+
+    def sigma(self, token_id: str) -> float:
+        # Volatility comes from the shared price history, which every price fetch already feeds.
+        sigma = price_history.volatility(token_id, VOLATILITY_WINDOW)
+        if sigma is None:
+            return DEFAULT_SIGMA
+        return max(sigma, DEFAULT_SIGMA / 4)
+
+    def interval_for(self, token_id: str, distance: float) -> float:
+        # Random-walk estimate: time to move `distance` is roughly (distance / sigma)^2.
+        if distance <= 0:
+            return MIN_POLL_SECONDS
+        expected = (distance / self.sigma(token_id)) ** 2
+        return min(max(expected * SAFETY_FACTOR, MIN_POLL_SECONDS), MAX_POLL_SECONDS)
+
+    def schedule(self, token_id: str, price: float, alerts: list, now: float) -> float:
+        interval = self.interval_for(token_id, distance_to_nearest_target(price, alerts))
+        self._next_poll[token_id] = now + interval
+        return interval
+
+    def poll_now(self, token_id: str, now: float):
+        self._next_poll[token_id] = now
+
+    def defer(self, token_id: str, now: float):
+        if token_id in self._next_poll:
+            self._next_poll[token_id] = now + FAILED_POLL_SECONDS
+
+    def __len__(self):
+        return len(self._next_poll)
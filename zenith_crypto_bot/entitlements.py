@@ -0,0 +1,121 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+from cachetools import TTLCache
+from sqlalchemy import text
+
+from core.config import ENTITLEMENT_CACHE_TTL, ENTITLEMENT_CHANNEL
+from core.logger import setup_logger
+
+logger = setup_logger("ENTITLEMENTS")
+
+_MISSING = object()
+_INSTANCE_ID = uuid.uuid4().hex[:12]
+
+_expiry_cache = TTLCache(maxsize=200000, ttl=ENTITLEMENT_CACHE_TTL)
+_epoch = 0
+_counters = {"hits": 0, "misses": 0, "invalidations": 0, "remote_invalidations": 0}
+
+_listener_conn = None
+_listener_raw = None
+
+
+def lookup(user_id: int) -> tuple[bool, Optional[datetime], int]:
+    expires_at = _expiry_cache.get(user_id, _MISSING)
+    if expires_at is _MISSING:
+        _counters["misses"] += 1
+        return False, None, _epoch
+    _counters["hits"] += 1
+    return True, expires_at, _epoch
+
+
+def remember(user_id: int, expires_at: Optional[datetime], epoch: int):
+    # A write that raced with an invalidation may carry a pre-commit expiry; drop it.
+    if epoch != _epoch:
+        return
+    _expiry_cache[user_id] = expires_at
+
+
+def invalidate(user_id: int):
+    global _epoch
+    _epoch += 1
+    _counters["invalidations"] += 1
+    _expiry_cache.pop(user_id, None)
+
+
+async def publish_invalidation(session, user_id: int):
+    # pg_notify is transactional: peers only hear about the change once it commits.
+    if not ENTITLEMENT_CHANNEL:
+        return
+    await session.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": ENTITLEMENT_CHANNEL, "payload": f"{_INSTANCE_ID}:{user_id}"},
+    )
+
+
+def is_pro_at(expires_at: Optional[datetime], now: datetime = None) -> bool:
+    if expires_at is None:
+        return False
+    return expires_at > (now or datetime.now(timezone.utc))
+
+
+def days_left_at(expires_at: Optional[datetime], now: datetime = None) -> int:
+    now = now or datetime.now(timezone.utc)
+    if expires_at is None or expires_at <= now:
+        return 0
+    remaining = expires_at - now
+    return remaining.days + (1 if remaining.seconds > 0 else 0)
+
+
+def get_stats() -> dict:
+    lookups = _counters["hits"] + _counters["misses"]
+    return {
+        **_counters,
+        "size": len(_expiry_cache),
+        "hit_rate": round(_counters["hits"] / lookups * 100, 1) if lookups else 0.0,
+        "listening": _listener_raw is not None,
+    }
+
+
+def _on_notify(connection, pid, channel, payload):
+    instance, _, raw_user_id = payload.partition(":")
+    if instance == _INSTANCE_ID:
+        return
+    try:
+        user_id = int(raw_user_id)
+    except ValueError:
+        return
+    _counters["remote_invalidations"] += 1
+    invalidate(user_id)
+
+
+async def start_invalidation_listener(engine):
+    global _listener_conn, _listener_raw
+    if not ENTITLEMENT_CHANNEL or _listener_raw is not None:
+        return
+    try:
+        _listener_conn = await engine.connect()
+        raw = await _listener_conn.get_raw_connection()
+        await raw.driver_connection.add_listener(ENTITLEMENT_CHANNEL, _on_notify)
+        _listener_raw = raw.driver_connection
+        logger.info(f"📡 Entitlement invalidation channel '{ENTITLEMENT_CHANNEL}' online")
+    except Exception as e:
+        logger.error(f"Entitlement listener failed to start: {e}")
+        await stop_invalidation_listener()
+
+
+async def stop_invalidation_listener():
+    global _listener_conn, _listener_raw
+    if _listener_raw is not None:
+        try:
+            await _listener_raw.remove_listener(ENTITLEMENT_CHANNEL, _on_notify)
+        except Exception:
+            pass
+    _listener_raw = None
+    if _listener_conn is not None:
+        try:
+            await asyncio.wait_for(_listener_conn.close(), timeout=5)
+        except Exception:
+            pass
+    _listener_conn = None
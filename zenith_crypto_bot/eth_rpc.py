@@ -0,0 +1,228 @@
+import time
+import asyncio
+import itertools
+import httpx
+
+from core.config import ETH_RPC_URLS, ETH_RPC_HEDGE_DELAY_MS
+from core.logger import setup_logger
+from core.task_manager import fire_and_forget
+
+logger = setup_logger("ETH_RPC")
+
+MAX_BATCH_SIZE = 50
+LATENCY_ALPHA = 0.2
+MAX_COOLDOWN_SECONDS = 60
+
+
+class RpcError(Exception):
+    pass
+
+
+class Endpoint:
+
+    def __init__(self, url: str):
+        self.url = url
+        self.host = httpx.URL(url).host
+        self.latency = 0.5
+        self.failures = 0
+        self.cooldown_until = 0.0
+        self.requests = 0
+        self.errors = 0
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self.cooldown_until
+
+    def record_success(self, elapsed: float):
+        self.requests += 1
+        self.latency = (1 - LATENCY_ALPHA) * self.latency + LATENCY_ALPHA * elapsed
+        self.failures = 0
+        self.cooldown_until = 0.0
+
+    def record_failure(self):
+        self.requests += 1
+        self.errors += 1
+        self.failures += 1
+        self.cooldown_until = time.monotonic() + min(2 ** self.failures, MAX_COOLDOWN_SECONDS)
+
+
+class EthRpcClient:
+
+    def __init__(self, urls: list[str], hedge_delay: float):
+        self.endpoints = [Endpoint(u) for u in urls]
+        self.hedge_delay = hedge_delay
+        self._ids = itertools.count(1)
+        self._pending = []
+        self._flush_scheduled = False
+        self._client = None
+        self._methods = {}
+        self._counters = {"batches": 0, "requests": 0, "failovers": 0, "hedges": 0, "hedge_wins": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.endpoints)
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=10.0,
+                limits=httpx.Limits(max_keepalive_connections=10, max_connections=20),
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def call(self, method: str, params: list = None, hedge: bool = False):
+        # Calls issued in the same loop tick are flushed together as one JSON-RPC batch.
+        if not self.endpoints:
+            raise RpcError("No Ethereum RPC endpoint configured")
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        request = {"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": params or []}
+        self._pending.append((request, future, hedge, time.monotonic()))
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            loop.call_soon(self._flush)
+        return await future
+
+    def _flush(self):
+        self._flush_scheduled = False
+        pending, self._pending = self._pending, []
+        for i in range(0, len(pending), MAX_BATCH_SIZE):
+            fire_and_forget(self._dispatch(pending[i:i + MAX_BATCH_SIZE]))
+
+    def _record(self, method: str, elapsed):
+        m = self._methods.setdefault(method, {"calls": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0})
+        m["calls"] += 1
+        if elapsed is None:
+            m["errors"] += 1
+            return
+        ms = elapsed * 1000
+        m["total_ms"] += ms
+        m["max_ms"] = max(m["max_ms"], ms)
+
+    async def _dispatch(self, batch: list):
+        self._counters["batches"] += 1
+        self._counters["requests"] += len(batch)
+        payload = [request for request, _, _, _ in batch]
+        body = payload[0] if len(payload) == 1 else payload
+        try:
+            responses = await self._post(body, any(hedge for _, _, hedge, _ in batch))
+        except Exception as e:
+            for request, future, _, _ in batch:
+                self._record(request["method"], None)
+                if not future.done():
+                    future.set_exception(RpcError(f"{request['method']}: {e}"))
+            return
+
+        by_id = {r.get("id"): r for r in responses if isinstance(r, dict)}
+        now = time.monotonic()
+        for request, future, _, started in batch:
+            response = by_id.get(request["id"])
+            failed = response is None or response.get("error") is not None
+            self._record(request["method"], None if failed else now - started)
+            if future.done():
+                continue
+            if response is None:
+                future.set_exception(RpcError(f"{request['method']}: missing response"))
+            elif failed:
+                future.set_exception(RpcError(f"{request['method']}: {response['error']}"))
+            else:
+                future.set_result(response.get("result"))
+
+    def _ranked(self) -> list[Endpoint]:
+        return sorted(self.endpoints, key=lambda e: (not e.available, e.latency))
+
+    async def _post(self, body, hedge: bool) -> list:
+        candidates = self._ranked()
+        last_error = None
+        while candidates:
+            primary = candidates.pop(0)
+            backup = candidates[0] if hedge and candidates else None
+            try:
+                if backup:
+                    return await self._hedged(body, primary, backup)
+                return await self._send(primary, body)
+            except Exception as e:
+                last_error = e
+                if backup:
+                    candidates.pop(0)
+                if candidates:
+                    self._counters["failovers"] += 1
+                    logger.warning(f"RPC endpoint {primary.host} failed ({e}); failing over")
+        raise last_error or RpcError("All RPC endpoints failed")
+
+    async def _hedged(self, body, primary: Endpoint, backup: Endpoint) -> list:
+        first = asyncio.create_task(self._send(primary, body))
+        done, _ = await asyncio.wait({first}, timeout=self.hedge_delay)
+        if first in done:
+            if not first.exception():
+                return first.result()
+            return await self._send(backup, body)
+
+        self._counters["hedges"] += 1
+        second = asyncio.create_task(self._send(backup, body))
+        racing = {first, second}
+        try:
+            while racing:
+                done, racing = await asyncio.wait(racing, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if not task.exception():
+                        if task is second:
+                            self._counters["hedge_wins"] += 1
+                        return task.result()
+            raise second.exception()
+        finally:
+            for task in racing:
+                task.cancel()
+
+    async def _send(self, endpoint: Endpoint, body) -> list:
+        started = time.monotonic()
+        try:
+            resp = await self._http().post(endpoint.url, json=body)
+            resp.raise_for_status()
+            data = resp.json()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            endpoint.record_failure()
+            raise
+        if isinstance(body, list) and not isinstance(data, list):
+            endpoint.record_failure()
+            raise RpcError(f"Batch rejected by {endpoint.host}: {data}")
+        endpoint.record_success(time.monotonic() - started)
+        return data if isinstance(data, list) else [data]
+
+    def get_stats(self) -> dict:
+        return {
+            **self._counters,
+            "endpoints": [
+                {
+                    "host": e.host,
+                    "latency_ms": round(e.latency * 1000),
+                    "requests": e.requests,
+                    "errors": e.errors,
+                    "available": e.available,
+                }
+                for e in self._ranked()
+            ],
+            "methods": {
+                method: {
+                    "calls": m["calls"],
+                    "errors": m["errors"],
+                    "avg_ms": round(m["total_ms"] / max(m["calls"] - m["errors"], 1)),
+                    "max_ms": round(m["max_ms"]),
+                }
+                for method, m in self._methods.items()
+            },
+        }
+
+
+rpc = EthRpcClient(ETH_RPC_URLS, ETH_RPC_HEDGE_DELAY_MS / 1000)
+
+
+async def close_rpc_client():
+    await rpc.close()
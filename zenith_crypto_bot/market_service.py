@@ -1,12 +1,29 @@
 import os
+import time
+import asyncio
 import httpx
+from collections import deque
 from typing import Optional
+from cachetools import TTLCache
 from core.logger import setup_logger
-from core.config import ETH_RPC_URL, ETHERSCAN_API_KEY
+from core.rate_limiter import TokenBucket
+from zenith_crypto_bot.eth_rpc import rpc
+from zenith_crypto_bot import price_history, symbol_index
+from core.config import ETHERSCAN_API_KEY, ETHERSCAN_CALLS_PER_SECOND, COINGECKO_CALLS_PER_MINUTE, COINGECKO_PRIORITY
 
 logger = setup_logger("MARKET_SVC")
 _http_client: Optional[httpx.AsyncClient] = None
 
+PRIORITY_BACKGROUND = "background"
+PRIORITY_INTERACTIVE = "interactive"
+
+PRICE_FRESH_SECONDS = 5
+WALLET_PAGE_SIZE = 100
+WALLET_MAX_PAGES = 5
+
+_price_cache = TTLCache(maxsize=5000, ttl=900)
+_response_cache = TTLCache(maxsize=500, ttl=900)
+
 COINGECKO_BASE = "https://api.coingecko.com/api/v3"
 GOPLUS_BASE = "https://api.gopluslabs.io/api/v1"
 ETHERSCAN_BASE = "https://api.etherscan.io/api"
@@ -14,6 +31,7 @@ FEAR_GREED_URL = "https://api.alternative.me/fng/?limit=1"
 
 UNISWAP_V2_FACTORY = "0x5C69bEe701ef814a2B6a3EDD4B1652CB9cc5aA6f"
 PAIR_CREATED_TOPIC = "0x0d3648bd0f6ba80134a33ba9275ac585d9d315f0ad8355cddefde31afa28d0e9"
+WETH_ADDRESS = "0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2"
 
 SYMBOL_TO_ID = {
     "btc": "bitcoin", "eth": "ethereum", "sol": "solana", "bnb": "binancecoin",
@@ -48,56 +66,228 @@ async def close_market_client():
         _http_client = None
 
 
+class RequestBudget:
+    WINDOW = 60.0
+
+    def __init__(self, calls_per_minute: int, favoured: str = PRIORITY_BACKGROUND, reserve: float = 0.2, max_wait: float = 20.0):
+        self.calls_per_minute = max(1, calls_per_minute)
+        self.favoured = favoured if favoured in (PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE) else PRIORITY_BACKGROUND
+        self.reserve = reserve
+        self.max_wait = max_wait
+        self.blocked_until = 0.0
+        self._calls = deque()
+        self.stats = {"calls": 0, "queued": 0, "downgraded": 0, "rejected": 0, "throttled": 0}
+
+    def _limit(self, priority: str) -> int:
+        if priority == self.favoured:
+            return self.calls_per_minute
+        return max(1, int(self.calls_per_minute * (1 - self.reserve)))
+
+    def _prune(self, now: float):
+        while self._calls and self._calls[0] <= now - self.WINDOW:
+            self._calls.popleft()
+
+    def remaining(self, priority: str = PRIORITY_INTERACTIVE) -> int:
+        self._prune(time.monotonic())
+        return max(0, self._limit(priority) - len(self._calls))
+
+    def _wait_time(self, priority: str, now: float) -> float:
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self._prune(now)
+        over = len(self._calls) - self._limit(priority)
+        if over < 0:
+            return 0.0
+        return self._calls[over] + self.WINDOW - now
+
+    async def acquire(self, priority: str, can_downgrade: bool = False) -> bool:
+        # The disfavoured class gives way to cached data first and queues for less time.
+        if priority == self.favoured:
+            max_wait = self.max_wait
+        else:
+            max_wait = 0.0 if can_downgrade else self.max_wait / 4
+        deadline = time.monotonic() + max_wait
+        queued = False
+        while True:
+            now = time.monotonic()
+            wait = self._wait_time(priority, now)
+            if wait <= 0:
+                self._calls.append(now)
+                self.stats["calls"] += 1
+                return True
+            if now + wait > deadline:
+                self.stats["downgraded" if can_downgrade else "rejected"] += 1
+                return False
+            if not queued:
+                self.stats["queued"] += 1
+                queued = True
+            await asyncio.sleep(wait)
+
+    def penalize(self, retry_after: float):
+        self.stats["throttled"] += 1
+        self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+        logger.warning(f"CoinGecko rate limited, backing off {retry_after:.0f}s")
+
+    def get_stats(self) -> dict:
+        now = time.monotonic()
+        self._prune(now)
+        return {
+            **self.stats,
+            "used": len(self._calls),
+            "limit": self.calls_per_minute,
+            "favoured": self.favoured,
+            "blocked_for": max(0, round(self.blocked_until - now)),
+        }
+
+
+coingecko_budget = RequestBudget(COINGECKO_CALLS_PER_MINUTE, COINGECKO_PRIORITY)
+etherscan_limiter = TokenBucket(ETHERSCAN_CALLS_PER_SECOND)
+
+
+def _parse_retry_after(value: str | None) -> float:
+    try:
+        return max(1.0, float(value))
+    except (TypeError, ValueError):
+        return 60.0
+
+
+async def _coingecko_get(path: str, params: dict, priority: str, can_downgrade: bool = False):
+    if not await coingecko_budget.acquire(priority, can_downgrade):
+        return None
+    client = get_http_client()
+    resp = await client.get(f"{COINGECKO_BASE}{path}", params=params)
+    if resp.status_code == 429:
+        coingecko_budget.penalize(_parse_retry_after(resp.headers.get("Retry-After")))
+        return None
+    resp.raise_for_status()
+    return resp.json()
+
+
+async def _coingecko_fetch(path: str, params: dict, priority: str) -> tuple:
+    # Returns (data, fetched_at); over budget or during a 429 backoff that is the cached response.
+    key = (path, tuple(sorted(params.items())))
+    cached = _response_cache.get(key)
+    data = await _coingecko_get(path, params, priority, can_downgrade=cached is not None)
+    if data is None:
+        return cached or (None, None)
+    _response_cache[key] = (data, time.time())
+    return _response_cache[key]
+
+
+async def _coingecko_cached(path: str, params: dict, priority: str):
+    return (await _coingecko_fetch(path, params, priority))[0]
+
+
 def resolve_token_id(symbol_or_id: str) -> str:
     key = symbol_or_id.lower().strip()
-    return SYMBOL_TO_ID.get(key, key)
+    if key in SYMBOL_TO_ID:
+        return SYMBOL_TO_ID[key]
+    return symbol_index.lookup(key) or key
 
 
-async def get_prices(token_ids: list[str]) -> dict:
+async def get_prices(token_ids: list[str], priority: str = PRIORITY_INTERACTIVE) -> dict:
     if not token_ids:
         return {}
-    client = get_http_client()
-    ids_str = ",".join(set(token_ids))
+    wanted = set(token_ids)
+    now = time.monotonic()
+    cached = {t: _price_cache[t] for t in wanted if t in _price_cache}
+    if len(cached) == len(wanted) and all(now - ts <= PRICE_FRESH_SECONDS for ts, _ in cached.values()):
+        return {t: entry for t, (_, entry) in cached.items()}
     try:
-        resp = await client.get(
-            f"{COINGECKO_BASE}/simple/price",
-            params={"ids": ids_str, "vs_currencies": "usd", "include_24hr_change": "true"},
+        data = await _coingecko_get(
+            "/simple/price",
+            {"ids": ",".join(wanted), "vs_currencies": "usd", "include_24hr_change": "true"},
+            priority, can_downgrade=bool(cached),
         )
-        resp.raise_for_status()
-        return resp.json()
     except Exception as e:
         logger.error(f"CoinGecko price fetch failed: {e}")
-        return {}
+        data = None
+    if data is None:
+        return {t: entry for t, (_, entry) in cached.items()}
+    now = time.monotonic()
+    for token_id, entry in data.items():
+        _price_cache[token_id] = (now, entry)
+    price_history.record_prices(data)
+    return data
 
 
-async def get_top_movers() -> tuple[list, list]:
-    client = get_http_client()
+def split_movers(markets: list, count: int = 5) -> tuple[list, list]:
+    sorted_by_change = sorted(markets, key=lambda x: x.get("price_change_percentage_24h") or 0)
+    losers = sorted_by_change[:count]
+    gainers = sorted_by_change[-count:][::-1]
+    return gainers, losers
+
+
+async def get_top_markets(priority: str = PRIORITY_INTERACTIVE) -> list:
+    return (await get_top_markets_at(priority))[0]
+
+
+async def get_top_markets_at(priority: str = PRIORITY_INTERACTIVE) -> tuple[list, float | None]:
+    # Also returns when CoinGecko served the data, which is in the past on a cache hit.
     try:
-        resp = await client.get(
-            f"{COINGECKO_BASE}/coins/markets",
-            params={
+        data, fetched_at = await _coingecko_fetch(
+            "/coins/markets",
+            {
                 "vs_currency": "usd", "order": "market_cap_desc",
                 "per_page": 100, "page": 1, "sparkline": "false",
                 "price_change_percentage": "24h",
             },
+            priority,
         )
-        resp.raise_for_status()
-        data = resp.json()
-        sorted_by_change = sorted(data, key=lambda x: x.get("price_change_percentage_24h") or 0)
-        losers = sorted_by_change[:5]
-        gainers = sorted_by_change[-5:][::-1]
-        return gainers, losers
+        return data or [], fetched_at
     except Exception as e:
-        logger.error(f"CoinGecko top movers failed: {e}")
+        logger.error(f"CoinGecko markets fetch failed: {e}")
+        return [], None
+
+
+async def get_coin_list(priority: str = PRIORITY_BACKGROUND) -> list | None:
+    try:
+        return await _coingecko_get("/coins/list", {}, priority)
+    except Exception as e:
+        logger.error(f"CoinGecko coin list fetch failed: {e}")
+        return None
+
+
+async def get_market_ranks(pages: int = 2, priority: str = PRIORITY_BACKGROUND) -> dict:
+    ranks = {}
+    for page in range(1, pages + 1):
+        try:
+            data = await _coingecko_get(
+                "/coins/markets",
+                {"vs_currency": "usd", "order": "market_cap_desc", "per_page": 250, "page": page},
+                priority,
+            )
+        except Exception as e:
+            logger.error(f"CoinGecko rank fetch failed: {e}")
+            break
+        if not data:
+            break
+        for c in data:
+            if c.get("id") and c.get("market_cap_rank"):
+                ranks[c["id"]] = c["market_cap_rank"]
+    return ranks
+
+
+async def get_top_movers(priority: str = PRIORITY_INTERACTIVE) -> tuple[list, list]:
+    data = await get_top_markets(priority)
+    if not data:
         return [], []
+    return split_movers(data)
 
 
-async def search_token(query: str) -> dict | None:
-    client = get_http_client()
+async def get_global_market(priority: str = PRIORITY_INTERACTIVE) -> dict | None:
     try:
-        resp = await client.get(f"{COINGECKO_BASE}/search", params={"query": query})
-        resp.raise_for_status()
-        coins = resp.json().get("coins", [])
+        data = await _coingecko_cached("/global", {}, priority)
+        return (data or {}).get("data")
+    except Exception as e:
+        logger.error(f"CoinGecko global fetch failed: {e}")
+        return None
+
+
+async def search_token(query: str, priority: str = PRIORITY_INTERACTIVE) -> dict | None:
+    try:
+        data = await _coingecko_cached("/search", {"query": query}, priority)
+        coins = (data or {}).get("coins", [])
         if coins:
             c = coins[0]
             return {"id": c["id"], "symbol": c["symbol"].upper(), "name": c["name"]}
@@ -106,52 +296,92 @@ async def search_token(query: str) -> dict | None:
     return None
 
 
-async def get_token_security(contract: str, chain_id: str = "1") -> dict | None:
+async def get_token_security_batch(contracts: list[str], chain_id: str = "1") -> dict | None:
+    if not contracts:
+        return {}
     client = get_http_client()
     try:
         resp = await client.get(
             f"{GOPLUS_BASE}/token_security/{chain_id}",
-            params={"contract_addresses": contract.lower()},
+            params={"contract_addresses": ",".join(c.lower() for c in contracts)},
         )
         resp.raise_for_status()
         data = resp.json()
-        result = data.get("result", {})
-        return result.get(contract.lower())
+        return {k.lower(): v for k, v in (data.get("result") or {}).items()}
     except Exception as e:
         logger.error(f"GoPlus security scan failed: {e}")
         return None
 
 
-async def get_wallet_recent_txns(wallet_address: str, last_known_hash: str = None) -> list[dict]:
+async def get_token_security(contract: str, chain_id: str = "1") -> dict | None:
+    return (await get_token_security_batch([contract], chain_id) or {}).get(contract.lower())
+
+
+async def _etherscan_txlist(wallet_address: str, start_block: int, page: int, offset: int, sort: str) -> list[dict]:
+    await etherscan_limiter.acquire()
+    resp = await get_http_client().get(
+        ETHERSCAN_BASE,
+        params={
+            "module": "account", "action": "txlist",
+            "address": wallet_address, "startblock": start_block, "endblock": 99999999,
+            "page": page, "offset": offset, "sort": sort,
+            "apikey": ETHERSCAN_API_KEY,
+        },
+    )
+    resp.raise_for_status()
+    data = resp.json()
+    result = data.get("result", [])
+    if data.get("status") != "1":
+        # An empty history is reported as status 0 with an empty list; anything else is an error.
+        if isinstance(result, list):
+            return []
+        raise RuntimeError(result or data.get("message"))
+    return result
+
+
+async def get_wallet_txns_since(
+    wallet_address: str, start_block: int = None, last_known_hash: str = None,
+) -> tuple[list[dict], int | None] | None:
     if not ETHERSCAN_API_KEY:
-        return []
-    client = get_http_client()
+        return None
     try:
-        resp = await client.get(
-            ETHERSCAN_BASE,
-            params={
-                "module": "account", "action": "txlist",
-                "address": wallet_address, "startblock": 0, "endblock": 99999999,
-                "page": 1, "offset": 10, "sort": "desc",
-                "apikey": ETHERSCAN_API_KEY,
-            },
-        )
-        resp.raise_for_status()
-        data = resp.json()
-        if data.get("status") != "1":
-            return []
-        txns = data.get("result", [])
-        if last_known_hash:
-            new_txns = []
-            for tx in txns:
-                if tx.get("hash") == last_known_hash:
-                    break
-                new_txns.append(tx)
-            return new_txns
-        return txns[:5]
+        if start_block is None:
+            txns = await _etherscan_txlist(wallet_address, 0, 1, 10, "desc")
+            cursor = max((int(tx.get("blockNumber", 0)) for tx in txns), default=None)
+            if last_known_hash:
+                new_txns = []
+                for tx in txns:
+                    if tx.get("hash") == last_known_hash:
+                        break
+                    new_txns.append(tx)
+                return new_txns, cursor
+            return txns[:5], cursor
+
+        txns = []
+        for page in range(1, WALLET_MAX_PAGES + 1):
+            batch = await _etherscan_txlist(wallet_address, start_block + 1, page, WALLET_PAGE_SIZE, "asc")
+            txns.extend(batch)
+            if len(batch) < WALLET_PAGE_SIZE:
+                cursor = int(txns[-1]["blockNumber"]) if txns else start_block
+                break
+        else:
+            # Out of pages: the last block may spill onto the next page, so leave it for the next poll.
+            last_block = int(txns[-1]["blockNumber"])
+            complete = [tx for tx in txns if int(tx["blockNumber"]) < last_block]
+            if complete:
+                txns, cursor = complete, last_block - 1
+            else:
+                cursor = last_block
+
+        seen, unique = set(), []
+        for tx in txns:
+            if tx.get("hash") not in seen:
+                seen.add(tx.get("hash"))
+                unique.append(tx)
+        return unique[::-1], cursor
     except Exception as e:
         logger.error(f"Etherscan wallet fetch failed: {e}")
-        return []
+        return None
 
 
 async def get_wallet_token_txns(wallet_address: str) -> list[dict]:
@@ -159,6 +389,7 @@ async def get_wallet_token_txns(wallet_address: str) -> list[dict]:
         return []
     client = get_http_client()
     try:
+        await etherscan_limiter.acquire()
         resp = await client.get(
             ETHERSCAN_BASE,
             params={
@@ -195,27 +426,15 @@ async def get_fear_greed_index() -> dict | None:
 
 
 async def get_gas_prices() -> dict | None:
-    if not ETH_RPC_URL:
+    if not rpc.enabled:
         return None
-    client = get_http_client()
     try:
-        resp = await client.post(
-            ETH_RPC_URL,
-            json={"jsonrpc": "2.0", "method": "eth_gasPrice", "params": [], "id": 1},
+        hex_gas, block = await asyncio.gather(
+            rpc.call("eth_gasPrice", hedge=True),
+            rpc.call("eth_getBlockByNumber", ["latest", False], hedge=True),
         )
-        resp.raise_for_status()
-        hex_gas = resp.json().get("result", "0x0")
-        gas_wei = int(hex_gas, 16)
-        gas_gwei = gas_wei / 1e9
-
-        resp2 = await client.post(
-            ETH_RPC_URL,
-            json={"jsonrpc": "2.0", "method": "eth_getBlockByNumber", "params": ["latest", False], "id": 2},
-        )
-        resp2.raise_for_status()
-        block = resp2.json().get("result", {})
-        base_fee_hex = block.get("baseFeePerGas", "0x0")
-        base_fee_gwei = int(base_fee_hex, 16) / 1e9
+        gas_gwei = int(hex_gas or "0x0", 16) / 1e9
+        base_fee_gwei = int((block or {}).get("baseFeePerGas", "0x0"), 16) / 1e9
 
         return {
             "gas_gwei": round(gas_gwei, 2),
@@ -229,53 +448,60 @@ async def get_gas_prices() -> dict | None:
         return None
 
 
-async def get_new_pairs(from_block: int = None) -> tuple[list[dict], int]:
-    if not ETH_RPC_URL:
-        return [], 0
-    client = get_http_client()
+async def get_block_number() -> int | None:
+    if not rpc.enabled:
+        return None
     try:
-        resp = await client.post(
-            ETH_RPC_URL,
-            json={"jsonrpc": "2.0", "method": "eth_blockNumber", "params": [], "id": 1},
-        )
-        resp.raise_for_status()
-        latest_block = int(resp.json().get("result", "0x0"), 16)
-
-        if from_block is None:
-            from_block = latest_block - 50
-
-        resp2 = await client.post(
-            ETH_RPC_URL,
-            json={
-                "jsonrpc": "2.0",
-                "method": "eth_getLogs",
-                "params": [{
-                    "address": UNISWAP_V2_FACTORY,
-                    "topics": [PAIR_CREATED_TOPIC],
-                    "fromBlock": hex(from_block),
-                    "toBlock": hex(latest_block),
-                }],
-                "id": 2,
-            },
-        )
-        resp2.raise_for_status()
-        logs = resp2.json().get("result", [])
-
-        pairs = []
-        for log in logs[-5:]:
-            topics = log.get("topics", [])
-            if len(topics) >= 3:
-                token0 = "0x" + topics[1][-40:]
-                token1 = "0x" + topics[2][-40:]
-                pair_address = "0x" + log.get("data", "")[26:66] if log.get("data") else "unknown"
-                pairs.append({
-                    "token0": token0,
-                    "token1": token1,
-                    "pair": pair_address,
-                    "block": int(log.get("blockNumber", "0x0"), 16),
-                    "tx_hash": log.get("transactionHash", ""),
-                })
-        return pairs, latest_block
+        return int(await rpc.call("eth_blockNumber"), 16)
+    except Exception as e:
+        logger.error(f"Block number fetch failed: {e}")
+        return None
+
+
+async def get_block_hash(block_number: int) -> str | None:
+    if not rpc.enabled:
+        return None
+    try:
+        block = await rpc.call("eth_getBlockByNumber", [hex(block_number), False])
+        return block.get("hash") if block else None
+    except Exception as e:
+        logger.error(f"Block header fetch failed: {e}")
+        return None
+
+
+def decode_pair_created(log: dict) -> dict | None:
+    topics = log.get("topics", [])
+    data = log.get("data", "")
+    if len(topics) < 3 or len(data) < 66:
+        return None
+    return {
+        "token0": "0x" + topics[1][-40:].lower(),
+        "token1": "0x" + topics[2][-40:].lower(),
+        "pair": "0x" + data[26:66].lower(),
+        "block": int(log.get("blockNumber", "0x0"), 16),
+        "log_index": int(log.get("logIndex", "0x0"), 16),
+        "tx_hash": log.get("transactionHash", ""),
+    }
+
+
+async def get_pair_created_logs(from_block: int, to_block: int) -> list[dict] | None:
+    if not rpc.enabled:
+        return None
+    try:
+        logs = await rpc.call("eth_getLogs", [{
+            "address": UNISWAP_V2_FACTORY,
+            "topics": [PAIR_CREATED_TOPIC],
+            "fromBlock": hex(from_block),
+            "toBlock": hex(to_block),
+        }])
     except Exception as e:
         logger.error(f"New pair scan failed: {e}")
-        return [], from_block or 0
+        return None
+    pairs = []
+    for log in logs or []:
+        if log.get("removed"):
+            continue
+        pair = decode_pair_created(log)
+        if pair:
+            pairs.append(pair)
+    return pairs
@@ -0,0 +1,145 @@
+import time
+import asyncio
+from dataclasses import dataclass, field
+from typing import Optional
+
+from core.logger import setup_logger
+from zenith_crypto_bot import price_history, symbol_index
+from zenith_crypto_bot.market_service import (
+    get_fear_greed_index, get_top_markets_at, get_global_market, get_gas_prices,
+    get_coin_list, get_market_ranks, split_movers, PRIORITY_BACKGROUND,
+)
+
+logger = setup_logger("MARKET_SNAP")
+
+REFRESH_SECONDS = 60
+MAX_AGE_SECONDS = 300
+SYMBOL_INDEX_REFRESH_SECONDS = 86400
+SYMBOL_INDEX_RETRY_SECONDS = 900
+
+
+@dataclass(frozen=True)
+class MarketSnapshot:
+    fear_greed: Optional[dict] = None
+    top_coins: tuple = ()
+    gainers: tuple = ()
+    losers: tuple = ()
+    btc: dict = field(default_factory=dict)
+    eth: dict = field(default_factory=dict)
+    btc_dominance: Optional[float] = None
+    eth_dominance: Optional[float] = None
+    gas: Optional[dict] = None
+    updated_at: float = 0.0
+
+    @property
+    def age_seconds(self) -> float:
+        return time.time() - self.updated_at if self.updated_at else float("inf")
+
+    def coin(self, coin_id: str) -> dict:
+        for c in self.top_coins:
+            if c.get("id") == coin_id:
+                return c
+        return {}
+
+
+_snapshot = MarketSnapshot()
+_refresh_task: Optional[asyncio.Task] = None
+
+
+def _build(previous: MarketSnapshot, fng, markets, fetched_at, global_data, gas) -> MarketSnapshot:
+    # A failed upstream keeps the previous value so one outage never blanks the whole card.
+    if markets:
+        top_coins = tuple(markets)
+        gainers, losers = split_movers(markets)
+        by_id = {c.get("id"): c for c in markets}
+        btc, eth = by_id.get("bitcoin", {}), by_id.get("ethereum", {})
+    else:
+        top_coins, gainers, losers = previous.top_coins, previous.gainers, previous.losers
+        btc, eth = previous.btc, previous.eth
+
+    btc_dom, eth_dom = previous.btc_dominance, previous.eth_dominance
+    if global_data:
+        pct = global_data.get("market_cap_percentage", {})
+        btc_dom, eth_dom = pct.get("btc", btc_dom), pct.get("eth", eth_dom)
+
+    return MarketSnapshot(
+        fear_greed=fng or previous.fear_greed,
+        top_coins=top_coins,
+        gainers=tuple(gainers),
+        losers=tuple(losers),
+        btc=btc,
+        eth=eth,
+        btc_dominance=btc_dom,
+        eth_dominance=eth_dom,
+        gas=gas or previous.gas,
+        # Age tracks when the market data was fetched, so an outage or a cached reply shows as stale.
+        updated_at=fetched_at if markets and fetched_at else previous.updated_at,
+    )
+
+
+async def _refresh() -> MarketSnapshot:
+    global _snapshot
+    fng, (markets, fetched_at), global_data, gas = await asyncio.gather(
+        get_fear_greed_index(),
+        get_top_markets_at(PRIORITY_BACKGROUND),
+        get_global_market(PRIORITY_BACKGROUND),
+        get_gas_prices(),
+    )
+    # A cached reply was already recorded when it was fetched, or is too old to add now.
+    if markets and fetched_at and fetched_at > _snapshot.updated_at:
+        price_history.record_prices({c["id"]: {"usd": c.get("current_price")} for c in markets if c.get("id")}, fetched_at)
+    _snapshot = _build(_snapshot, fng, markets, fetched_at, global_data, gas)
+    return _snapshot
+
+
+async def refresh_snapshot() -> MarketSnapshot:
+    # Concurrent callers share one in-flight refresh.
+    global _refresh_task
+    if _refresh_task is None or _refresh_task.done():
+        _refresh_task = asyncio.create_task(_refresh())
+    return await asyncio.shield(_refresh_task)
+
+
+def peek_snapshot() -> MarketSnapshot:
+    return _snapshot
+
+
+async def get_snapshot() -> MarketSnapshot:
+    if _snapshot.age_seconds > MAX_AGE_SECONDS:
+        try:
+            return await refresh_snapshot()
+        except Exception as e:
+            logger.error(f"Forced snapshot refresh failed: {e}")
+    return _snapshot
+
+
+async def snapshot_refresher():
+    while True:
+        try:
+            await refresh_snapshot()
+        except Exception as e:
+            logger.error(f"Snapshot refresh failed: {e}")
+        await asyncio.sleep(REFRESH_SECONDS)
+
+
+async def refresh_symbol_index() -> bool:
+    coins = await get_coin_list(PRIORITY_BACKGROUND)
+    if not coins:
+        return False
+    ranks = await get_market_ranks(priority=PRIORITY_BACKGROUND)
+    symbol_index.build(coins, ranks)
+    await symbol_index.save_cache(coins, ranks)
+    return True
+
+
+async def symbol_index_refresher():
+    # A fresh on-disk copy saves the /coins/list download on restarts.
+    if await symbol_index.load_cache():
+        await asyncio.sleep(max(SYMBOL_INDEX_REFRESH_SECONDS - symbol_index.age_seconds(), 0))
+    while True:
+        try:
+            ok = await refresh_symbol_index()
+        except Exception as e:
+            logger.error(f"Symbol index refresh failed: {e}")
+            ok = False
+        await asyncio.sleep(SYMBOL_INDEX_REFRESH_SECONDS if ok else SYMBOL_INDEX_RETRY_SECONDS)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, BigInteger, String, Boolean, DateTime, Integer, Float, UniqueConstraint
+from sqlalchemy import Column, BigInteger, String, Boolean, DateTime, Integer, Float, UniqueConstraint, JSON, Text, LargeBinary
 from sqlalchemy.orm import declarative_base
 from datetime import datetime, timezone
 
@@ -15,7 +15,7 @@ class CryptoUser(CryptoBase):
 class Subscription(CryptoBase):
     __tablename__ = "crypto_subscriptions"
     user_id = Column(BigInteger, primary_key=True)
-    expires_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
 
@@ -58,6 +58,7 @@ class TrackedWallet(CryptoBase):
     wallet_address = Column(String(100), nullable=False)
     label = Column(String(50), default="Unnamed Wallet")
     last_checked_tx = Column(String(100), nullable=True)
+    last_seen_block = Column(BigInteger, nullable=True)
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     __table_args__ = (UniqueConstraint("user_id", "wallet_address", name="uix_user_wallet"),)
 
@@ -71,4 +72,54 @@ class WatchlistToken(CryptoBase):
     entry_price = Column(Float, nullable=False)
     quantity = Column(Float, default=1.0)
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
-    __table_args__ = (UniqueConstraint("user_id", "token_id", name="uix_user_watchlist_token"),)
\ No newline at end of file
+    __table_args__ = (UniqueConstraint("user_id", "token_id", name="uix_user_watchlist_token"),)
+
+
+class TokenSecurityReport(CryptoBase):
+    __tablename__ = "crypto_token_security"
+    chain_id = Column(String(10), primary_key=True)
+    contract = Column(String(100), primary_key=True)
+    report = Column(JSON, nullable=False)
+    fetched_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), index=True)
+
+
+class NewPair(CryptoBase):
+    __tablename__ = "crypto_new_pairs"
+    pair = Column(String(42), primary_key=True)
+    token0 = Column(String(42), nullable=False)
+    token1 = Column(String(42), nullable=False)
+    block_number = Column(BigInteger, index=True, nullable=False)
+    log_index = Column(Integer, default=0)
+    tx_hash = Column(String(66), nullable=False)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+
+class IndexerCursor(CryptoBase):
+    __tablename__ = "crypto_indexer_cursors"
+    name = Column(String(50), primary_key=True)
+    block_number = Column(BigInteger, nullable=False)
+    block_hash = Column(String(66), nullable=True)
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+
+class AlertOutbox(CryptoBase):
+    __tablename__ = "crypto_alert_outbox"
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    chat_id = Column(BigInteger, nullable=False)
+    text = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+
+class NotificationLedger(CryptoBase):
+    __tablename__ = "crypto_notification_ledger"
+    user_id = Column(BigInteger, primary_key=True)
+    kind = Column(String(30), primary_key=True)
+    period_end = Column(DateTime(timezone=True), primary_key=True)
+    sent_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), index=True)
+
+
+class PriceHistory(CryptoBase):
+    __tablename__ = "crypto_price_history"
+    token_id = Column(String(100), primary_key=True)
+    samples = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
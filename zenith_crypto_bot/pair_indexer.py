@@ -0,0 +1,133 @@
+import asyncio
+from collections import deque
+from typing import Callable, Optional
+
+from core.logger import setup_logger
+from zenith_crypto_bot.market_service import get_block_number, get_block_hash, get_pair_created_logs
+from zenith_crypto_bot.repository import PairIndexRepo
+from zenith_crypto_bot.token_metadata import get_token_metadata
+
+logger = setup_logger("PAIR_INDEXER")
+
+CURSOR_NAME = "uniswap_v2_pairs"
+POLL_SECONDS = 12
+BACKFILL_BLOCKS = 50
+MAX_RANGE = 500
+CONFIRMATIONS = 2
+REORG_DEPTH = 12
+RING_SIZE = 100
+
+_ring: deque = deque(maxlen=RING_SIZE)
+_cursor: Optional[tuple[int, Optional[str]]] = None
+_listeners: list[Callable[[list[dict]], None]] = []
+_loaded = False
+_head = 0
+
+
+def add_listener(callback: Callable[[list[dict]], None]):
+    _listeners.append(callback)
+
+
+def recent_pairs(limit: int = 5) -> list[dict]:
+    return list(_ring)[-limit:]
+
+
+def last_indexed_block() -> int:
+    return _cursor[0] if _cursor else 0
+
+
+def _publish(pairs: list[dict]):
+    _ring.extend(pairs)
+    for callback in _listeners:
+        try:
+            callback(pairs)
+        except Exception as e:
+            logger.error(f"Pair listener failed: {e}")
+
+
+def _drop_after(block_number: int):
+    kept = [p for p in _ring if p["block"] <= block_number]
+    _ring.clear()
+    _ring.extend(kept)
+
+
+async def _load_state(latest: int):
+    global _cursor, _loaded
+    rows = await PairIndexRepo.get_recent_pairs(RING_SIZE)
+    _ring.clear()
+    _ring.extend({
+        "token0": r.token0, "token1": r.token1, "pair": r.pair,
+        "block": r.block_number, "log_index": r.log_index, "tx_hash": r.tx_hash,
+    } for r in reversed(rows))
+    _cursor = await PairIndexRepo.get_cursor(CURSOR_NAME) or (max(latest - BACKFILL_BLOCKS, 0), None)
+    _loaded = True
+    await get_token_metadata([t for p in _ring for t in (p["token0"], p["token1"])])
+    logger.info(f"📦 Pair index resuming at block {_cursor[0]:,} ({len(_ring)} cached pairs)")
+
+
+async def _rewind(block_number: int):
+    global _cursor
+    rewind_to = max(block_number - REORG_DEPTH, 0)
+    logger.warning(f"⚠️ Reorg detected at block {block_number:,}; rewinding to {rewind_to:,}")
+    await PairIndexRepo.rollback_to(CURSOR_NAME, rewind_to)
+    _drop_after(rewind_to)
+    _cursor = (rewind_to, None)
+
+
+def is_behind() -> bool:
+    return _cursor is not None and _head - CONFIRMATIONS > _cursor[0]
+
+
+async def index_once() -> int:
+    global _cursor, _head
+    if not _loaded:
+        latest = await get_block_number()
+        if latest is None:
+            return 0
+        await _load_state(latest)
+
+    block, block_hash = _cursor
+    # Head and cursor header are requested together so they share one RPC batch.
+    latest, canonical = await asyncio.gather(
+        get_block_number(),
+        get_block_hash(block) if block_hash else asyncio.sleep(0),
+    )
+    if latest is None:
+        return 0
+    _head = latest
+    if block_hash:
+        if canonical is None:
+            return 0
+        if canonical != block_hash:
+            await _rewind(block)
+            block = _cursor[0]
+
+    head = latest - CONFIRMATIONS
+    if head <= block:
+        return 0
+    to_block = min(head, block + MAX_RANGE)
+    to_hash, pairs = await asyncio.gather(
+        get_block_hash(to_block),
+        get_pair_created_logs(block + 1, to_block),
+    )
+    if to_hash is None or pairs is None:
+        return 0
+
+    pairs.sort(key=lambda p: (p["block"], p["log_index"]))
+    await PairIndexRepo.save_batch(CURSOR_NAME, pairs, to_block, to_hash)
+    _cursor = (to_block, to_hash)
+    if pairs:
+        await get_token_metadata([t for p in pairs for t in (p["token0"], p["token1"])])
+        _publish(pairs)
+    return len(pairs)
+
+
+async def pair_indexer():
+    while True:
+        before = last_indexed_block()
+        try:
+            await index_once()
+        except Exception as e:
+            logger.error(f"Pair indexing failed: {e}")
+        caught_up = last_indexed_block() <= before or not is_behind()
+        await asyncio.sleep(POLL_SECONDS if caught_up else 1)
@@ -0,0 +1,130 @@
+from dataclasses import dataclass
+import numpy as np
+
+
+@dataclass
+class Positions:
+    user_ids: np.ndarray
+    token_codes: np.ndarray
+    token_ids: np.ndarray
+    symbols: np.ndarray
+    entry: np.ndarray
+    quantity: np.ndarray
+
+    def __len__(self):
+        return len(self.entry)
+
+
+@dataclass
+class PortfolioResult:
+    positions: Positions
+    price: np.ndarray
+    change_24h: np.ndarray
+    invested: np.ndarray
+    value: np.ndarray
+    pnl_usd: np.ndarray
+    pnl_pct: np.ndarray
+    weight: np.ndarray
+    total_invested: float
+    total_value: float
+
+    @property
+    def total_pnl(self) -> float:
+        return self.total_value - self.total_invested
+
+    @property
+    def total_pnl_pct(self) -> float:
+        return self.total_pnl / self.total_invested * 100 if self.total_invested > 0 else 0.0
+
+    def rows(self):
+        p = self.positions
+        for i in range(len(p)):
+            yield {
+                "symbol": p.symbols[i],
+                "token_id": p.token_ids[p.token_codes[i]],
+                "quantity": float(p.quantity[i]),
+                "entry": float(p.entry[i]),
+                "price": float(self.price[i]),
+                "change_24h": float(self.change_24h[i]),
+                "value": float(self.value[i]),
+                "pnl_usd": float(self.pnl_usd[i]),
+                "pnl_pct": float(self.pnl_pct[i]),
+                "weight": float(self.weight[i]),
+            }
+
+
+def load_positions(rows) -> Positions:
+    token_ids, token_codes = np.unique(np.array([r.token_id for r in rows], dtype=object), return_inverse=True)
+    return Positions(
+        user_ids=np.fromiter((r.user_id for r in rows), dtype=np.int64, count=len(rows)),
+        token_codes=token_codes.astype(np.int64),
+        token_ids=token_ids,
+        symbols=np.array([r.token_symbol for r in rows], dtype=object),
+        entry=np.fromiter((r.entry_price for r in rows), dtype=np.float64, count=len(rows)),
+        quantity=np.fromiter((r.quantity for r in rows), dtype=np.float64, count=len(rows)),
+    )
+
+
+def evaluate(positions: Positions, prices: dict) -> PortfolioResult:
+    # Prices are looked up once per distinct token and broadcast back to positions.
+    unit_price = np.array([prices.get(t, {}).get("usd") or 0.0 for t in positions.token_ids], dtype=np.float64)
+    unit_change = np.array([prices.get(t, {}).get("usd_24h_change") or 0.0 for t in positions.token_ids], dtype=np.float64)
+    price = unit_price[positions.token_codes]
+    change = unit_change[positions.token_codes]
+
+    invested = positions.entry * positions.quantity
+    value = price * positions.quantity
+    pnl_pct = np.divide(
+        (price - positions.entry) * 100, positions.entry,
+        out=np.zeros_like(price), where=positions.entry > 0,
+    )
+    total_value = float(value.sum())
+    weight = value / total_value * 100 if total_value > 0 else np.zeros_like(value)
+
+    return PortfolioResult(
+        positions=positions,
+        price=price,
+        change_24h=change,
+        invested=invested,
+        value=value,
+        pnl_usd=value - invested,
+        pnl_pct=pnl_pct,
+        weight=weight,
+        total_invested=float(invested.sum()),
+        total_value=total_value,
+    )
+
+
+def aggregate(result: PortfolioResult, top: int = 10) -> dict:
+    p = result.positions
+    user_ids, user_codes = np.unique(p.user_ids, return_inverse=True)
+    user_value = np.bincount(user_codes, weights=result.value, minlength=len(user_ids))
+    user_invested = np.bincount(user_codes, weights=result.invested, minlength=len(user_ids))
+
+    n_tokens = len(p.token_ids)
+    exposure = np.bincount(p.token_codes, weights=result.value, minlength=n_tokens)
+    token_pnl = np.bincount(p.token_codes, weights=result.pnl_usd, minlength=n_tokens)
+    holders = np.bincount(p.token_codes, minlength=n_tokens)
+    order = np.argsort(exposure)[::-1][:top]
+
+    in_profit = np.count_nonzero(user_value > user_invested)
+    return {
+        "users": len(user_ids),
+        "positions": len(p),
+        "aum": result.total_value,
+        "invested": result.total_invested,
+        "pnl_usd": result.total_pnl,
+        "pnl_pct": result.total_pnl_pct,
+        "users_in_profit": int(in_profit),
+        "median_user_value": float(np.median(user_value)) if len(user_value) else 0.0,
+        "exposure": [
+            {
+                "token_id": p.token_ids[i],
+                "value": float(exposure[i]),
+                "share": float(exposure[i] / result.total_value * 100) if result.total_value > 0 else 0.0,
+                "pnl_usd": float(token_pnl[i]),
+                "holders": int(holders[i]),
+            }
+            for i in order
+        ],
+    }
@@ -0,0 +1,223 @@
+import math
+import time
+import asyncio
+from collections import deque
+from typing import Optional
+import numpy as np
+from cachetools import LRUCache
+
+from core.logger import setup_logger
+from zenith_crypto_bot.repository import PriceHistoryRepo
+
+logger = setup_logger("PRICE_HISTORY")
+
+RESOLUTION_SECONDS = 60
+CAPACITY = 1440
+WINDOWS = (300, 3600, 14400, 86400)
+MAX_TOKENS = 5000
+PERSIST_SECONDS = 300
+MIN_VOL_SAMPLES = 3
+
+
+class _Window:
+    __slots__ = ("seconds", "start", "mins", "maxs")
+
+    def __init__(self, seconds: int):
+        self.seconds = seconds
+        self.start = 0
+        self.mins = deque()
+        self.maxs = deque()
+
+
+class PriceSeries:
+    # Fixed-size ring of (timestamp, price), one committed sample per RESOLUTION_SECONDS bucket.
+    # The newest bucket stays "live" until the next one starts, so overwriting it never
+    # invalidates the monotonic min/max deques that make window queries amortised O(1).
+    __slots__ = ("ts", "px", "seq", "windows", "live")
+
+    def __init__(self):
+        self.ts = np.zeros(CAPACITY, dtype=np.float64)
+        self.px = np.zeros(CAPACITY, dtype=np.float64)
+        self.seq = 0
+        self.windows = {w: _Window(w) for w in WINDOWS}
+        self.live: Optional[tuple[float, float]] = None
+
+    def __len__(self):
+        return min(self.seq, CAPACITY) + (1 if self.live else 0)
+
+    def _expire(self, window: _Window, now: float):
+        floor = max(self.seq - CAPACITY, 0)
+        cutoff = now - window.seconds
+        window.start = max(window.start, floor)
+        while window.start < self.seq and self.ts[window.start % CAPACITY] < cutoff:
+            window.start += 1
+        while window.mins and window.mins[0][0] < window.start:
+            window.mins.popleft()
+        while window.maxs and window.maxs[0][0] < window.start:
+            window.maxs.popleft()
+
+    def _commit(self, ts: float, price: float):
+        seq = self.seq
+        self.seq += 1
+        slot = seq % CAPACITY
+        self.ts[slot] = ts
+        self.px[slot] = price
+        for window in self.windows.values():
+            while window.mins and window.mins[-1][1] >= price:
+                window.mins.pop()
+            window.mins.append((seq, price))
+            while window.maxs and window.maxs[-1][1] <= price:
+                window.maxs.pop()
+            window.maxs.append((seq, price))
+            self._expire(window, ts)
+
+    def record(self, price: float, ts: float):
+        if price is None or price <= 0:
+            return
+        if self.live:
+            live_ts, live_px = self.live
+            if ts < live_ts:
+                return
+            if ts // RESOLUTION_SECONDS != live_ts // RESOLUTION_SECONDS:
+                self._commit(live_ts, live_px)
+        self.live = (ts, float(price))
+
+    def latest(self) -> Optional[tuple[float, float]]:
+        return self.live
+
+    def window(self, seconds: int, now: float = None) -> Optional[dict]:
+        window = self.windows.get(seconds)
+        if window is None or not self.live:
+            return None
+        now = now or time.time()
+        last_ts, last_px = self.live
+        if last_ts < now - seconds:
+            return None
+        self._expire(window, now)
+        lo, hi = last_px, last_px
+        first_ts, first_px = last_ts, last_px
+        if window.start < self.seq:
+            lo, hi = min(lo, window.mins[0][1]), max(hi, window.maxs[0][1])
+            first_slot = window.start % CAPACITY
+            first_ts, first_px = float(self.ts[first_slot]), float(self.px[first_slot])
+        return {
+            "min": lo,
+            "max": hi,
+            "first": first_px,
+            "last": last_px,
+            "change_pct": (last_px - first_px) / first_px * 100,
+            "span": last_ts - first_ts,
+            "samples": self.seq - window.start + 1,
+        }
+
+    def samples(self, seconds: int = None, now: float = None) -> tuple[np.ndarray, np.ndarray]:
+        count = min(self.seq, CAPACITY)
+        order = np.arange(self.seq - count, self.seq) % CAPACITY
+        ts, px = self.ts[order], self.px[order]
+        if self.live:
+            ts, px = np.append(ts, self.live[0]), np.append(px, self.live[1])
+        if seconds is not None:
+            keep = ts >= (now or time.time()) - seconds
+            ts, px = ts[keep], px[keep]
+        return ts, px
+
+    def volatility(self, seconds: int = 3600, now: float = None) -> Optional[float]:
+        ts, px = self.samples(seconds, now)
+        if len(px) < MIN_VOL_SAMPLES:
+            return None
+        elapsed = ts[-1] - ts[0]
+        if elapsed <= 0:
+            return None
+        returns = np.diff(np.log(px))
+        return float(math.sqrt(np.dot(returns, returns) / elapsed))
+
+    def to_bytes(self) -> bytes:
+        ts, px = self.samples()
+        return np.column_stack((ts, px)).tobytes()
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> "PriceSeries":
+        series = cls()
+        for ts, px in np.frombuffer(blob, dtype=np.float64).reshape(-1, 2):
+            series.record(float(px), float(ts))
+        return series
+
+
+_series = LRUCache(maxsize=MAX_TOKENS)
+_dirty: set[str] = set()
+
+
+def record(token_id: str, price: float, ts: float = None):
+    series = _series.get(token_id)
+    if series is None:
+        series = _series[token_id] = PriceSeries()
+    series.record(price, ts or time.time())
+    _dirty.add(token_id)
+
+
+def record_prices(prices: dict, ts: float = None):
+    ts = ts or time.time()
+    for token_id, entry in prices.items():
+        if isinstance(entry, dict):
+            record(token_id, entry.get("usd"), ts)
+
+
+def get_series(token_id: str) -> Optional[PriceSeries]:
+    return _series.get(token_id)
+
+
+def window_stats(token_id: str, seconds: int) -> Optional[dict]:
+    series = _series.get(token_id)
+    return series.window(seconds) if series else None
+
+
+def change_pct(token_id: str, seconds: int) -> Optional[float]:
+    stats = window_stats(token_id, seconds)
+    return stats["change_pct"] if stats else None
+
+
+def volatility(token_id: str, seconds: int = 3600) -> Optional[float]:
+    series = _series.get(token_id)
+    return series.volatility(seconds) if series else None
+
+
+async def load_history():
+    rows = await PriceHistoryRepo.load_all()
+    for token_id, blob in rows:
+        try:
+            restored = PriceSeries.from_bytes(blob)
+        except ValueError as e:
+            logger.warning(f"Discarding corrupt price history for {token_id}: {e}")
+            continue
+        current = _series.get(token_id)
+        if current is not None:
+            # Samples recorded since startup are newer than anything persisted.
+            for ts, px in zip(*current.samples()):
+                restored.record(float(px), float(ts))
+        _series[token_id] = restored
+    logger.info(f"📈 Restored price history for {len(rows)} tokens")
+
+
+async def persist_history():
+    if not _dirty:
+        return
+    tokens = [t for t in _dirty if t in _series]
+    _dirty.clear()
+    try:
+        await PriceHistoryRepo.save_all({t: _series[t].to_bytes() for t in tokens})
+    except Exception:
+        _dirty.update(tokens)
+        raise
+
+
+async def history_persister():
+    try:
+        await load_history()
+    except Exception as e:
+        logger.error(f"Price history restore failed: {e}")
+    while True:
+        await asyncio.sleep(PERSIST_SECONDS)
+        try:
+            await persist_history()
+        except Exception as e:
+            logger.error(f"Price history persist failed: {e}")
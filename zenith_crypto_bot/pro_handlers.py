@@ -18,15 +18,20 @@ from core.animation import (
 )
 from zenith_crypto_bot.repository import SubscriptionRepo, PriceAlertRepo, WalletTrackerRepo, WatchlistRepo
 from zenith_crypto_bot.market_service import (
-    get_prices, resolve_token_id, search_token, get_token_security,
-    get_wallet_recent_txns, get_wallet_token_txns,
-    get_fear_greed_index, get_top_movers, get_gas_prices, get_new_pairs,
+    get_prices, resolve_token_id, search_token,
+    get_wallet_token_txns,
 )
+from zenith_crypto_bot.market_snapshot import get_snapshot
+from zenith_crypto_bot import security_store, symbol_index
+from zenith_crypto_bot.pair_indexer import recent_pairs
+from zenith_crypto_bot.token_metadata import peek_metadata, token_label
+from zenith_crypto_bot.portfolio_analytics import load_positions, evaluate
 from zenith_crypto_bot.ui import (
     get_back_button, get_alerts_keyboard, get_wallets_keyboard,
     get_confirm_delete_alert, get_confirm_delete_alert_msg,
     get_confirm_untrack_msg, get_confirm_untrack_wallet,
     get_limit_reached_card, get_already_tracked_msg, get_pro_feature_msg,
+    get_snapshot_age_line,
 )
 
 logger = setup_logger("PRO_HANDLERS")
@@ -89,7 +94,7 @@ async def cmd_alert(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return await update.message.reply_text(
                 f"⚠️ <b>Token Not Found</b>\n\n"
                 f"Token <code>{html.escape(symbol)}</code> was not found.\n\n"
-                "Try a different symbol or check for typos.",
+                f"{_did_you_mean(symbol) or 'Try a different symbol or check for typos.'}",
                 parse_mode="HTML"
             )
 
@@ -308,7 +313,11 @@ async def cmd_addtoken(update: Update, context: ContextTypes.DEFAULT_TYPE):
         if found:
             token_id, symbol = found["id"], found["symbol"]
         else:
-            return await update.message.reply_text(f"⚠️ Token <code>{html.escape(symbol)}</code> not found.", parse_mode="HTML")
+            hint = _did_you_mean(symbol)
+            return await update.message.reply_text(
+                f"⚠️ Token <code>{html.escape(symbol)}</code> not found." + (f"\n\n{hint}" if hint else ""),
+                parse_mode="HTML",
+            )
 
     await WatchlistRepo.add_token(user_id, token_id, symbol, entry_price, quantity)
     current = prices.get(token_id, {}).get("usd", entry_price)
@@ -334,37 +343,24 @@ async def cmd_portfolio(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
 
     msg = await update.message.reply_text("<i>Loading live portfolio data...</i>", parse_mode="HTML")
-    token_ids = [t.token_id for t in tokens]
-    prices = await get_prices(token_ids)
+    positions = load_positions(tokens)
+    result = evaluate(positions, await get_prices(list(positions.token_ids)))
 
     lines = ["<b>💰 PORTFOLIO OVERVIEW</b>\n━━━━━━━━━━━━━━━━━━━━━━━━\n"]
-    total_invested = 0
-    total_current = 0
-
-    for t in tokens:
-        current_price = prices.get(t.token_id, {}).get("usd", 0)
-        change_24h = prices.get(t.token_id, {}).get("usd_24h_change", 0)
-        invested = t.entry_price * t.quantity
-        current_val = current_price * t.quantity
-        pnl_pct = ((current_price - t.entry_price) / t.entry_price * 100) if t.entry_price > 0 else 0
-        pnl_usd = current_val - invested
-        total_invested += invested
-        total_current += current_val
-        icon = "🟢" if pnl_pct >= 0 else "🔴"
+    for row in result.rows():
+        icon = "🟢" if row["pnl_pct"] >= 0 else "🔴"
         lines.append(
-            f"{icon} <b>{t.token_symbol}</b> × {t.quantity}\n"
-            f"   ${t.entry_price:,.2f} → ${current_price:,.2f} "
-            f"({pnl_pct:+.1f}%) <i>${pnl_usd:+,.2f}</i>\n"
-            f"   24h: {change_24h:+.1f}%\n"
+            f"{icon} <b>{row['symbol']}</b> × {row['quantity']}\n"
+            f"   ${row['entry']:,.2f} → ${row['price']:,.2f} "
+            f"({row['pnl_pct']:+.1f}%) <i>${row['pnl_usd']:+,.2f}</i>\n"
+            f"   24h: {row['change_24h']:+.1f}% · Weight: {row['weight']:.1f}%\n"
         )
 
-    total_pnl = total_current - total_invested
-    total_pnl_pct = ((total_current - total_invested) / total_invested * 100) if total_invested > 0 else 0
-    total_icon = "🟢" if total_pnl >= 0 else "🔴"
+    total_icon = "🟢" if result.total_pnl >= 0 else "🔴"
     lines.append(
         f"━━━━━━━━━━━━━━━━━━━━━━━━\n"
-        f"{total_icon} <b>TOTAL P/L: ${total_pnl:+,.2f} ({total_pnl_pct:+.1f}%)</b>\n"
-        f"Invested: ${total_invested:,.2f} → Value: ${total_current:,.2f}"
+        f"{total_icon} <b>TOTAL P/L: ${result.total_pnl:+,.2f} ({result.total_pnl_pct:+.1f}%)</b>\n"
+        f"Invested: ${result.total_invested:,.2f} → Value: ${result.total_value:,.2f}"
     )
 
     try:
@@ -383,20 +379,18 @@ async def cmd_removetoken(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 async def cmd_market(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    msg = await update.message.reply_text("<i>Scanning global market sentiment...</i>", parse_mode="HTML")
-    fng, (gainers, losers), btc_data = await asyncio.gather(
-        get_fear_greed_index(), get_top_movers(), get_prices(["bitcoin", "ethereum"])
-    )
+    snap = await get_snapshot()
     is_pro = await SubscriptionRepo.is_pro(update.effective_user.id)
 
+    fng = snap.fear_greed
     fng_val = fng["value"] if fng else 0
     fng_class = fng["classification"] if fng else "N/A"
     gauge_bar = _build_gauge(fng_val)
 
-    btc_price = btc_data.get("bitcoin", {}).get("usd", 0)
-    btc_change = btc_data.get("bitcoin", {}).get("usd_24h_change", 0)
-    eth_price = btc_data.get("ethereum", {}).get("usd", 0)
-    eth_change = btc_data.get("ethereum", {}).get("usd_24h_change", 0)
+    btc_price = snap.btc.get("current_price") or 0
+    btc_change = snap.btc.get("price_change_percentage_24h") or 0
+    eth_price = snap.eth.get("current_price") or 0
+    eth_change = snap.eth.get("price_change_percentage_24h") or 0
 
     lines = [
         "<b>📊 MARKET INTELLIGENCE REPORT</b>",
@@ -407,25 +401,36 @@ async def cmd_market(update: Update, context: ContextTypes.DEFAULT_TYPE):
         f"<b>ETH:</b> ${eth_price:,.0f} ({eth_change:+.1f}%)\n",
     ]
 
-    if is_pro and gainers:
+    if is_pro and snap.gainers:
+        if snap.btc_dominance is not None:
+            lines.append(f"<b>BTC Dominance:</b> {snap.btc_dominance:.1f}%\n")
         lines.append("<b>🟢 Top Gainers (24h)</b>")
-        for g in gainers[:5]:
+        for g in snap.gainers[:5]:
             pct = g.get("price_change_percentage_24h", 0) or 0
             lines.append(f"  • {g['symbol'].upper()} ${g.get('current_price', 0):,.4f} ({pct:+.1f}%)")
         lines.append("")
         lines.append("<b>🔴 Top Losers (24h)</b>")
-        for l in losers[:5]:
+        for l in snap.losers[:5]:
             pct = l.get("price_change_percentage_24h", 0) or 0
             lines.append(f"  • {l['symbol'].upper()} ${l.get('current_price', 0):,.4f} ({pct:+.1f}%)")
     else:
         lines.append("<i>Top Gainers/Losers: [Pro Required]</i>")
+    lines.append("\n" + get_snapshot_age_line(snap.age_seconds))
 
     try:
-        await msg.edit_text("\n".join(lines), reply_markup=get_back_button(), parse_mode="HTML")
+        await update.message.reply_text("\n".join(lines), reply_markup=get_back_button(), parse_mode="HTML")
     except Exception:
         pass
 
 
+def _did_you_mean(symbol: str) -> str:
+    matches = symbol_index.suggest(symbol[:3], limit=4)
+    if not matches:
+        return ""
+    options = ", ".join(f"<code>{html.escape(m['symbol'])}</code> ({html.escape(m['name'])})" for m in matches)
+    return f"Did you mean: {options}?"
+
+
 def _build_gauge(value: int) -> str:
     filled = value // 5
     empty = 20 - filled
@@ -443,11 +448,11 @@ def _build_gauge(value: int) -> str:
 
 
 async def cmd_gas(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    msg_obj = await update.message.reply_text("<i>Reading Ethereum mempool...</i>", parse_mode="HTML")
-    gas = await get_gas_prices()
+    snap = await get_snapshot()
+    gas = snap.gas
 
     if not gas:
-        return await msg_obj.edit_text("⚠️ Gas data unavailable. ETH RPC may be offline.")
+        return await update.message.reply_text("⚠️ Gas data unavailable. ETH RPC may be offline.")
 
     gwei = gas["gas_gwei"]
     if gwei < 15:
@@ -468,9 +473,10 @@ async def cmd_gas(update: Update, context: ContextTypes.DEFAULT_TYPE):
         f"  🐢 Low: {gas['priority_low']:.1f} Gwei\n"
         f"  🚶 Medium: {gas['priority_medium']:.1f} Gwei\n"
         f"  🚀 High: {gas['priority_high']:.1f} Gwei\n\n"
-        f"<b>Recommendation:</b> <i>{color}</i>"
+        f"<b>Recommendation:</b> <i>{color}</i>\n\n"
+        f"{get_snapshot_age_line(snap.age_seconds)}"
     )
-    await msg_obj.edit_text(text, reply_markup=get_back_button(), parse_mode="HTML")
+    await update.message.reply_text(text, reply_markup=get_back_button(), parse_mode="HTML")
 
 
 async def perform_real_audit(user_id: int, contract: str, msg, is_pro: bool):
@@ -481,7 +487,7 @@ async def perform_real_audit(user_id: int, contract: str, msg, is_pro: bool):
         await asyncio.sleep(0.4)
         await msg.edit_text(f"<i>Scanning bytecode for {contract[:8]}...</i>", parse_mode="HTML")
 
-        security = await get_token_security(contract)
+        security = await security_store.get_report(contract)
         await SR.save_audit(user_id, contract)
 
         if not security:
@@ -582,21 +588,22 @@ async def perform_real_audit(user_id: int, contract: str, msg, is_pro: bool):
 
 
 async def show_new_pairs(msg, is_pro: bool):
-    pairs, _ = await get_new_pairs()
+    pairs = recent_pairs(5)
 
     if not pairs:
         await msg.edit_text(
             "🆕 <b>New Pair Scanner</b>\n\n"
-            "No new pairs detected in the last ~10 minutes.\n"
+            "No new pairs indexed yet.\n"
             "<i>Check back soon — scanner runs continuously.</i>",
             reply_markup=get_back_button(), parse_mode="HTML",
         )
         return
 
+    metadata = peek_metadata([t for p in pairs for t in (p["token0"], p["token1"])])
     lines = ["🆕 <b>NEWLY CREATED PAIRS</b>\n━━━━━━━━━━━━━━━━━━━━━━━━\n"]
     for p in pairs:
-        t0 = f"{p['token0'][:6]}...{p['token0'][-4:]}"
-        t1 = f"{p['token1'][:6]}...{p['token1'][-4:]}"
+        t0 = html.escape(token_label(p["token0"], metadata))
+        t1 = html.escape(token_label(p["token1"], metadata))
         if is_pro:
             lines.append(
                 f"<b>Pair:</b> {t0} / {t1}\n"
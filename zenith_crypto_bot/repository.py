@@ -1,15 +1,17 @@
 import uuid
 from datetime import datetime, timezone, timedelta
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, update, text, literal, func
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from core.config import DATABASE_URL, DB_POOL_SIZE
 from core.logger import setup_logger
+from zenith_crypto_bot import entitlements
 from zenith_crypto_bot.models import (
     CryptoBase, CryptoUser, Subscription, ActivationKey,
-    SavedAudit, PriceAlert, TrackedWallet, WatchlistToken,
+    SavedAudit, PriceAlert, TrackedWallet, WatchlistToken, TokenSecurityReport,
+    NewPair, IndexerCursor, AlertOutbox, PriceHistory, NotificationLedger,
 )
 
 logger = setup_logger("CRYPTO_DB")
@@ -26,6 +28,8 @@ AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=F
 async def init_crypto_db():
     async with engine.begin() as conn:
         await conn.run_sync(CryptoBase.metadata.create_all)
+        await conn.execute(text("ALTER TABLE crypto_tracked_wallets ADD COLUMN IF NOT EXISTS last_seen_block BIGINT"))
+        await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_crypto_subscriptions_expires_at ON crypto_subscriptions (expires_at)"))
     logger.info("✅ Crypto DB initialized")
 
 
@@ -96,31 +100,33 @@ class SubscriptionRepo:
                         sub.expires_at = new_expiry
                     else:
                         session.add(Subscription(user_id=user_id, expires_at=new_expiry))
-                return True, (
-                    f"💎 <b>ZENITH PRO ACTIVATED</b>\n\n"
-                    f"✅ Successfully applied <b>{key.duration_days} days</b> to your account.\n"
-                    f"Enjoy zero-latency intelligence."
-                )
+                await entitlements.publish_invalidation(session, user_id)
+                duration_days = key.duration_days
+        entitlements.invalidate(user_id)
+        return True, (
+            f"💎 <b>ZENITH PRO ACTIVATED</b>\n\n"
+            f"✅ Successfully applied <b>{duration_days} days</b> to your account.\n"
+            f"Enjoy zero-latency intelligence."
+        )
 
     @staticmethod
-    async def get_days_left(user_id: int) -> int:
+    async def get_expiry(user_id: int):
+        hit, expires_at, epoch = entitlements.lookup(user_id)
+        if hit:
+            return expires_at
         async with AsyncSessionLocal() as session:
-            res = await session.execute(select(Subscription).where(Subscription.user_id == user_id))
-            sub = res.scalar_one_or_none()
-            now = datetime.now(timezone.utc)
-            if not sub or sub.expires_at <= now:
-                return 0
-            remaining = sub.expires_at - now
-            return remaining.days + (1 if remaining.seconds > 0 else 0)
+            res = await session.execute(select(Subscription.expires_at).where(Subscription.user_id == user_id))
+            expires_at = res.scalar_one_or_none()
+        entitlements.remember(user_id, expires_at, epoch)
+        return expires_at
+
+    @staticmethod
+    async def get_days_left(user_id: int) -> int:
+        return entitlements.days_left_at(await SubscriptionRepo.get_expiry(user_id))
 
     @staticmethod
     async def is_pro(user_id: int) -> bool:
-        async with AsyncSessionLocal() as session:
-            res = await session.execute(select(Subscription).where(Subscription.user_id == user_id))
-            sub = res.scalar_one_or_none()
-            if not sub:
-                return False
-            return sub.expires_at > datetime.now(timezone.utc)
+        return entitlements.is_pro_at(await SubscriptionRepo.get_expiry(user_id))
 
     @staticmethod
     async def extend_subscription(user_id: int, days: int = 30) -> tuple[bool, str]:
@@ -136,12 +142,14 @@ class SubscriptionRepo:
                 else:
                     session.add(Subscription(user_id=user_id, expires_at=now + add_on))
                 new_expiry = (sub.expires_at if sub else now + add_on)
-                return True, (
-                    f"✅ <b>Subscription Extended</b>\n\n"
-                    f"<b>User:</b> <code>{user_id}</code>\n"
-                    f"<b>Added:</b> {days} days\n"
-                    f"<b>New Expiry:</b> {new_expiry.strftime('%d %b %Y %H:%M UTC')}"
-                )
+                await entitlements.publish_invalidation(session, user_id)
+        entitlements.invalidate(user_id)
+        return True, (
+            f"✅ <b>Subscription Extended</b>\n\n"
+            f"<b>User:</b> <code>{user_id}</code>\n"
+            f"<b>Added:</b> {days} days\n"
+            f"<b>New Expiry:</b> {new_expiry.strftime('%d %b %Y %H:%M UTC')}"
+        )
 
     @staticmethod
     async def revoke_subscription(user_id: int) -> tuple[bool, str]:
@@ -154,29 +162,37 @@ class SubscriptionRepo:
                 
                 past_date = datetime(2000, 1, 1, tzinfo=timezone.utc)
                 sub.expires_at = past_date
-                
-                return True, (
-                    f"✅ <b>Subscription Revoked</b>\n\n"
-                    f"<b>User:</b> <code>{user_id}</code>\n"
-                    f"<b>Status:</b> Revoked\n"
-                    f"<b>Previous expiry:</b> Set to past date"
-                )
-
-    @staticmethod
-    async def get_expiring_users(within_hours: int = 72) -> list:
-        async with AsyncSessionLocal() as session:
-            now = datetime.now(timezone.utc)
-            cutoff = now + timedelta(hours=within_hours)
-            stmt = select(Subscription).where(Subscription.expires_at > now, Subscription.expires_at <= cutoff)
-            return (await session.execute(stmt)).scalars().all()
+                await entitlements.publish_invalidation(session, user_id)
+        entitlements.invalidate(user_id)
+        return True, (
+            f"✅ <b>Subscription Revoked</b>\n\n"
+            f"<b>User:</b> <code>{user_id}</code>\n"
+            f"<b>Status:</b> Revoked\n"
+            f"<b>Previous expiry:</b> Set to past date"
+        )
+
+    @staticmethod
+    async def claim_expiry_notices(kind: str, start: datetime, end: datetime) -> list[tuple[int, datetime]]:
+        # One statement records and returns only subscriptions not yet notified for this period;
+        # a renewal moves expires_at, which opens a new period.
+        async with AsyncSessionLocal() as session:
+            pending = select(
+                Subscription.user_id, literal(kind), Subscription.expires_at, literal(datetime.now(timezone.utc)),
+            ).where(Subscription.expires_at > start, Subscription.expires_at <= end)
+            stmt = pg_insert(NotificationLedger).from_select(
+                ["user_id", "kind", "period_end", "sent_at"], pending
+            ).on_conflict_do_nothing().returning(NotificationLedger.user_id, NotificationLedger.period_end)
+            rows = (await session.execute(stmt)).all()
+            await session.commit()
+            return [(r.user_id, r.period_end) for r in rows]
 
     @staticmethod
-    async def get_just_expired_users(within_hours: int = 1) -> list:
+    async def prune_notification_ledger(older_than_days: int = 30) -> int:
         async with AsyncSessionLocal() as session:
-            now = datetime.now(timezone.utc)
-            cutoff = now - timedelta(hours=within_hours)
-            stmt = select(Subscription).where(Subscription.expires_at <= now, Subscription.expires_at >= cutoff)
-            return (await session.execute(stmt)).scalars().all()
+            cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+            res = await session.execute(delete(NotificationLedger).where(NotificationLedger.sent_at < cutoff))
+            await session.commit()
+            return res.rowcount
 
     @staticmethod
     async def save_audit(user_id: int, contract: str):
@@ -314,13 +330,15 @@ class WalletTrackerRepo:
             return result.rowcount > 0
 
     @staticmethod
-    async def update_last_tx(wallet_id: int, tx_hash: str):
+    async def advance_cursor(wallet_address: str, block_number: int, tx_hash: str = None):
+        values = {"last_seen_block": block_number}
+        if tx_hash:
+            values["last_checked_tx"] = tx_hash
         async with AsyncSessionLocal() as session:
-            stmt = select(TrackedWallet).where(TrackedWallet.id == wallet_id)
-            wallet = (await session.execute(stmt)).scalar_one_or_none()
-            if wallet:
-                wallet.last_checked_tx = tx_hash
-                await session.commit()
+            await session.execute(
+                update(TrackedWallet).where(TrackedWallet.wallet_address == wallet_address).values(**values)
+            )
+            await session.commit()
 
     @staticmethod
     async def count_user_wallets(user_id: int) -> int:
@@ -359,6 +377,11 @@ class WatchlistRepo:
             await session.commit()
             return result.rowcount > 0
 
+    @staticmethod
+    async def get_all_positions() -> list:
+        async with AsyncSessionLocal() as session:
+            return (await session.execute(select(WatchlistToken))).scalars().all()
+
     @staticmethod
     async def count_watchlist(user_id: int) -> int:
         async with AsyncSessionLocal() as session:
@@ -366,5 +389,154 @@ class WatchlistRepo:
             return len((await session.execute(stmt)).scalars().all())
 
 
+class SecurityReportRepo:
+
+    @staticmethod
+    async def get_fresh_reports(chain_id: str, contracts: list[str], max_age: timedelta) -> dict:
+        if not contracts:
+            return {}
+        async with AsyncSessionLocal() as session:
+            cutoff = datetime.now(timezone.utc) - max_age
+            stmt = select(TokenSecurityReport).where(
+                TokenSecurityReport.chain_id == chain_id,
+                TokenSecurityReport.contract.in_(contracts),
+                TokenSecurityReport.fetched_at > cutoff,
+            )
+            rows = (await session.execute(stmt)).scalars().all()
+            return {r.contract: r.report for r in rows}
+
+    @staticmethod
+    async def upsert_reports(chain_id: str, reports: dict):
+        if not reports:
+            return
+        now = datetime.now(timezone.utc)
+        async with AsyncSessionLocal() as session:
+            stmt = pg_insert(TokenSecurityReport).values([
+                {"chain_id": chain_id, "contract": contract, "report": report, "fetched_at": now}
+                for contract, report in reports.items()
+            ])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["chain_id", "contract"],
+                set_=dict(report=stmt.excluded.report, fetched_at=stmt.excluded.fetched_at),
+            )
+            await session.execute(stmt)
+            await session.commit()
+
+
+class PairIndexRepo:
+
+    @staticmethod
+    async def get_cursor(name: str):
+        async with AsyncSessionLocal() as session:
+            cursor = await session.get(IndexerCursor, name)
+            return (cursor.block_number, cursor.block_hash) if cursor else None
+
+    @staticmethod
+    async def _set_cursor(session, name: str, block_number: int, block_hash):
+        stmt = pg_insert(IndexerCursor).values(
+            name=name, block_number=block_number, block_hash=block_hash, updated_at=datetime.now(timezone.utc),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["name"],
+            set_=dict(block_number=stmt.excluded.block_number, block_hash=stmt.excluded.block_hash, updated_at=stmt.excluded.updated_at),
+        )
+        await session.execute(stmt)
+
+    @staticmethod
+    async def save_batch(name: str, pairs: list[dict], block_number: int, block_hash: str):
+        async with AsyncSessionLocal() as session:
+            async with session.begin():
+                if pairs:
+                    stmt = pg_insert(NewPair).values([
+                        {
+                            "pair": p["pair"], "token0": p["token0"], "token1": p["token1"],
+                            "block_number": p["block"], "log_index": p["log_index"], "tx_hash": p["tx_hash"],
+                        }
+                        for p in pairs
+                    ])
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=["pair"],
+                        set_=dict(
+                            block_number=stmt.excluded.block_number,
+                            log_index=stmt.excluded.log_index,
+                            tx_hash=stmt.excluded.tx_hash,
+                        ),
+                    )
+                    await session.execute(stmt)
+                await PairIndexRepo._set_cursor(session, name, block_number, block_hash)
+
+    @staticmethod
+    async def rollback_to(name: str, block_number: int):
+        async with AsyncSessionLocal() as session:
+            async with session.begin():
+                await session.execute(delete(NewPair).where(NewPair.block_number > block_number))
+                await PairIndexRepo._set_cursor(session, name, block_number, None)
+
+    @staticmethod
+    async def get_recent_pairs(limit: int):
+        async with AsyncSessionLocal() as session:
+            stmt = select(NewPair).order_by(NewPair.block_number.desc(), NewPair.log_index.desc()).limit(limit)
+            return (await session.execute(stmt)).scalars().all()
+
+
+class AlertOutboxRepo:
+
+    @staticmethod
+    async def push(entries: list[tuple[int, str]]):
+        if not entries:
+            return
+        async with AsyncSessionLocal() as session:
+            await session.execute(pg_insert(AlertOutbox).values([
+                {"chat_id": chat_id, "text": text} for chat_id, text in entries
+            ]))
+            await session.commit()
+
+    @staticmethod
+    async def pop_batch(limit: int) -> list[tuple[int, str]]:
+        async with AsyncSessionLocal() as session:
+            oldest = (
+                select(AlertOutbox.id).order_by(AlertOutbox.id).limit(limit)
+                .with_for_update(skip_locked=True).scalar_subquery()
+            )
+            stmt = delete(AlertOutbox).where(AlertOutbox.id.in_(oldest)).returning(
+                AlertOutbox.id, AlertOutbox.chat_id, AlertOutbox.text
+            )
+            rows = (await session.execute(stmt)).all()
+            await session.commit()
+            return [(r.chat_id, r.text) for r in sorted(rows, key=lambda r: r.id)]
+
+    @staticmethod
+    async def pending_counts() -> dict[int, int]:
+        async with AsyncSessionLocal() as session:
+            stmt = select(AlertOutbox.chat_id, func.count()).group_by(AlertOutbox.chat_id)
+            return {chat_id: count for chat_id, count in (await session.execute(stmt)).all()}
+
+
+class PriceHistoryRepo:
+
+    @staticmethod
+    async def load_all() -> list[tuple[str, bytes]]:
+        async with AsyncSessionLocal() as session:
+            rows = (await session.execute(select(PriceHistory.token_id, PriceHistory.samples))).all()
+            return [(r.token_id, r.samples) for r in rows]
+
+    @staticmethod
+    async def save_all(series: dict):
+        if not series:
+            return
+        now = datetime.now(timezone.utc)
+        async with AsyncSessionLocal() as session:
+            stmt = pg_insert(PriceHistory).values([
+                {"token_id": token_id, "samples": blob, "updated_at": now}
+                for token_id, blob in series.items()
+            ])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["token_id"],
+                set_=dict(samples=stmt.excluded.samples, updated_at=stmt.excluded.updated_at),
+            )
+            await session.execute(stmt)
+            await session.commit()
+
+
 async def dispose_crypto_engine():
     await engine.dispose()
\ No newline at end of file
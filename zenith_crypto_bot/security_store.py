@@ -0,0 +1,112 @@
+import asyncio
+from datetime import timedelta
+from cachetools import TTLCache
+
+from core.logger import setup_logger
+from core.task_manager import fire_and_forget
+from zenith_crypto_bot.market_service import get_token_security_batch
+from zenith_crypto_bot.repository import SecurityReportRepo
+
+logger = setup_logger("SEC_STORE")
+
+REPORT_TTL = timedelta(hours=1)
+NOT_FOUND_TTL = 300
+BATCH_SIZE = 20
+
+_reports = TTLCache(maxsize=5000, ttl=REPORT_TTL.total_seconds())
+_not_found = TTLCache(maxsize=5000, ttl=NOT_FOUND_TTL)
+_inflight: dict[tuple[str, str], asyncio.Future] = {}
+_counters = {"memory_hits": 0, "db_hits": 0, "fetched": 0, "coalesced": 0, "upstream_calls": 0}
+
+
+async def _load(chain_id: str, contracts: list[str]) -> dict:
+    found = {}
+    try:
+        found = await SecurityReportRepo.get_fresh_reports(chain_id, contracts, REPORT_TTL)
+    except Exception as e:
+        logger.warning(f"Security report DB read failed: {e}")
+    _counters["db_hits"] += len(found)
+
+    missing = [c for c in contracts if c not in found]
+    fetched = {}
+    for i in range(0, len(missing), BATCH_SIZE):
+        chunk = missing[i:i + BATCH_SIZE]
+        _counters["upstream_calls"] += 1
+        result = await get_token_security_batch(chunk, chain_id)
+        if result is None:
+            continue
+        for contract in chunk:
+            if result.get(contract):
+                fetched[contract] = result[contract]
+            else:
+                _not_found[(chain_id, contract)] = True
+    _counters["fetched"] += len(fetched)
+
+    if fetched:
+        try:
+            await SecurityReportRepo.upsert_reports(chain_id, fetched)
+        except Exception as e:
+            logger.warning(f"Security report DB write failed: {e}")
+
+    found.update(fetched)
+    for contract, report in found.items():
+        _reports[(chain_id, contract)] = report
+    return found
+
+
+async def get_reports(contracts: list[str], chain_id: str = "1") -> dict:
+    results, waiting, missing = {}, {}, []
+    for contract in dict.fromkeys(c.lower() for c in contracts):
+        key = (chain_id, contract)
+        if key in _reports:
+            _counters["memory_hits"] += 1
+            results[contract] = _reports[key]
+        elif key in _not_found:
+            continue
+        elif key in _inflight:
+            _counters["coalesced"] += 1
+            waiting[contract] = _inflight[key]
+        else:
+            missing.append(contract)
+
+    if missing:
+        loop = asyncio.get_running_loop()
+        futures = {c: loop.create_future() for c in missing}
+        for contract, fut in futures.items():
+            _inflight[(chain_id, contract)] = fut
+        loaded = {}
+        try:
+            loaded = await _load(chain_id, missing)
+        finally:
+            for contract, fut in futures.items():
+                _inflight.pop((chain_id, contract), None)
+                if not fut.done():
+                    fut.set_result(loaded.get(contract))
+        results.update(loaded)
+
+    for contract, fut in waiting.items():
+        report = await fut
+        if report:
+            results[contract] = report
+    return results
+
+
+async def get_report(contract: str, chain_id: str = "1") -> dict | None:
+    return (await get_reports([contract], chain_id)).get(contract.lower())
+
+
+def prewarm(contracts: list[str], chain_id: str = "1"):
+    pending = [c for c in contracts if c and (chain_id, c.lower()) not in _reports]
+    if pending:
+        fire_and_forget(_prewarm(pending, chain_id))
+
+
+async def _prewarm(contracts: list[str], chain_id: str):
+    try:
+        await get_reports(contracts, chain_id)
+    except Exception as e:
+        logger.warning(f"Security pre-warm failed: {e}")
+
+
+def get_stats() -> dict:
+    return {**_counters, "cached": len(_reports), "inflight": len(_inflight)}
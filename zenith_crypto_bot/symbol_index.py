@@ -0,0 +1,152 @@
+import os
+import json
+import time
+import asyncio
+from typing import Optional
+
+from core.logger import setup_logger
+from core.config import SYMBOL_INDEX_PATH
+
+logger = setup_logger("SYMBOL_INDEX")
+
+MAX_TRIE_DEPTH = 12
+SUGGESTIONS_PER_NODE = 8
+UNRANKED = 10 ** 9
+
+
+class _TrieNode:
+    __slots__ = ("children", "top")
+
+    def __init__(self):
+        self.children = {}
+        self.top = []
+
+
+_by_id: dict[str, tuple[str, str]] = {}
+_by_symbol: dict[str, list[str]] = {}
+_ranks: dict[str, int] = {}
+_trie = _TrieNode()
+_built_at = 0.0
+
+
+def _rank(token_id: str) -> int:
+    return _ranks.get(token_id, UNRANKED)
+
+
+def build(coins: list, ranks: dict, built_at: float = None):
+    global _by_id, _by_symbol, _ranks, _trie, _built_at
+    by_id, by_symbol = {}, {}
+    for coin in coins:
+        token_id, symbol = coin.get("id"), (coin.get("symbol") or "").lower()
+        if not token_id or not symbol:
+            continue
+        by_id[token_id] = (symbol, coin.get("name") or symbol.upper())
+        by_symbol.setdefault(symbol, []).append(token_id)
+
+    rank = lambda t: ranks.get(t, UNRANKED)
+    for ids in by_symbol.values():
+        ids.sort(key=rank)
+
+    # Symbols are inserted best-ranked first, so each node's `top` list is already in display order.
+    trie = _TrieNode()
+    for symbol in sorted(by_symbol, key=lambda s: (rank(by_symbol[s][0]), s)):
+        node = trie
+        for ch in symbol[:MAX_TRIE_DEPTH]:
+            node = node.children.setdefault(ch, _TrieNode())
+            if len(node.top) < SUGGESTIONS_PER_NODE:
+                node.top.append(symbol)
+
+    _by_id, _by_symbol, _ranks, _trie = by_id, by_symbol, dict(ranks), trie
+    _built_at = built_at or time.time()
+    logger.info(f"🔎 Symbol index built: {len(by_id)} coins, {len(by_symbol)} symbols, {len(ranks)} ranked")
+
+
+def lookup(query: str) -> Optional[str]:
+    key = query.lower().strip()
+    # A full CoinGecko id wins over a ticker that happens to spell it ("bitcoin").
+    if key in _by_id:
+        return key
+    ids = _by_symbol.get(key)
+    if ids:
+        # Several unranked coins sharing a symbol are listed in arbitrary order; leave those
+        # to the market-cap ranked search rather than guess.
+        if len(ids) == 1 or _rank(ids[0]) != UNRANKED:
+            return ids[0]
+    return None
+
+
+def candidates(symbol: str) -> list[str]:
+    return list(_by_symbol.get(symbol.lower().strip(), ()))
+
+
+def get_coin(token_id: str) -> Optional[dict]:
+    entry = _by_id.get(token_id)
+    if entry is None:
+        return None
+    return {"id": token_id, "symbol": entry[0].upper(), "name": entry[1], "rank": _ranks.get(token_id)}
+
+
+def suggest(prefix: str, limit: int = 5) -> list[dict]:
+    node = _trie
+    for ch in prefix.lower().strip()[:MAX_TRIE_DEPTH]:
+        node = node.children.get(ch)
+        if node is None:
+            return []
+    return [get_coin(_by_symbol[s][0]) for s in node.top[:limit]]
+
+
+def is_loaded() -> bool:
+    return bool(_by_id)
+
+
+def age_seconds() -> float:
+    return time.time() - _built_at if _built_at else float("inf")
+
+
+def _read_cache() -> Optional[dict]:
+    try:
+        with open(SYMBOL_INDEX_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _write_cache(payload: dict):
+    os.makedirs(os.path.dirname(os.path.abspath(SYMBOL_INDEX_PATH)), exist_ok=True)
+    tmp = f"{SYMBOL_INDEX_PATH}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(payload, f, separators=(",", ":"))
+    os.replace(tmp, SYMBOL_INDEX_PATH)
+
+
+async def load_cache() -> bool:
+    try:
+        payload = await asyncio.to_thread(_read_cache)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Symbol index cache unreadable: {e}")
+        return False
+    if not payload or not payload.get("coins"):
+        return False
+    build(payload["coins"], payload.get("ranks") or {}, payload.get("fetched_at"))
+    return True
+
+
+async def save_cache(coins: list, ranks: dict):
+    payload = {
+        "fetched_at": _built_at,
+        "coins": [{"id": c["id"], "symbol": c["symbol"], "name": c.get("name")} for c in coins if c.get("id") and c.get("symbol")],
+        "ranks": ranks,
+    }
+    try:
+        await asyncio.to_thread(_write_cache, payload)
+    except OSError as e:
+        logger.warning(f"Symbol index cache write failed: {e}")
+
+
+def get_stats() -> dict:
+    return {
+        "coins": len(_by_id),
+        "symbols": len(_by_symbol),
+        "ranked": len(_ranks),
+        "age": round(age_seconds()) if _built_at else None,
+    }
@@ -0,0 +1,134 @@
+import asyncio
+from cachetools import LRUCache
+
+from core.logger import setup_logger
+from zenith_crypto_bot.eth_rpc import rpc
+
+logger = setup_logger("TOKEN_META")
+
+MULTICALL3 = "0xcA11bde05977b3631167028862bE2a173976CA11"
+AGGREGATE3_SELECTOR = "82ad56cb"
+FIELDS = (
+    ("symbol", "95d89b41"),
+    ("decimals", "313ce567"),
+    ("name", "06fdde03"),
+    ("total_supply", "18160ddd"),
+)
+TOKENS_PER_MULTICALL = 100
+
+TRANSFER_SELECTOR = "0xa9059cbb"
+TRANSFER_FROM_SELECTOR = "0x23b872dd"
+
+# Token metadata never changes once deployed, so entries are only evicted for space.
+_metadata = LRUCache(maxsize=20000)
+
+
+def _word(value: int) -> str:
+    return f"{value:064x}"
+
+
+def _encode_aggregate3(tokens: list[str]) -> str:
+    calls = [(token, selector) for token in tokens for _, selector in FIELDS]
+    tuple_size = 5 * 32
+    head = [_word(32 * len(calls) + i * tuple_size) for i in range(len(calls))]
+    body = [
+        _word(int(token, 16)) + _word(1) + _word(96) + _word(4) + selector.ljust(64, "0")
+        for token, selector in calls
+    ]
+    return "0x" + AGGREGATE3_SELECTOR + _word(32) + _word(len(calls)) + "".join(head) + "".join(body)
+
+
+def _decode_aggregate3(data: str) -> list[tuple[bool, bytes]]:
+    raw = bytes.fromhex(data[2:] if data.startswith("0x") else data)
+    word = lambda pos: int.from_bytes(raw[pos:pos + 32], "big")
+    start = word(0)
+    count = word(start)
+    base = start + 32
+    results = []
+    for i in range(count):
+        entry = base + word(base + i * 32)
+        success = bool(word(entry))
+        blob = entry + word(entry + 32)
+        length = word(blob)
+        results.append((success, raw[blob + 32:blob + 32 + length]))
+    return results
+
+
+def _decode_string(blob: bytes):
+    if len(blob) == 32:
+        # Pre-standard tokens (MKR, SAI) return bytes32 instead of string.
+        return blob.rstrip(b"\x00").decode("utf-8", "ignore") or None
+    if len(blob) < 64:
+        return None
+    offset = int.from_bytes(blob[:32], "big")
+    length = int.from_bytes(blob[offset:offset + 32], "big")
+    return blob[offset + 32:offset + 32 + length].decode("utf-8", "ignore") or None
+
+
+def _decode_uint(blob: bytes):
+    return int.from_bytes(blob[:32], "big") if len(blob) >= 32 else None
+
+
+async def _fetch(tokens: list[str]) -> dict:
+    data = await rpc.call("eth_call", [{"to": MULTICALL3, "data": _encode_aggregate3(tokens)}, "latest"])
+    results = _decode_aggregate3(data)
+    fetched = {}
+    for i, token in enumerate(tokens):
+        meta = {}
+        for j, (field, _) in enumerate(FIELDS):
+            success, blob = results[i * len(FIELDS) + j]
+            if not success:
+                meta[field] = None
+            elif field in ("symbol", "name"):
+                meta[field] = _decode_string(blob)
+            else:
+                meta[field] = _decode_uint(blob)
+        if meta["decimals"] is not None and meta["decimals"] > 255:
+            meta["decimals"] = None
+        fetched[token] = meta
+    return fetched
+
+
+def peek_metadata(tokens: list[str]) -> dict:
+    return {t.lower(): _metadata[t.lower()] for t in tokens if t and t.lower() in _metadata}
+
+
+async def get_token_metadata(tokens: list[str]) -> dict:
+    wanted = list(dict.fromkeys(t.lower() for t in tokens if t))
+    missing = [t for t in wanted if t not in _metadata]
+    if missing and rpc.enabled:
+        # Each chunk is one eth_call; issued together they share a single RPC batch.
+        chunks = [missing[i:i + TOKENS_PER_MULTICALL] for i in range(0, len(missing), TOKENS_PER_MULTICALL)]
+        results = await asyncio.gather(*(_fetch(c) for c in chunks), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Token metadata multicall failed: {result}")
+                continue
+            _metadata.update(result)
+    return peek_metadata(wanted)
+
+
+def token_label(address: str, metadata: dict) -> str:
+    symbol = (metadata.get(address.lower()) or {}).get("symbol")
+    return symbol if symbol else f"{address[:6]}...{address[-4:]}"
+
+
+def format_token_amount(raw: int, decimals) -> str:
+    if decimals is None:
+        return f"{raw:,} (raw)"
+    amount = raw / (10 ** decimals)
+    return f"{amount:,.4f}" if amount < 1000 else f"{amount:,.2f}"
+
+
+def decode_token_transfer(tx: dict) -> dict | None:
+    payload = tx.get("input", "")
+    try:
+        if payload.startswith(TRANSFER_SELECTOR) and len(payload) >= 138:
+            recipient, amount = payload[10:74], payload[74:138]
+        elif payload.startswith(TRANSFER_FROM_SELECTOR) and len(payload) >= 202:
+            recipient, amount = payload[74:138], payload[138:202]
+        else:
+            return None
+        return {"token": tx.get("to", "").lower(), "to": "0x" + recipient[-40:], "amount": int(amount, 16)}
+    except ValueError:
+        return None
@@ -124,6 +124,17 @@ def get_confirm_untrack_msg(wallet) -> str:
     )
 
 
+def get_snapshot_age_line(age_seconds: float) -> str:
+    if age_seconds == float("inf"):
+        return "<i>🕒 Market data unavailable — retrying shortly</i>"
+    age = int(age_seconds)
+    if age < 60:
+        label = f"{age}s ago"
+    else:
+        label = f"{age // 60}m {age % 60}s ago"
+    return f"<i>🕒 Updated {label}</i>"
+
+
 def get_back_button():
     return InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Return to Terminal", callback_data="ui_main_menu")]])
 
@@ -0,0 +1,94 @@
+import math
+import random
+from collections import deque
+
+HOT_POLL_SECONDS = 30.0
+DEFAULT_POLL_SECONDS = 120.0
+MAX_POLL_SECONDS = 900.0
+FAILED_POLL_SECONDS = 60.0
+# Poll interval as a fraction of how long the wallet has been quiet.
+IDLE_FACTOR = 0.05
+LAG_WINDOW = 500
+
+
+class WalletPollScheduler:
+
+    def __init__(self):
+        self._next_poll = {}
+        self._last_activity = {}
+        self._in_flight = set()
+        self._lags = deque(maxlen=LAG_WINDOW)
+        self._polls = 0
+
+    def sync(self, addresses, now: float, spread: float = 0.0, tracked_since: dict = None):
+        active = set(addresses)
+        tracked_since = tracked_since or {}
+        for address in list(self._next_poll):
+            if address not in active:
+                self._next_poll.pop(address, None)
+                self._last_activity.pop(address, None)
+        for address in active:
+            if address not in self._next_poll:
+                self._next_poll[address] = now + random.uniform(0, spread)
+                # Activity is only seen in memory, so after a restart a quiet wallet counts as idle
+                # since it was first tracked and its interval can keep growing.
+                self._last_activity.setdefault(address, tracked_since.get(address) or now)
+
+    def due(self, now: float) -> list[str]:
+        return [a for a, at in self._next_poll.items() if at <= now and a not in self._in_flight]
+
+    def claim(self, address: str):
+        self._in_flight.add(address)
+
+    def start(self, address: str, now: float):
+        # Lag is measured when the poll actually begins, after any semaphore/rate-limit wait.
+        self._lags.append(max(now - self._next_poll.get(address, now), 0.0))
+        self._polls += 1
+
+    def interval_for(self, address: str, now: float) -> float:
+        last = self._last_activity.get(address)
+        if last is None:
+            return DEFAULT_POLL_SECONDS
+        idle = max(now - last, 0.0)
+        return min(max(idle * IDLE_FACTOR, HOT_POLL_SECONDS), MAX_POLL_SECONDS)
+
+    def finish(self, address: str, now: float, last_activity: float = None, failed: bool = False):
+        self._in_flight.discard(address)
+        if address not in self._next_poll:
+            return
+        if last_activity is not None:
+            self._last_activity[address] = max(last_activity, self._last_activity.get(address, 0.0))
+        interval = FAILED_POLL_SECONDS if failed else self.interval_for(address, now)
+        self._next_poll[address] = now + interval
+
+    def take_lag_stats(self) -> dict:
+        lags = sorted(self._lags)
+        polls, self._polls = self._polls, 0
+        self._lags.clear()
+        if not lags:
+            return {"polls": polls, "avg_lag": 0.0, "p95_lag": 0.0, "max_lag": 0.0}
+        return {
+            "polls": polls,
+            "avg_lag": round(sum(lags) / len(lags), 1),
+            "p95_lag": round(lags[min(math.ceil(len(lags) * 0.95), len(lags)) - 1], 1),
+            "max_lag": round(lags[-1], 1),
+        }
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    def __len__(self):
+        return len(self._next_poll)
+
+
+_last_cycle = {}
+
+
+def record_cycle(stats: dict):
+    _last_cycle.clear()
+    _last_cycle.update(stats)
+
+
+def get_stats() -> dict:
+    return dict(_last_cycle)
@@ -0,0 +1,77 @@
+import asyncio
+from cachetools import TTLCache
+from telegram import ChatMemberUpdated
+
+from core.logger import setup_logger
+
+logger = setup_logger("ADMIN_ROSTER")
+
+ADMIN_STATUSES = ("administrator", "creator")
+ROSTER_TTL = 1800
+FAILURE_TTL = 60
+
+# One set of admin ids per chat, so memory follows the admin count rather than the member count.
+_rosters = TTLCache(maxsize=5000, ttl=ROSTER_TTL)
+_failures = TTLCache(maxsize=1000, ttl=FAILURE_TTL)
+_inflight: dict[int, asyncio.Future] = {}
+_stats = {"hits": 0, "loads": 0, "failures": 0, "updates": 0}
+
+
+async def _load(bot, chat_id: int) -> set | None:
+    try:
+        admins = await bot.get_chat_administrators(chat_id)
+    except Exception as e:
+        _stats["failures"] += 1
+        _failures[chat_id] = True
+        logger.debug(f"Admin roster load failed for {chat_id}: {e}")
+        return None
+    _stats["loads"] += 1
+    roster = {m.user.id for m in admins}
+    _rosters[chat_id] = roster
+    return roster
+
+
+async def get_admins(bot, chat_id: int) -> set | None:
+    roster = _rosters.get(chat_id)
+    if roster is not None:
+        _stats["hits"] += 1
+        return roster
+    if chat_id in _failures:
+        return None
+    # Concurrent first messages in a cold chat share one getChatAdministrators call.
+    pending = _inflight.get(chat_id)
+    if pending is None:
+        pending = _inflight[chat_id] = asyncio.ensure_future(_load(bot, chat_id))
+        pending.add_done_callback(lambda _: _inflight.pop(chat_id, None))
+    return await asyncio.shield(pending)
+
+
+async def is_admin(bot, chat_id: int, user_id: int) -> bool:
+    roster = await get_admins(bot, chat_id)
+    return roster is not None and user_id in roster
+
+
+def invalidate(chat_id: int):
+    _rosters.pop(chat_id, None)
+    _failures.pop(chat_id, None)
+
+
+def apply_update(update: ChatMemberUpdated, bot_id: int):
+    chat_id = update.chat.id
+    member = update.new_chat_member
+    if member.user.id == bot_id:
+        # The bot's own rights changed; reload on next use in case it can now see the roster.
+        invalidate(chat_id)
+        return
+    roster = _rosters.get(chat_id)
+    if roster is None:
+        return
+    _stats["updates"] += 1
+    if member.status in ADMIN_STATUSES:
+        roster.add(member.user.id)
+    else:
+        roster.discard(member.user.id)
+
+
+def get_stats() -> dict:
+    return {**_stats, "chats": len(_rosters), "admins": sum(len(r) for r in _rosters.values())}
@@ -3,7 +3,9 @@ from telegram.ext import ContextTypes, CommandHandler, MessageHandler, filters
 
 from core.logger import setup_logger
 from zenith_crypto_bot.repository import SubscriptionRepo
-from zenith_crypto_bot.market_service import get_prices, resolve_token_id, get_fear_greed_index
+from zenith_crypto_bot.market_service import get_prices, resolve_token_id
+from zenith_crypto_bot.market_snapshot import get_snapshot
+from zenith_crypto_bot.ui import get_snapshot_age_line
 from zenith_group_bot.flood_control import (
     check_bot_command_limit, get_warning_count, add_warning, 
     get_flood_action
@@ -153,30 +155,29 @@ async def cmd_group_market(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if is_flooding:
         return
     
-    msg = await update.message.reply_text("<i>Loading market data...</i>", parse_mode="HTML")
-    
-    fng = await get_fear_greed_index()
-    prices = await get_prices(["bitcoin", "ethereum"])
-    
+    snap = await get_snapshot()
+    fng = snap.fear_greed
+
     fng_val = fng.get("value", 0) if fng else 0
     fng_class = fng.get("classification", "N/A") if fng else "N/A"
     
-    btc = prices.get("bitcoin", {})
-    eth = prices.get("ethereum", {})
+    btc = snap.btc
+    eth = snap.eth
     
     lines = [
         "📊 <b>MARKET OVERVIEW</b>\n"
         "━━━━━━━━━━━━━━━━━━━━━━━━━━\n",
-        f"<b>BTC:</b> ${btc.get('usd', 0):,.0f} ({btc.get('usd_24h_change', 0):+.1f}%)",
-        f"<b>ETH:</b> ${eth.get('usd', 0):,.0f} ({eth.get('usd_24h_change', 0):+.1f}%)",
+        f"<b>BTC:</b> ${btc.get('current_price') or 0:,.0f} ({btc.get('price_change_percentage_24h') or 0:+.1f}%)",
+        f"<b>ETH:</b> ${eth.get('current_price') or 0:,.0f} ({eth.get('price_change_percentage_24h') or 0:+.1f}%)",
     ]
     
     if is_pro and fng:
         lines.append(f"\n<b>Fear & Greed:</b> {fng_val}/100 - {fng_class}")
     elif fng:
         lines.append(f"\n<b>Fear & Greed:</b> <i>[Pro Required]</i>")
+    lines.append("\n" + get_snapshot_age_line(snap.age_seconds))
     
-    await msg.edit_text("\n".join(lines), parse_mode="HTML")
+    await update.message.reply_text("\n".join(lines), parse_mode="HTML")
 
 
 async def cmd_group_gas(update: Update, context: ContextTypes.DEFAULT_TYPE):
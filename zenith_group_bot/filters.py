@@ -1,36 +1,200 @@
 import re
-from zenith_group_bot.word_list import BANNED_WORDS, SPAM_DOMAINS
+import string
+import unicodedata
+from cachetools import TTLCache
 
+from zenith_group_bot.word_list import BANNED_WORDS
+from zenith_group_bot.link_classifier import DomainSet, extract_links, classify_links
 
-def build_abuse_pattern(extra_words: list = None) -> re.Pattern:
-    all_words = list(BANNED_WORDS)
-    if extra_words:
-        all_words.extend(extra_words)
+ZERO_WIDTH = frozenset("\u00ad\u034f\u180e\u200b\u200c\u200d\u200e\u200f\u2060\u2061\u2062\u2063\u2064\ufeff")
+# Cyrillic and Greek letters that render like Latin ones; applied after NFKD and casefolding.
+CONFUSABLES = {
+    "а": "a", "в": "b", "е": "e", "ё": "e", "к": "k", "м": "m", "н": "h", "о": "o", "р": "p",
+    "с": "c", "т": "t", "у": "y", "х": "x", "ѕ": "s", "і": "i", "ї": "i", "ј": "j", "ԁ": "d",
+    "ԛ": "q", "ԝ": "w", "ь": "b", "һ": "h", "ɡ": "g", "ı": "i", "ł": "l", "ø": "o", "đ": "d",
+    "α": "a", "β": "b", "γ": "y", "ε": "e", "η": "n", "ι": "i", "κ": "k", "μ": "u", "ν": "v",
+    "ο": "o", "ρ": "p", "σ": "o", "ς": "c", "τ": "t", "υ": "u", "χ": "x", "ω": "w",
+}
+# Digits and symbols only count as letters inside a token that already has a letter,
+# so amounts and phone numbers are left alone.
+LEET = str.maketrans({
+    "0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t",
+    "@": "a", "$": "s", "!": "i", "|": "l", "+": "t", "€": "e",
+})
+LEET_SYMBOLS = "@$!|+€"
+SPACED_MIN_LETTERS = 3
+SQUEEZED_MIN = 4
+# Squeezed forms of banned entries that are ordinary words ("sooar" -> "soar", "raand" -> "rand").
+SQUEEZE_EXEMPT = frozenset({"bals", "chaka", "kuta", "kute", "mula", "mule", "rand", "sala", "soar", "tate"})
 
-    escaped = [re.escape(w) for w in all_words if w.strip()]
-    if not escaped:
-        return re.compile(r"$^")
-    pattern = r"\b(" + "|".join(escaped) + r")\b"
-    return re.compile(pattern, re.IGNORECASE)
+_SEPARATOR, _WORD, _MARK = 0, 1, 2
+_fold_cache: dict[str, tuple[str, int]] = {}
+_ASCII_FOLD = str.maketrans({
+    **{c: " " for c in string.punctuation + string.whitespace if c not in LEET_SYMBOLS},
+    **{c: c.lower() for c in string.ascii_uppercase},
+})
+_token_re = re.compile(r"[^ ]+")
+_repeat_re = re.compile(r"(.)\1\1+")
+_letter_re = re.compile(r"[^\W\d_]")
 
 
-_default_pattern = build_abuse_pattern()
+def _fold(ch: str) -> tuple[str, int]:
+    folded = _fold_cache.get(ch)
+    if folded is not None:
+        return folded
+    if ch in ZERO_WIDTH:
+        folded = ("", _WORD)
+    elif unicodedata.combining(ch):
+        folded = (ch, _MARK)
+    else:
+        decomposed = unicodedata.normalize("NFKD", ch).casefold()
+        base = decomposed[:1]
+        if base.isascii():
+            # Accents on Latin letters are dropped; marks in other scripts are part of the word.
+            decomposed = "".join(c for c in decomposed if not unicodedata.combining(c))
+        decomposed = "".join(CONFUSABLES.get(c, c) for c in decomposed)
+        is_word = base.isalnum() or base in LEET_SYMBOLS or unicodedata.category(base).startswith("M")
+        folded = (decomposed, _WORD if is_word and decomposed else _SEPARATOR)
+    if len(_fold_cache) < 65536:
+        _fold_cache[ch] = folded
+    return folded
 
 
-def scan_for_abuse(text: str, custom_words: list = None) -> bool:
-    if not text:
-        return False
+def normalize_text(text: str):
+    """Canonical form used for matching, plus the index in `text` of every output character.
 
-    if custom_words:
-        pattern = build_abuse_pattern(custom_words)
-    else:
-        pattern = _default_pattern
+    Separators become single spaces. Plain ASCII only needs lowercasing, so it is mapped
+    one-to-one with a translate table and the offsets are the identity.
+    """
+    if text.isascii():
+        return text.translate(_ASCII_FOLD), range(len(text))
+    out: list[str] = []
+    offsets: list[int] = []
+    for i, ch in enumerate(text):
+        folded, kind = _fold(ch)
+        if kind == _SEPARATOR:
+            folded = " "
+        elif kind == _MARK and out and out[-1].isascii():
+            continue
+        for c in folded:
+            out.append(c)
+            offsets.append(i)
+    return "".join(out), offsets
+
+
+def _squeeze(token: str) -> str:
+    return "".join(c for i, c in enumerate(token) if i == 0 or c != token[i - 1])
+
+
+def _forms(token: str) -> tuple[str, ...]:
+    if _repeat_re.search(token):
+        token = _repeat_re.sub(r"\1\1", token)
+    if token.isalpha() or not _letter_re.search(token):
+        return (token,)
+    stripped = token.rstrip(LEET_SYMBOLS)
+    if stripped and stripped != token:
+        return stripped.translate(LEET), token.translate(LEET)
+    return (token.translate(LEET),)
+
+
+def tokenize(text: str) -> list[tuple[tuple[str, ...], int, int]]:
+    """Matching forms of each word in `text` with its (start, end) span in the original."""
+    normalized, offsets = normalize_text(text)
+    return [
+        (_forms(m.group()), offsets[m.start()], offsets[m.end() - 1] + 1)
+        for m in _token_re.finditer(normalized)
+    ]
+
+
+class Lexicon:
+    # Entries are normalized with the same pipeline as messages, so a message is matched with
+    # one pass over its tokens and dict lookups instead of a regex alternation of every word.
+
+    def __init__(self, entries=()):
+        self.words: dict[str, str] = {}
+        self.squeezed: dict[str, str] = {}
+        self.phrases: dict[str, list[tuple[tuple[str, ...], str]]] = {}
+        for entry in entries:
+            self.add(entry)
 
-    return bool(pattern.search(text))
+    def add(self, entry: str):
+        tokens = tuple(forms[0] for forms, _, _ in tokenize(entry))
+        if not tokens:
+            return
+        if len(tokens) > 1:
+            self.phrases.setdefault(tokens[0], []).append((tokens, entry))
+            return
+        self.words.setdefault(tokens[0], entry)
+        squeezed = _squeeze(tokens[0])
+        if len(squeezed) >= SQUEEZED_MIN and squeezed not in SQUEEZE_EXEMPT:
+            self.squeezed.setdefault(squeezed, entry)
 
+    def _word(self, form: str) -> str | None:
+        hit = self.words.get(form)
+        if hit is None and len(form) >= SQUEEZED_MIN:
+            # Only a token that doubles a letter itself is read as a stretched spelling.
+            squeezed = _squeeze(form)
+            if squeezed != form:
+                hit = self.squeezed.get(squeezed)
+        return hit
 
-def scan_for_spam(text: str) -> bool:
+    def find(self, tokens: list[tuple[tuple[str, ...], int, int]]) -> tuple[str, int, int] | None:
+        run_start = None
+        for i, (forms, start, end) in enumerate(tokens):
+            for form in forms:
+                hit = self._word(form)
+                if hit:
+                    return hit, start, end
+            for phrase, entry in self.phrases.get(forms[0], ()):
+                if tuple(t[0][0] for t in tokens[i:i + len(phrase)]) == phrase:
+                    return entry, start, tokens[i + len(phrase) - 1][2]
+            # "f u c k" / "f.u.c.k": a run of single letters is read as one word.
+            if len(forms[0]) == 1:
+                if run_start is None:
+                    run_start = i
+                if i + 1 < len(tokens) and len(tokens[i + 1][0][0]) == 1:
+                    continue
+                if i - run_start + 1 >= SPACED_MIN_LETTERS:
+                    letters = "".join(t[0][0] for t in tokens[run_start:i + 1])
+                    hit = self._word(letters)
+                    if hit:
+                        return hit, tokens[run_start][1], end
+            run_start = None
+        return None
+
+    def __len__(self):
+        return len(self.words) + sum(len(p) for p in self.phrases.values())
+
+
+DEFAULT_LEXICON = Lexicon(BANNED_WORDS)
+_custom_lexicons = TTLCache(maxsize=2000, ttl=3600)
+
+
+def _custom_lexicon(custom_words) -> Lexicon:
+    key = tuple(custom_words)
+    lexicon = _custom_lexicons.get(key)
+    if lexicon is None:
+        lexicon = _custom_lexicons[key] = Lexicon([*BANNED_WORDS, *custom_words])
+    return lexicon
+
+
+def find_abuse(text: str, custom_words: list = None) -> tuple[str, int, int] | None:
+    """Return the matched entry and its (start, end) span in the original text."""
     if not text:
-        return False
-    lower = text.lower()
-    return any(domain in lower for domain in SPAM_DOMAINS)
\ No newline at end of file
+        return None
+    tokens = tokenize(text)
+    if not tokens:
+        return None
+    lexicon = _custom_lexicon(custom_words) if custom_words else DEFAULT_LEXICON
+    return lexicon.find(tokens)
+
+
+def scan_for_abuse(text: str, custom_words: list = None) -> bool:
+    return find_abuse(text, custom_words) is not None
+
+
+def scan_for_spam(text: str, entity_urls=(), allow: DomainSet = None, deny: DomainSet = None) -> str | None:
+    links = extract_links(text, entity_urls)
+    if not links:
+        return None
+    return classify_links(links, allow, deny)
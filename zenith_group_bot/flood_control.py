@@ -1,9 +1,10 @@
 import time
+import random
+import numpy as np
 from collections import deque
 from cachetools import TTLCache
 from datetime import datetime, timedelta
 
-user_message_history = TTLCache(maxsize=10000, ttl=5.0)
 seen_albums = TTLCache(maxsize=5000, ttl=10.0)
 
 user_command_history = TTLCache(maxsize=10000, ttl=60.0)
@@ -12,28 +13,102 @@ user_cooldowns = TTLCache(maxsize=10000, ttl=1)
 
 user_warnings = TTLCache(maxsize=5000, ttl=86400)
 
-
-def is_flooding(user_id: int, media_group_id: str = None, strength: str = "medium") -> tuple[bool, str]:
-    now = time.time()
-
+FLOOD_WINDOW = 3.0
+DUPLICATE_WINDOW = 60.0
+# strength -> (messages allowed inside FLOOD_WINDOW, identical messages allowed in a row)
+STRENGTH_LIMITS = {"low": (8, 6), "medium": (5, 4), "high": (3, 3)}
+# Short replies ("ok", "thanks", "+1") are naturally repeated and never count as duplicates.
+REPEAT_MIN_CHARS = 10
+REPEAT_MIN_WORDS = 3
+RING_SIZE = max(limit for limit, _ in STRENGTH_LIMITS.values())
+EVICTION_SAMPLE = 8
+
+
+class FloodDetector:
+    # Per-(chat, user) timestamp rings live in preallocated arrays, so memory is fixed by
+    # `capacity` no matter how many users are active. When full, the least recently seen
+    # of a few random slots is recycled (sampled LRU).
+
+    def __init__(self, capacity: int = 131072):
+        self.capacity = capacity
+        self._slots: dict[tuple[int, int], int] = {}
+        self._keys: list = [None] * capacity
+        self._free = list(range(capacity - 1, -1, -1))
+        self._times = np.zeros((capacity, RING_SIZE), dtype=np.float64)
+        self._heads = np.zeros(capacity, dtype=np.uint8)
+        self._counts = np.zeros(capacity, dtype=np.uint8)
+        self._last_seen = np.zeros(capacity, dtype=np.float64)
+        self._last_hash = np.zeros(capacity, dtype=np.int64)
+        self._repeats = np.zeros(capacity, dtype=np.uint8)
+        self.evictions = 0
+
+    def _slot(self, key: tuple[int, int]) -> int:
+        slot = self._slots.get(key)
+        if slot is not None:
+            return slot
+        if self._free:
+            slot = self._free.pop()
+        else:
+            sample = [random.randrange(self.capacity) for _ in range(EVICTION_SAMPLE)]
+            slot = min(sample, key=lambda s: self._last_seen[s])
+            del self._slots[self._keys[slot]]
+            self.evictions += 1
+        self._slots[key] = slot
+        self._keys[slot] = key
+        self._heads[slot] = 0
+        self._counts[slot] = 0
+        self._repeats[slot] = 0
+        self._last_hash[slot] = 0
+        return slot
+
+    def check(self, chat_id: int, user_id: int, text: str = "", strength: str = "medium", now: float = None) -> tuple[bool, str]:
+        now = now or time.monotonic()
+        limit, max_repeats = STRENGTH_LIMITS.get(strength, STRENGTH_LIMITS["medium"])
+        slot = self._slot((chat_id, user_id))
+        previous = self._last_seen[slot]
+        self._last_seen[slot] = now
+
+        head = int(self._heads[slot])
+        self._times[slot, head] = now
+        self._heads[slot] = (head + 1) % RING_SIZE
+        count = min(int(self._counts[slot]) + 1, RING_SIZE)
+        self._counts[slot] = count
+        if count >= limit and now - self._times[slot, (head + 1 - limit) % RING_SIZE] < FLOOD_WINDOW:
+            return True, "Message Flooding (Spamming)"
+
+        words = text.lower().split()
+        normalized = " ".join(words)
+        if len(normalized) >= REPEAT_MIN_CHARS and len(words) >= REPEAT_MIN_WORDS:
+            digest = hash(normalized) or 1
+            if digest == self._last_hash[slot] and now - previous < DUPLICATE_WINDOW:
+                self._repeats[slot] = min(int(self._repeats[slot]) + 1, 255)
+            else:
+                self._last_hash[slot] = digest
+                self._repeats[slot] = 1
+            if self._repeats[slot] >= max_repeats:
+                return True, "Repeated Message"
+        return False, ""
+
+    def forget(self, chat_id: int, user_id: int):
+        slot = self._slots.pop((chat_id, user_id), None)
+        if slot is not None:
+            self._keys[slot] = None
+            self._last_seen[slot] = 0.0
+            self._free.append(slot)
+
+    def get_stats(self) -> dict:
+        return {"tracked": len(self._slots), "capacity": self.capacity, "evictions": self.evictions}
+
+
+flood_detector = FloodDetector()
+
+
+def is_flooding(chat_id: int, user_id: int, text: str = "", media_group_id: str = None, strength: str = "medium") -> tuple[bool, str]:
     if media_group_id:
         if media_group_id in seen_albums:
             return False, ""
         seen_albums[media_group_id] = True
-
-    thresholds = {"low": 8, "medium": 5, "strict": 3}
-    limit = thresholds.get(strength, 5)
-
-    if user_id not in user_message_history:
-        user_message_history[user_id] = deque(maxlen=limit)
-
-    history = user_message_history[user_id]
-    history.append(now)
-
-    if len(history) == limit and (history[-1] - history[0] < 3.0):
-        return True, "Message Flooding (Spamming)"
-
-    return False, ""
+    return flood_detector.check(chat_id, user_id, text, strength)
 
 
 def check_bot_command_limit(user_id: int, is_pro: bool = False) -> tuple[bool, str, int]:
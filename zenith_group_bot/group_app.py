@@ -1,59 +1,55 @@
 import html
 import asyncio
-from cachetools import TTLCache
-from telegram import Update, ChatPermissions
+from telegram import Update
 from telegram.ext import ContextTypes
-from telegram.error import BadRequest
 
 from core.logger import setup_logger
 from zenith_crypto_bot.repository import SubscriptionRepo
 from zenith_group_bot.repository import (
     SettingsRepo, GroupRepo, MemberRepo, CustomWordRepo,
-    WelcomeRepo, AuditLogRepo,
+    WelcomeRepo, AuditLogRepo, LinkRuleRepo,
 )
 from zenith_group_bot.filters import scan_for_abuse, scan_for_spam
 from zenith_group_bot.flood_control import is_flooding
-from zenith_group_bot.pro_handlers import is_raid_mode
+from zenith_group_bot import admin_roster, raid_guard, quarantine
+from zenith_group_bot.moderation_queue import moderation_queue
+from zenith_group_bot.spam_fingerprint import fingerprint_index
+from zenith_group_bot.message_scheduler import message_scheduler
+from zenith_group_bot.welcome import welcome_batcher
 
 logger = setup_logger("GROUP_APP")
 
-_permission_errors = TTLCache(maxsize=1000, ttl=60)
-_admin_cache = TTLCache(maxsize=5000, ttl=300)
-
 
 async def _is_admin_cached(chat_id: int, user_id: int, context) -> bool:
-    cache_key = f"{chat_id}_{user_id}"
-    if cache_key in _admin_cache:
-        return _admin_cache[cache_key]
-    try:
-        member = await context.bot.get_chat_member(chat_id, user_id)
-        is_admin = member.status in ["administrator", "creator"]
-        _admin_cache[cache_key] = is_admin
-        return is_admin
-    except Exception:
-        return False
+    return await admin_roster.is_admin(context.bot, chat_id, user_id)
 
 
 async def _get_ban_threshold(strength: str) -> int:
     return {"low": 5, "medium": 3, "high": 2}.get(strength, 3)
 
 
-async def _try_delete(message, chat_id: int) -> bool:
-    error_key = f"perm_{chat_id}"
-    if _permission_errors.get(error_key, 0) >= 3:
-        return False
-    try:
-        await message.delete()
-        return True
-    except BadRequest as e:
-        if "not enough rights" in str(e).lower() or "message can't be deleted" in str(e).lower():
-            count = _permission_errors.get(error_key, 0)
-            _permission_errors[error_key] = count + 1
-            if count + 1 >= 3:
-                logger.warning(f"⚡ Circuit breaker tripped for chat {chat_id}. Pausing deletions.")
-        return False
-    except Exception:
-        return False
+def _entity_urls(msg) -> list[str]:
+    urls = list(msg.parse_entities(["url"]).values()) + list(msg.parse_caption_entities(["url"]).values())
+    urls += [e.url for e in (msg.entities or ()) + (msg.caption_entities or ()) if e.type == "text_link" and e.url]
+    return urls
+
+
+def _delete_with_strike(msg, settings, context, user, reason: str, ban_threshold: int, ban_note: str = None) -> bool:
+    # Strikes, bans and owner notices follow only a successful delete, so a chat where the
+    # bot lacks rights does not pile strikes onto users whose messages stay up.
+    chat_id, user_id, username = msg.chat_id, user.id, user.username or ""
+
+    async def log_ban():
+        await AuditLogRepo.log_action(chat_id, user_id, username, "BANNED", ban_note or f"Strike threshold ({ban_threshold}) reached", context.bot.id)
+
+    async def strike():
+        strikes = await GroupRepo.process_violation(user_id, chat_id)
+        await AuditLogRepo.log_action(chat_id, user_id, username, "DELETED", f"{reason} (strike {strikes})", context.bot.id)
+        if strikes >= ban_threshold:
+            moderation_queue.ban(chat_id, user_id, on_banned=log_ban)
+        await _notify_owner(settings, context, user, f"{reason} (Strike {strikes})")
+
+    return moderation_queue.delete(chat_id, msg.message_id, on_deleted=strike)
 
 
 async def _notify_owner(settings, context, user, reason: str):
@@ -98,34 +94,32 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     ban_threshold = await _get_ban_threshold(strength)
     username = user.username or ""
 
-    if is_raid_mode(chat_id):
-        if not await _is_admin_cached(chat_id, user_id, context):
-            if await _try_delete(msg, chat_id):
-                await AuditLogRepo.log_action(chat_id, user_id, username, "DELETED", "Anti-raid lockdown", context.bot.id)
-            return
+    if raid_guard.record_message(chat_id, user_id, msg.message_id):
+        await raid_guard.engage(chat_id, context.bot, f"{raid_guard.MESSAGES_TO_LOCK}+ messages from new members in {raid_guard.MESSAGE_WINDOW}s")
+    if raid_guard.is_locked(chat_id):
+        moderation_queue.delete(chat_id, msg.message_id)
+        return
 
-    is_restricted = await MemberRepo.is_restricted(user_id, chat_id)
-    if is_restricted:
+    if quarantine.is_quarantined(chat_id, user_id):
         has_link = msg.entities and any(e.type in ("url", "text_link") for e in msg.entities)
         has_media = bool(msg.photo or msg.video or msg.document or msg.animation or msg.sticker)
         if has_link or has_media:
-            if await _try_delete(msg, chat_id):
+            async def log_quarantine():
                 await AuditLogRepo.log_action(chat_id, user_id, username, "QUARANTINE", "New member link/media block", context.bot.id)
                 await _notify_owner(settings, context, user, "New member tried to send link/media (quarantine)")
+
+            moderation_queue.delete(chat_id, msg.message_id, on_deleted=log_quarantine)
             return
 
     if features in ("spam", "both") and text:
-        if scan_for_spam(text):
-            if await _try_delete(msg, chat_id):
-                strikes = await GroupRepo.process_violation(user_id, chat_id)
-                await AuditLogRepo.log_action(chat_id, user_id, username, "DELETED", f"Spam link detected (strike {strikes})", context.bot.id)
-                if strikes >= ban_threshold:
-                    try:
-                        await context.bot.ban_chat_member(chat_id, user_id)
-                        await AuditLogRepo.log_action(chat_id, user_id, username, "BANNED", f"Strike threshold ({ban_threshold}) reached", context.bot.id)
-                    except Exception:
-                        pass
-                await _notify_owner(settings, context, user, f"Spam link (Strike {strikes})")
+        allow, deny = await LinkRuleRepo.get_rules(chat_id)
+        blocked = scan_for_spam(text, _entity_urls(msg), allow, deny)
+        spam_reason = f"Blocked link ({blocked})" if blocked else None
+        if spam_reason is None:
+            cross_posted, detail = fingerprint_index.check(chat_id, user_id, text)
+            spam_reason = detail if cross_posted else None
+        if spam_reason:
+            _delete_with_strike(msg, settings, context, user, spam_reason, ban_threshold)
             return
 
     if features in ("abuse", "both") and text:
@@ -135,30 +129,12 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             custom_words = await CustomWordRepo.get_words(chat_id)
 
         if scan_for_abuse(text, custom_words=custom_words):
-            if await _try_delete(msg, chat_id):
-                strikes = await GroupRepo.process_violation(user_id, chat_id)
-                await AuditLogRepo.log_action(chat_id, user_id, username, "DELETED", f"Abuse/profanity detected (strike {strikes})", context.bot.id)
-                if strikes >= ban_threshold:
-                    try:
-                        await context.bot.ban_chat_member(chat_id, user_id)
-                        await AuditLogRepo.log_action(chat_id, user_id, username, "BANNED", f"Strike threshold ({ban_threshold}) reached", context.bot.id)
-                    except Exception:
-                        pass
-                await _notify_owner(settings, context, user, f"Abuse detected (Strike {strikes})")
+            _delete_with_strike(msg, settings, context, user, "Abuse/profanity detected", ban_threshold)
             return
 
-    flooding, flood_reason = is_flooding(user_id, getattr(msg, "media_group_id", None), strength)
+    flooding, flood_reason = is_flooding(chat_id, user_id, text, getattr(msg, "media_group_id", None), strength)
     if flooding:
-        if await _try_delete(msg, chat_id):
-            strikes = await GroupRepo.process_violation(user_id, chat_id)
-            await AuditLogRepo.log_action(chat_id, user_id, username, "DELETED", f"Flood/spam (strike {strikes})", context.bot.id)
-            if strikes >= ban_threshold:
-                try:
-                    await context.bot.ban_chat_member(chat_id, user_id)
-                    await AuditLogRepo.log_action(chat_id, user_id, username, "BANNED", f"Flood + strike threshold", context.bot.id)
-                except Exception:
-                    pass
-            await _notify_owner(settings, context, user, f"Flooding (Strike {strikes})")
+        _delete_with_strike(msg, settings, context, user, flood_reason, ban_threshold, "Flood + strike threshold")
 
 
 async def handle_new_member(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -171,41 +147,33 @@ async def handle_new_member(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not settings or not settings.is_active:
         return
 
+    joined = []
     for member in msg.new_chat_members:
         if member.is_bot:
             continue
 
-        if is_raid_mode(chat_id):
-            try:
-                await context.bot.restrict_chat_member(
-                    chat_id, member.id,
-                    permissions=ChatPermissions(can_send_messages=False),
-                )
-                await AuditLogRepo.log_action(chat_id, member.id, member.username, "QUARANTINE", "Anti-raid: auto-restricted on join", context.bot.id)
-            except Exception:
-                pass
+        if raid_guard.record_join(chat_id, member.id):
+            await raid_guard.engage(chat_id, context.bot, f"{raid_guard.JOINS_TO_LOCK}+ joins in {raid_guard.JOIN_WINDOW}s")
+        if raid_guard.is_locked(chat_id):
+            raid_guard.restrict_member(chat_id, member.id)
             continue
+        joined.append(member)
 
-        await MemberRepo.register_new_member(member.id, chat_id)
+    if not joined:
+        return
+    await MemberRepo.register_new_members(chat_id, [m.id for m in joined])
+    quarantine.admit(chat_id, [m.id for m in joined])
 
-        owner_is_pro = await SubscriptionRepo.is_pro(settings.owner_id)
-        if owner_is_pro:
-            welcome_config = await WelcomeRepo.get_welcome(chat_id)
-            if welcome_config:
-                welcome_text = welcome_config.message_template.replace(
-                    "{name}", member.first_name or "there",
-                ).replace(
-                    "{username}", f"@{member.username}" if member.username else member.first_name or "there",
-                ).replace(
-                    "{group}", msg.chat.title or "our group",
-                )
-                try:
-                    if welcome_config.send_dm:
-                        await context.bot.send_message(chat_id=member.id, text=welcome_text, parse_mode="HTML")
-                    else:
-                        await msg.reply_text(welcome_text, parse_mode="HTML")
-                except Exception as e:
-                    logger.debug(f"Welcome send failed: {e}")
+    if await SubscriptionRepo.is_pro(settings.owner_id):
+        template = await WelcomeRepo.get_welcome(chat_id)
+        if template:
+            welcome_batcher.queue(context.bot, chat_id, msg.chat.title, template, joined)
+
+
+async def handle_chat_member(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    changed = update.chat_member or update.my_chat_member
+    if changed:
+        admin_roster.apply_update(changed, context.bot.id)
 
 
 async def cmd_forgive(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -243,5 +211,8 @@ async def cmd_reset(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return await update.message.reply_text("⛔ Only the group owner can reset.")
 
     wiped = await SettingsRepo.wipe_group_container(update.effective_chat.id, update.effective_user.id)
+    if wiped:
+        message_scheduler.drop_chat(update.effective_chat.id)
+        quarantine.forget_chat(update.effective_chat.id)
     msg = "✅ Group data wiped. Run /setup to reconfigure." if wiped else "⚠️ Reset failed."
     await update.message.reply_text(msg)
\ No newline at end of file
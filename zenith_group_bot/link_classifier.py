@@ -0,0 +1,106 @@
+import re
+from urllib.parse import urlsplit
+
+from zenith_group_bot.word_list import SPAM_DOMAINS
+
+# Matched with .match() against one token at a time; labels are length-bounded so a
+# long run like "a.a.a..." cannot make the engine backtrack far.
+_bare_url_re = re.compile(
+    r"(?:https?://)?(?:[a-z0-9\u00a1-\uffff-]{1,63}\.){1,10}"
+    r"(?:xn--[a-z0-9-]{1,59}|[a-z\u00a1-\uffff]{2,63})\.?(?::\d{1,5})?(?:/\S*)?",
+    re.IGNORECASE,
+)
+_token_re = re.compile(r"[^\s,;()<>\[\]{}\"'`!?*|@]+")
+
+
+def normalize_host(host: str) -> str:
+    host = host.strip().lower().rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    try:
+        return host.encode("idna").decode("ascii")
+    except UnicodeError:
+        return host
+
+
+def parse_link(url: str) -> tuple[str, str] | None:
+    url = url.strip()
+    if "://" not in url:
+        url = "//" + url
+    try:
+        parts = urlsplit(url)
+        host = parts.hostname
+    except ValueError:
+        return None
+    if not host or "." not in host:
+        return None
+    return normalize_host(host), parts.path.rstrip("/").lower()
+
+
+def _bare_links(text: str) -> list[str]:
+    if not text or "." not in text:
+        return []
+    found = []
+    for token in _token_re.findall(text):
+        if "." not in token:
+            continue
+        m = _bare_url_re.match(token.strip("."))
+        if m:
+            found.append(m.group())
+    return found
+
+
+def extract_links(text: str, entity_urls=()) -> set[tuple[str, str]]:
+    # Telegram already extracts bare links into url entities; the text scan covers
+    # messages that arrive without them.
+    urls = list(entity_urls) or _bare_links(text)
+    links = set()
+    for url in urls:
+        parsed = parse_link(url)
+        if parsed:
+            links.add(parsed)
+    return links
+
+
+class DomainSet:
+    # Rules are keyed by exact host; a lookup walks the host's own suffixes (a.b.c -> b.c -> c),
+    # so its cost depends on the number of labels, not on how many rules are loaded.
+
+    def __init__(self, rules=()):
+        self._rules: dict[str, list[str]] = {}
+        for rule in rules:
+            self.add(rule)
+
+    def add(self, rule: str):
+        parsed = parse_link(rule)
+        if parsed:
+            host, path = parsed
+            self._rules.setdefault(host, []).append(path)
+
+    def match(self, host: str, path: str) -> str | None:
+        labels = host.split(".")
+        for i in range(len(labels) - 1):
+            suffix = ".".join(labels[i:])
+            prefixes = self._rules.get(suffix)
+            if prefixes is None:
+                continue
+            for prefix in prefixes:
+                if not prefix or path == prefix or path.startswith(prefix + "/"):
+                    return suffix + prefix
+        return None
+
+    def __len__(self):
+        return sum(len(p) for p in self._rules.values())
+
+
+BLOCKED_DOMAINS = DomainSet(SPAM_DOMAINS)
+
+
+def classify_links(links, allow: DomainSet = None, deny: DomainSet = None) -> str | None:
+    for host, path in links:
+        if allow and allow.match(host, path):
+            continue
+        hit = (deny and deny.match(host, path)) or BLOCKED_DOMAINS.match(host, path)
+        if hit:
+            return hit
+    return None
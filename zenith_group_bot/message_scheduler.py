@@ -0,0 +1,158 @@
+import heapq
+import asyncio
+from datetime import datetime, timedelta
+
+from core.logger import setup_logger
+from core.rate_limiter import TokenBucket
+from utils.time_util import utc_now
+from zenith_group_bot.repository import ScheduleRepo
+
+logger = setup_logger("SCHEDULER")
+
+SEND_RATE = 20
+SEND_CONCURRENCY = 10
+CATCH_UP_SECONDS = 3600
+RESYNC_SECONDS = 600
+
+
+class _Job:
+    __slots__ = ("id", "chat_id", "text", "hour", "minute", "fire_at")
+
+    def __init__(self, schedule_id: int, chat_id: int, text: str, hour: int, minute: int):
+        self.id = schedule_id
+        self.chat_id = chat_id
+        self.text = text
+        self.hour = hour
+        self.minute = minute or 0
+        self.fire_at: datetime = None
+
+    def last_due(self, now: datetime) -> datetime:
+        due = now.replace(hour=self.hour, minute=self.minute, second=0, microsecond=0)
+        return due if due <= now else due - timedelta(days=1)
+
+
+class MessageScheduler:
+    # A min-heap of (fire_at, id). Rescheduling or removing a job just leaves its old heap
+    # entry behind; entries that no longer match the job's fire_at are skipped when popped.
+
+    def __init__(self):
+        self._jobs: dict[int, _Job] = {}
+        self._heap: list[tuple[datetime, int]] = []
+        self._wake = asyncio.Event()
+        self._bucket = TokenBucket(SEND_RATE)
+        self._counters = {"sent": 0, "failed": 0, "caught_up": 0}
+        self._firing: set[asyncio.Task] = set()
+
+    def _push(self, job: _Job, fire_at: datetime):
+        job.fire_at = fire_at
+        heapq.heappush(self._heap, (fire_at, job.id))
+        if self._heap[0][1] == job.id:
+            self._wake.set()
+
+    def add(self, schedule_id: int, chat_id: int, text: str, hour: int, minute: int,
+            last_sent: datetime = None, created_at: datetime = None, now: datetime = None):
+        now = now or utc_now()
+        job = _Job(schedule_id, chat_id, text, hour, minute)
+        self._jobs[schedule_id] = job
+        due = job.last_due(now)
+        # A fire missed while the bot was down goes out now, unless it is too old to be useful
+        # or the schedule did not exist yet at that time. New schedules pass no created_at.
+        missed = (
+            (last_sent is None or last_sent < due)
+            and (created_at or now) <= due
+            and (now - due).total_seconds() <= CATCH_UP_SECONDS
+        )
+        if missed:
+            self._counters["caught_up"] += 1
+            self._push(job, due)
+        else:
+            self._push(job, due + timedelta(days=1))
+
+    def remove(self, schedule_id: int):
+        self._jobs.pop(schedule_id, None)
+
+    def drop_chat(self, chat_id: int):
+        for job in [j for j in self._jobs.values() if j.chat_id == chat_id]:
+            del self._jobs[job.id]
+
+    async def load(self):
+        rows = await ScheduleRepo.get_active_schedules()
+        now = utc_now()
+        known = {r.id for r in rows}
+        for schedule_id in [i for i in self._jobs if i not in known]:
+            self.remove(schedule_id)
+        for r in rows:
+            job = self._jobs.get(r.id)
+            if job and (job.chat_id, job.text, job.hour, job.minute) == (r.chat_id, r.message_text, r.hour, r.minute or 0):
+                continue
+            self.add(r.id, r.chat_id, r.message_text, r.hour, r.minute, r.last_sent, r.created_at, now)
+        # Stale heap entries are dropped in one go so the heap tracks the live job count.
+        self._heap = [(t, i) for t, i in self._heap if i in self._jobs and self._jobs[i].fire_at == t]
+        heapq.heapify(self._heap)
+
+    def _pop_due(self, now: datetime) -> list[_Job]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            fire_at, schedule_id = heapq.heappop(self._heap)
+            job = self._jobs.get(schedule_id)
+            if job is None or job.fire_at != fire_at:
+                continue
+            due.append(job)
+            self._push(job, job.last_due(now) + timedelta(days=1))
+        return due
+
+    async def _send(self, bot, job: _Job, limiter: asyncio.Semaphore) -> int | None:
+        async with limiter:
+            await self._bucket.acquire()
+            try:
+                await bot.send_message(chat_id=job.chat_id, text=job.text, parse_mode="HTML")
+                return job.id
+            except Exception as e:
+                logger.warning(f"Scheduled msg send failed (chat {job.chat_id}): {e}")
+                return None
+
+    async def _fire(self, bot, jobs: list[_Job]):
+        limiter = asyncio.Semaphore(SEND_CONCURRENCY)
+        results = await asyncio.gather(*(self._send(bot, job, limiter) for job in jobs))
+        sent = [r for r in results if r is not None]
+        self._counters["sent"] += len(sent)
+        self._counters["failed"] += len(jobs) - len(sent)
+        if sent:
+            try:
+                await ScheduleRepo.mark_sent_many(sent, utc_now())
+            except Exception as e:
+                logger.error(f"Failed to mark {len(sent)} scheduled messages sent: {e}")
+
+    async def run(self, bot):
+        next_sync = 0.0
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                if loop.time() >= next_sync:
+                    await self.load()
+                    next_sync = loop.time() + RESYNC_SECONDS
+                now = utc_now()
+                due = self._pop_due(now)
+                if due:
+                    # Sends run in the background so a slow chat never holds back the next minute.
+                    task = asyncio.create_task(self._fire(bot, due))
+                    self._firing.add(task)
+                    task.add_done_callback(self._firing.discard)
+                delay = RESYNC_SECONDS
+                if self._heap:
+                    delay = min(delay, max((self._heap[0][0] - utc_now()).total_seconds(), 0))
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+            except Exception as e:
+                logger.error(f"Scheduled loop error: {e}")
+                await asyncio.sleep(60)
+
+    def get_stats(self) -> dict:
+        nxt = min((j.fire_at for j in self._jobs.values()), default=None)
+        return {**self._counters, "jobs": len(self._jobs), "heap": len(self._heap), "next_fire": nxt.isoformat() if nxt else None}
+
+
+message_scheduler = MessageScheduler()
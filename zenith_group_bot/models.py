@@ -33,7 +33,7 @@ class NewMember(Base):
     id = Column(Integer, primary_key=True)
     user_id = Column(BigInteger, index=True)
     chat_id = Column(BigInteger, index=True)
-    joined_at = Column(DateTime, default=utc_now)
+    joined_at = Column(DateTime, default=utc_now, index=True)
     __table_args__ = (UniqueConstraint("user_id", "chat_id", name="_new_member_chat_uc"),)
 
 
@@ -47,6 +47,17 @@ class CustomBannedWord(Base):
     __table_args__ = (UniqueConstraint("chat_id", "word", name="_chat_word_uc"),)
 
 
+class LinkRule(Base):
+    __tablename__ = "zenith_link_rules"
+    id = Column(Integer, primary_key=True)
+    chat_id = Column(BigInteger, index=True, nullable=False)
+    domain = Column(String(255), nullable=False)
+    action = Column(String(10), nullable=False)
+    added_by = Column(BigInteger, nullable=False)
+    created_at = Column(DateTime, default=utc_now)
+    __table_args__ = (UniqueConstraint("chat_id", "domain", name="_chat_domain_uc"),)
+
+
 class ScheduledMessage(Base):
     __tablename__ = "zenith_scheduled_messages"
     id = Column(Integer, primary_key=True)
@@ -78,4 +89,11 @@ class ModerationLog(Base):
     action = Column(String(50), nullable=False)
     reason = Column(Text, nullable=True)
     moderator_id = Column(BigInteger, nullable=True)
-    created_at = Column(DateTime, default=utc_now)
\ No newline at end of file
+    created_at = Column(DateTime, default=utc_now)
+
+class RaidState(Base):
+    __tablename__ = "zenith_raid_state"
+    chat_id = Column(BigInteger, primary_key=True)
+    is_active = Column(Boolean, default=False)
+    source = Column(String(20), default="manual")
+    activated_at = Column(DateTime, default=utc_now)
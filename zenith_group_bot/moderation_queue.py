@@ -0,0 +1,194 @@
+import time
+import asyncio
+from cachetools import TTLCache
+from telegram import ChatPermissions
+from telegram.error import BadRequest, Forbidden, RetryAfter
+
+from core.logger import setup_logger
+from core.rate_limiter import TokenBucket
+
+logger = setup_logger("MOD_QUEUE")
+
+DELETE_BATCH = 100
+GLOBAL_RATE = 25
+CHAT_INTERVAL = 1.0
+TICK_SECONDS = 0.5
+BAN_DEDUP_SECONDS = 300
+BREAKER_ERRORS = 3
+
+
+class _ChatActions:
+    __slots__ = ("deletes", "bans", "restricts", "unrestricts", "next_call")
+
+    def __init__(self):
+        # Values are optional follow-ups, run only once the Bot API call has succeeded.
+        self.deletes: dict[int, object] = {}
+        self.bans: dict[int, object] = {}
+        self.restricts: dict[int, int | None] = {}
+        self.unrestricts: dict[int, None] = {}
+        self.next_call = 0.0
+
+    def __bool__(self):
+        return bool(self.deletes or self.bans or self.restricts or self.unrestricts)
+
+
+class ModerationQueue:
+    # Deletions, bans and restrictions are queued per chat and drained one Bot API call
+    # per chat per CHAT_INTERVAL; deletions go out as delete_messages batches.
+
+    def __init__(self):
+        self._chats: dict[int, _ChatActions] = {}
+        self._bucket = TokenBucket(GLOBAL_RATE)
+        self._recent_bans = TTLCache(maxsize=20000, ttl=BAN_DEDUP_SECONDS)
+        self._permission_errors = TTLCache(maxsize=1000, ttl=60)
+        self._paused_until = 0.0
+        self._followups: set[asyncio.Task] = set()
+        self._counters = {"deleted": 0, "delete_calls": 0, "banned": 0, "duplicate_bans": 0, "restricted": 0, "unrestricted": 0, "failed": 0}
+
+    def _actions(self, chat_id: int) -> _ChatActions:
+        actions = self._chats.get(chat_id)
+        if actions is None:
+            actions = self._chats[chat_id] = _ChatActions()
+        return actions
+
+    def breaker_open(self, chat_id: int) -> bool:
+        return self._permission_errors.get(f"perm_{chat_id}", 0) >= BREAKER_ERRORS
+
+    def _record_permission_error(self, chat_id: int):
+        error_key = f"perm_{chat_id}"
+        count = self._permission_errors.get(error_key, 0) + 1
+        self._permission_errors[error_key] = count
+        if count == BREAKER_ERRORS:
+            logger.warning(f"⚡ Circuit breaker tripped for chat {chat_id}. Pausing deletions.")
+
+    def delete(self, chat_id: int, message_id: int, on_deleted=None) -> bool:
+        if self.breaker_open(chat_id):
+            return False
+        self._actions(chat_id).deletes[message_id] = on_deleted
+        return True
+
+    def ban(self, chat_id: int, user_id: int, on_banned=None) -> bool:
+        key = (chat_id, user_id)
+        if key in self._recent_bans:
+            self._counters["duplicate_bans"] += 1
+            return False
+        self._recent_bans[key] = True
+        self._actions(chat_id).bans[user_id] = on_banned
+        return True
+
+    def _follow_up(self, callback):
+        if callback is None:
+            return
+        task = asyncio.create_task(callback())
+        self._followups.add(task)
+        task.add_done_callback(self._followup_done)
+
+    def _followup_done(self, task: asyncio.Task):
+        self._followups.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.error(f"Moderation follow-up failed: {task.exception()}")
+
+    def restrict(self, chat_id: int, user_id: int, until: int = None):
+        actions = self._actions(chat_id)
+        actions.unrestricts.pop(user_id, None)
+        actions.restricts[user_id] = until
+
+    def unrestrict(self, chat_id: int, user_id: int):
+        actions = self._actions(chat_id)
+        if user_id in actions.restricts:
+            # Never applied, so there is nothing to lift.
+            del actions.restricts[user_id]
+            return
+        actions.unrestricts[user_id] = None
+
+    async def _call(self, chat_id: int, coro_factory) -> bool:
+        await self._bucket.acquire()
+        try:
+            await coro_factory()
+            return True
+        except RetryAfter as e:
+            retry_after = e.retry_after.total_seconds() if hasattr(e.retry_after, "total_seconds") else e.retry_after
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after + 1)
+            raise
+        except (BadRequest, Forbidden) as e:
+            reason = str(e).lower()
+            if "not enough rights" in reason or "message can't be deleted" in reason or isinstance(e, Forbidden):
+                self._record_permission_error(chat_id)
+            logger.debug(f"Moderation call failed in {chat_id}: {e}")
+        except Exception as e:
+            logger.warning(f"Moderation call failed in {chat_id}: {e}")
+        self._counters["failed"] += 1
+        return False
+
+    async def _drain_one(self, bot, chat_id: int, actions: _ChatActions):
+        # Bans first so an offender stops posting, then the backlog of deletions.
+        if actions.bans:
+            user_id, on_banned = next(iter(actions.bans.items()))
+            if await self._call(chat_id, lambda: bot.ban_chat_member(chat_id, user_id)):
+                self._counters["banned"] += 1
+                self._follow_up(on_banned)
+            else:
+                self._recent_bans.pop((chat_id, user_id), None)
+            actions.bans.pop(user_id, None)
+        elif actions.deletes:
+            if self.breaker_open(chat_id):
+                actions.deletes.clear()
+                return
+            batch = list(actions.deletes)[:DELETE_BATCH]
+            self._counters["delete_calls"] += 1
+            deleted = await self._call(chat_id, lambda: bot.delete_messages(chat_id, batch))
+            if deleted:
+                self._counters["deleted"] += len(batch)
+            for message_id in batch:
+                on_deleted = actions.deletes.pop(message_id, None)
+                if deleted:
+                    self._follow_up(on_deleted)
+        elif actions.restricts:
+            user_id, until = next(iter(actions.restricts.items()))
+            permissions = ChatPermissions(can_send_messages=False)
+            if await self._call(chat_id, lambda: bot.restrict_chat_member(chat_id, user_id, permissions=permissions, until_date=until)):
+                self._counters["restricted"] += 1
+            actions.restricts.pop(user_id, None)
+        elif actions.unrestricts:
+            user_id = next(iter(actions.unrestricts))
+            # All-true permissions lift the restriction; the chat's own defaults still apply.
+            permissions = ChatPermissions.all_permissions()
+            if await self._call(chat_id, lambda: bot.restrict_chat_member(chat_id, user_id, permissions=permissions)):
+                self._counters["unrestricted"] += 1
+            actions.unrestricts.pop(user_id, None)
+
+    async def _drain(self, bot, chat_id: int, actions: _ChatActions):
+        try:
+            await self._drain_one(bot, chat_id, actions)
+        except RetryAfter:
+            pass
+        actions.next_call = time.monotonic() + CHAT_INTERVAL
+
+    async def worker(self, bot):
+        while True:
+            await asyncio.sleep(TICK_SECONDS)
+            now = time.monotonic()
+            if now < self._paused_until:
+                continue
+            ready = []
+            for chat_id, actions in list(self._chats.items()):
+                if not actions:
+                    del self._chats[chat_id]
+                elif actions.next_call <= now:
+                    ready.append(self._drain(bot, chat_id, actions))
+            if ready:
+                try:
+                    await asyncio.gather(*ready)
+                except Exception as e:
+                    logger.error(f"Moderation queue error: {e}")
+
+    def get_stats(self) -> dict:
+        return {
+            **self._counters,
+            "pending_deletes": sum(len(a.deletes) for a in self._chats.values()),
+            "pending_bans": sum(len(a.bans) for a in self._chats.values()),
+            "paused_for": max(round(self._paused_until - time.monotonic(), 1), 0),
+        }
+
+
+moderation_queue = ModerationQueue()
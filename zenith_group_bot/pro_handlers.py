@@ -8,8 +8,11 @@ from core.animation import send_typing_action
 from zenith_crypto_bot.repository import SubscriptionRepo
 from zenith_group_bot.repository import (
     SettingsRepo, CustomWordRepo, ScheduleRepo,
-    WelcomeRepo, AuditLogRepo,
+    WelcomeRepo, AuditLogRepo, LinkRuleRepo,
 )
+from zenith_group_bot.link_classifier import parse_link
+from zenith_group_bot import admin_roster, raid_guard
+from zenith_group_bot.message_scheduler import message_scheduler
 from zenith_group_bot.ui import (
     get_confirm_add_word, get_confirm_delete_word,
     get_word_limit_msg, get_pro_feature_msg,
@@ -27,11 +30,7 @@ async def _check_group_admin_pro(update: Update, context: ContextTypes.DEFAULT_T
     chat_id = update.effective_chat.id
     user_id = update.effective_user.id
 
-    try:
-        member = await context.bot.get_chat_member(chat_id, user_id)
-        if member.status not in ["administrator", "creator"]:
-            return chat_id, user_id, False
-    except Exception:
+    if not await admin_roster.is_admin(context.bot, chat_id, user_id):
         return chat_id, user_id, False
 
     settings = await SettingsRepo.get_settings(chat_id)
@@ -164,6 +163,75 @@ async def cmd_wordlist(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 
+MAX_LINK_RULES = 100
+
+
+async def _set_link_rule(update: Update, context: ContextTypes.DEFAULT_TYPE, action: str):
+    chat_id, user_id, ok = await _check_group_admin_pro(update, context)
+    if not ok:
+        return
+
+    command = "allowdomain" if action == "allow" else "blockdomain"
+    parsed = parse_link(context.args[0]) if context.args else None
+    if not parsed:
+        return await update.message.reply_text(
+            f"🔗 <b>Link Rules</b>\n\n"
+            f"<b>Usage:</b> <code>/{command} [DOMAIN]</code>\n\n"
+            f"<b>Examples:</b>\n"
+            f"• <code>/{command} example.com</code>\n"
+            f"• <code>/{command} t.me/joinchat</code>\n\n"
+            f"<i>Rules cover subdomains. Allowed domains override every block list.</i>",
+            parse_mode="HTML",
+        )
+
+    domain = "".join(parsed)
+    rules = await LinkRuleRepo.list_rules(chat_id)
+    if len(rules) >= MAX_LINK_RULES and all(r.domain != domain for r in rules):
+        return await update.message.reply_text(f"🚫 Link rule limit reached ({MAX_LINK_RULES}).")
+
+    await LinkRuleRepo.set_rule(chat_id, domain, action, user_id)
+    verb = "allowed" if action == "allow" else "blocked"
+    await update.message.reply_text(
+        f"✅ <code>{html.escape(domain)}</code> is now <b>{verb}</b> in this group.",
+        parse_mode="HTML",
+    )
+
+
+async def cmd_allowdomain(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    await _set_link_rule(update, context, "allow")
+
+
+async def cmd_blockdomain(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    await _set_link_rule(update, context, "block")
+
+
+async def cmd_deldomain(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    chat_id, user_id, ok = await _check_group_admin_pro(update, context)
+    if not ok:
+        return
+
+    parsed = parse_link(context.args[0]) if context.args else None
+    if not parsed:
+        rules = await LinkRuleRepo.list_rules(chat_id)
+        if not rules:
+            return await update.message.reply_text(
+                "🔗 <b>Link Rules</b>\n\nNo custom rules.\n"
+                "<code>/allowdomain [DOMAIN]</code> · <code>/blockdomain [DOMAIN]</code>",
+                parse_mode="HTML",
+            )
+        lines = [f"🔗 <b>Link Rules ({len(rules)}/{MAX_LINK_RULES})</b>\n"]
+        for r in rules:
+            icon = "✅" if r.action == "allow" else "🚫"
+            lines.append(f"{icon} <code>{html.escape(r.domain)}</code>")
+        lines.append("\n<i>Remove with</i> <code>/deldomain [DOMAIN]</code>")
+        return await update.message.reply_text("\n".join(lines), parse_mode="HTML")
+
+    domain = "".join(parsed)
+    removed = await LinkRuleRepo.remove_rule(chat_id, domain)
+    msg = f"✅ Rule for <code>{html.escape(domain)}</code> removed." if removed else "⚠️ No rule for that domain."
+    await update.message.reply_text(msg, parse_mode="HTML")
+
+
 async def cmd_schedule(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id, user_id, ok = await _check_group_admin_pro(update, context)
     if not ok:
@@ -217,6 +285,7 @@ async def cmd_schedule(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
 
     sid = await ScheduleRepo.add_schedule(chat_id, user_id, message_text, hour, minute)
+    message_scheduler.add(sid, chat_id, message_text, hour, minute)
     await update.message.reply_text(
         f"✅ <b>Message Scheduled</b>\n\n"
         f"⏰ <b>Time:</b> {hour:02d}:{minute:02d} UTC (daily)\n"
@@ -264,6 +333,8 @@ async def cmd_delschedule(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return await update.message.reply_text("⚠️ Invalid schedule ID.")
 
     deleted = await ScheduleRepo.delete_schedule(sid, user_id)
+    if deleted:
+        message_scheduler.remove(sid)
     msg = "✅ Schedule removed." if deleted else "⚠️ Schedule not found or not owned by you."
     await update.message.reply_text(msg)
 
@@ -281,6 +352,7 @@ async def cmd_welcome(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "• <code>{name}</code> — User's first name\n"
             "• <code>{username}</code> — User's @username\n"
             "• <code>{group}</code> — Group name\n\n"
+            "<i>Members joining within a few seconds are welcomed together in one message.</i>\n\n"
             "<b>Example:</b>\n"
             "<code>/welcome Welcome {name}! 👋 Please read the pinned rules.</code>\n\n"
             "<i>Disable with</i> <code>/welcomeoff</code>",
@@ -382,38 +454,30 @@ async def cmd_auditlog(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text("\n".join(lines), parse_mode="HTML")
 
 
-_raid_mode = {}
-
-
-def is_raid_mode(chat_id: int) -> bool:
-    return _raid_mode.get(chat_id, False)
-
-
-def set_raid_mode(chat_id: int, active: bool):
-    _raid_mode[chat_id] = active
-
-
 async def cmd_antiraid(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id, user_id, ok = await _check_group_admin_pro(update, context)
     if not ok:
         return
 
     if not context.args:
-        status = "🟢 ACTIVE" if is_raid_mode(chat_id) else "⚪ INACTIVE"
+        source = raid_guard.lock_source(chat_id)
+        status = f"🟢 ACTIVE ({'automatic' if source == 'auto' else 'manual'})" if source else "⚪ INACTIVE"
         return await update.message.reply_text(
             f"🛡️ <b>Anti-Raid Shield</b>\n\n"
             f"<b>Status:</b> {status}\n\n"
             f"<b>Usage:</b>\n"
             f"• <code>/antiraid on</code> — Enable lockdown\n"
             f"• <code>/antiraid off</code> — Disable lockdown\n\n"
-            f"<i>When active: all new members are auto-muted. "
-            f"No messages from non-admins for the duration.</i>",
+            f"<i>When active: new members are muted for up to an hour (lifted when the lockdown ends). "
+            f"No messages from non-admins for the duration.</i>\n\n"
+            f"<i>Lockdown also engages automatically on join or message surges "
+            f"and lifts once activity settles.</i>",
             parse_mode="HTML",
         )
 
     action = context.args[0].lower()
     if action == "on":
-        set_raid_mode(chat_id, True)
+        await raid_guard.set_lockdown(chat_id, True, "manual")
         await update.message.reply_text(
             "🛡️ <b>ANTI-RAID LOCKDOWN ACTIVATED</b>\n\n"
             "⚠️ All messages from non-admin members will be deleted.\n"
@@ -423,7 +487,7 @@ async def cmd_antiraid(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         await AuditLogRepo.log_action(chat_id, user_id, update.effective_user.username, "RAID_LOCK_ON", "Anti-raid activated by admin")
     elif action == "off":
-        set_raid_mode(chat_id, False)
+        await raid_guard.set_lockdown(chat_id, False, "manual")
         await update.message.reply_text(
             "✅ <b>Anti-Raid Lockdown Deactivated</b>\n\n"
             "Normal moderation resumed.",
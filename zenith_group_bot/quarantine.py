@@ -0,0 +1,85 @@
+import time
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from core.logger import setup_logger
+from utils.time_util import utc_now
+from zenith_group_bot.repository import MemberRepo
+
+logger = setup_logger("QUARANTINE")
+
+QUARANTINE_SECONDS = 24 * 3600
+SYNC_SECONDS = 300
+# Re-read a little before the previous sync so joins committed late by another replica are not missed.
+SYNC_OVERLAP = timedelta(minutes=2)
+
+# chat_id -> {user_id: release time as epoch seconds}; only members still in quarantine are kept,
+# so a miss means "not quarantined" without asking the database.
+_release: dict[int, dict[int, float]] = {}
+_synced_at: datetime = None
+_stats = {"admitted": 0, "expired": 0, "pruned_rows": 0}
+
+
+def _timestamp(joined_at: datetime) -> float:
+    return joined_at.replace(tzinfo=timezone.utc).timestamp()
+
+
+def admit(chat_id: int, user_ids, joined_at: float = None):
+    release_at = (joined_at or time.time()) + QUARANTINE_SECONDS
+    members = _release.setdefault(chat_id, {})
+    for user_id in user_ids:
+        if members.get(user_id, 0) < release_at:
+            members[user_id] = release_at
+            _stats["admitted"] += 1
+
+
+def is_quarantined(chat_id: int, user_id: int, now: float = None) -> bool:
+    members = _release.get(chat_id)
+    release_at = members.get(user_id) if members else None
+    if release_at is None:
+        return False
+    if release_at <= (now or time.time()):
+        del members[user_id]
+        _stats["expired"] += 1
+        return False
+    return True
+
+
+def forget_chat(chat_id: int):
+    _release.pop(chat_id, None)
+
+
+def _sweep(now: float):
+    for chat_id, members in list(_release.items()):
+        expired = [uid for uid, release_at in members.items() if release_at <= now]
+        for user_id in expired:
+            del members[user_id]
+        _stats["expired"] += len(expired)
+        if not members:
+            del _release[chat_id]
+
+
+async def sync():
+    global _synced_at
+    started = utc_now()
+    cutoff = started - timedelta(seconds=QUARANTINE_SECONDS)
+    since = max(cutoff, _synced_at - SYNC_OVERLAP) if _synced_at else cutoff
+    for user_id, chat_id, joined_at in await MemberRepo.get_members_joined_since(since):
+        admit(chat_id, (user_id,), _timestamp(joined_at))
+    _synced_at = started
+
+
+async def quarantine_monitor():
+    # Expired rows are deleted in bulk here instead of being checked on every message.
+    while True:
+        await asyncio.sleep(SYNC_SECONDS)
+        try:
+            await sync()
+            _sweep(time.time())
+            _stats["pruned_rows"] += await MemberRepo.prune_expired(utc_now() - timedelta(seconds=QUARANTINE_SECONDS))
+        except Exception as e:
+            logger.error(f"Quarantine monitor error: {e}")
+
+
+def get_stats() -> dict:
+    return {**_stats, "chats": len(_release), "members": sum(len(m) for m in _release.values())}
@@ -0,0 +1,213 @@
+import math
+import time
+import asyncio
+from collections import deque
+from cachetools import TTLCache
+
+from core.logger import setup_logger
+from zenith_group_bot.repository import RaidRepo, AuditLogRepo
+from zenith_group_bot.moderation_queue import moderation_queue
+
+logger = setup_logger("RAID_GUARD")
+
+JOIN_WINDOW = 60
+MESSAGE_WINDOW = 30
+NEW_MEMBER_SECONDS = 600
+# Lock when either rate crosses the upper mark; auto-release only after both stay
+# under the lower mark for QUIET_SECONDS, so a raid arriving in waves does not flap.
+# The marks below are floors: busy chats get SURGE_FACTOR x their own baseline rate.
+JOINS_TO_LOCK = 15
+MESSAGES_TO_LOCK = 25
+JOINS_TO_RELEASE = 3
+MESSAGES_TO_RELEASE = 5
+SURGE_FACTOR = 4
+CALM_FACTOR = 1.5
+BASELINE_SECONDS = 6 * 3600
+BASELINE_WARMUP = 600
+QUIET_SECONDS = 300
+SYNC_SECONDS = 30
+# Lockdown mutes expire on their own in case the lift is lost to a restart.
+RESTRICT_SECONDS = 3600
+
+
+class _ChatActivity:
+    __slots__ = ("joins", "messages", "calm_since", "join_rate", "message_rate", "first_seen", "rated_at")
+
+    def __init__(self, now: float):
+        self.joins = deque(maxlen=500)
+        self.messages = deque(maxlen=500)
+        self.calm_since = None
+        # Exponentially decayed events per second, fed only while the chat is not locked.
+        self.join_rate = 0.0
+        self.message_rate = 0.0
+        self.first_seen = now
+        self.rated_at = now
+
+    def prune(self, now: float):
+        while self.joins and self.joins[0][0] < now - JOIN_WINDOW:
+            self.joins.popleft()
+        while self.messages and self.messages[0][0] < now - MESSAGE_WINDOW:
+            self.messages.popleft()
+
+    def observe(self, now: float, joins: int = 0, messages: int = 0):
+        decay = math.exp(-(now - self.rated_at) / BASELINE_SECONDS)
+        self.join_rate = self.join_rate * decay + joins / BASELINE_SECONDS
+        self.message_rate = self.message_rate * decay + messages / BASELINE_SECONDS
+        self.rated_at = now
+
+    def _expected(self, rate: float, window: int, now: float) -> float:
+        elapsed = now - self.first_seen
+        if elapsed < BASELINE_WARMUP:
+            return 0.0
+        # Bias correction: a young estimate has only seen part of BASELINE_SECONDS.
+        return rate / (1 - math.exp(-elapsed / BASELINE_SECONDS)) * window
+
+    def join_limits(self, now: float) -> tuple[float, float]:
+        expected = self._expected(self.join_rate, JOIN_WINDOW, now)
+        return max(JOINS_TO_LOCK, SURGE_FACTOR * expected), max(JOINS_TO_RELEASE, CALM_FACTOR * expected)
+
+    def message_limits(self, now: float) -> tuple[float, float]:
+        expected = self._expected(self.message_rate, MESSAGE_WINDOW, now)
+        return max(MESSAGES_TO_LOCK, SURGE_FACTOR * expected), max(MESSAGES_TO_RELEASE, CALM_FACTOR * expected)
+
+
+_activity = TTLCache(maxsize=10000, ttl=BASELINE_SECONDS)
+_recent_joiners = TTLCache(maxsize=100000, ttl=NEW_MEMBER_SECONDS)
+_locks: dict[int, str] = {}
+_changed_at: dict[int, float] = {}
+_restricted: dict[int, set[int]] = {}
+
+
+def _chat(chat_id: int, now: float = None) -> _ChatActivity:
+    activity = _activity.get(chat_id)
+    if activity is None:
+        activity = _activity[chat_id] = _ChatActivity(now or time.monotonic())
+    return activity
+
+
+def is_locked(chat_id: int) -> bool:
+    return chat_id in _locks
+
+
+def lock_source(chat_id: int) -> str | None:
+    return _locks.get(chat_id)
+
+
+def record_join(chat_id: int, user_id: int, now: float = None) -> bool:
+    now = now or time.monotonic()
+    _recent_joiners[(chat_id, user_id)] = now
+    activity = _chat(chat_id, now)
+    activity.joins.append((now, user_id))
+    activity.prune(now)
+    if is_locked(chat_id):
+        return False
+    activity.observe(now, joins=1)
+    return len(activity.joins) >= activity.join_limits(now)[0]
+
+
+def record_message(chat_id: int, user_id: int, message_id: int, now: float = None) -> bool:
+    if (chat_id, user_id) not in _recent_joiners:
+        return False
+    now = now or time.monotonic()
+    activity = _chat(chat_id, now)
+    activity.messages.append((now, message_id))
+    activity.prune(now)
+    if is_locked(chat_id):
+        return False
+    activity.observe(now, messages=1)
+    return len(activity.messages) >= activity.message_limits(now)[0]
+
+
+def restrict_member(chat_id: int, user_id: int):
+    _restricted.setdefault(chat_id, set()).add(user_id)
+    moderation_queue.restrict(chat_id, user_id, until=int(time.time()) + RESTRICT_SECONDS)
+
+
+def _lift_restrictions(chat_id: int) -> int:
+    users = _restricted.pop(chat_id, ())
+    for user_id in users:
+        moderation_queue.unrestrict(chat_id, user_id)
+    return len(users)
+
+
+async def set_lockdown(chat_id: int, active: bool, source: str = "manual"):
+    if active:
+        _locks[chat_id] = source
+    else:
+        _locks.pop(chat_id, None)
+        _lift_restrictions(chat_id)
+    _changed_at[chat_id] = time.monotonic()
+    activity = _activity.get(chat_id)
+    if activity:
+        activity.calm_since = None
+    await RaidRepo.set_state(chat_id, active, source)
+
+
+async def engage(chat_id: int, bot, reason: str):
+    if is_locked(chat_id):
+        return
+    activity = _chat(chat_id)
+    # The wave that tripped the detector is cleaned up with everything that follows.
+    for _, user_id in activity.joins:
+        restrict_member(chat_id, user_id)
+    for _, message_id in activity.messages:
+        moderation_queue.delete(chat_id, message_id)
+    await set_lockdown(chat_id, True, "auto")
+    logger.warning(f"🛡️ Auto anti-raid lockdown in {chat_id}: {reason}")
+    await AuditLogRepo.log_action(
+        chat_id, 0, None, "RAID_LOCK_ON",
+        f"Auto: {reason}; restricting {len(activity.joins)} recent joins, removing {len(activity.messages)} messages", bot.id,
+    )
+    try:
+        await bot.send_message(
+            chat_id=chat_id,
+            text=(
+                "🛡️ <b>ANTI-RAID LOCKDOWN ACTIVATED</b>\n\n"
+                f"<i>Unusual activity detected ({reason}).</i>\n"
+                "New joins are restricted and messages from non-admins are removed.\n"
+                "The lockdown lifts automatically once activity settles."
+            ),
+            parse_mode="HTML",
+        )
+    except Exception as e:
+        logger.debug(f"Raid notice failed in {chat_id}: {e}")
+
+
+async def _release_calm_chats(now: float):
+    for chat_id, source in list(_locks.items()):
+        if source != "auto":
+            continue
+        activity = _chat(chat_id)
+        activity.prune(now)
+        if len(activity.joins) > activity.join_limits(now)[1] or len(activity.messages) > activity.message_limits(now)[1]:
+            activity.calm_since = None
+            continue
+        if activity.calm_since is None:
+            activity.calm_since = now
+        elif now - activity.calm_since >= QUIET_SECONDS:
+            await set_lockdown(chat_id, False, "auto")
+            await AuditLogRepo.log_action(chat_id, 0, None, "RAID_LOCK_OFF", "Auto: activity back to normal")
+            logger.info(f"✅ Auto anti-raid lockdown lifted in {chat_id}")
+
+
+async def load_state():
+    state = await RaidRepo.get_active()
+    now = time.monotonic()
+    for chat_id in list(_locks):
+        if chat_id not in state and now - _changed_at.get(chat_id, 0) > SYNC_SECONDS:
+            _locks.pop(chat_id, None)
+            _lift_restrictions(chat_id)
+    for chat_id, (source, _) in state.items():
+        if now - _changed_at.get(chat_id, 0) > SYNC_SECONDS:
+            _locks[chat_id] = source
+
+
+async def raid_monitor():
+    # Persisted state is re-read periodically so replicas converge on the same lockdowns.
+    while True:
+        try:
+            await load_state()
+            await _release_calm_chats(time.monotonic())
+        except Exception as e:
+            logger.error(f"Raid monitor error: {e}")
+        await asyncio.sleep(SYNC_SECONDS)
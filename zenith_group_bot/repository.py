@@ -3,14 +3,16 @@ import functools
 from datetime import datetime, timezone, timedelta
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import select, delete, update, func
+from sqlalchemy import select, delete, update, func, text
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from cachetools import TTLCache
 
 from zenith_group_bot.models import (
     Base, GroupStrike, NewMember, GroupSettings,
-    CustomBannedWord, ScheduledMessage, WelcomeConfig, ModerationLog,
+    CustomBannedWord, ScheduledMessage, WelcomeConfig, ModerationLog, RaidState, LinkRule,
 )
+from zenith_group_bot.link_classifier import DomainSet
+from zenith_group_bot.welcome import WelcomeTemplate
 from core.config import DATABASE_URL, DB_POOL_SIZE
 from utils.time_util import utc_now
 from core.logger import setup_logger
@@ -26,14 +28,16 @@ engine = create_async_engine(
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 settings_cache = TTLCache(maxsize=1000, ttl=300)
-quarantine_cache = TTLCache(maxsize=50000, ttl=3600)
 join_debounce = TTLCache(maxsize=10000, ttl=60)
 custom_words_cache = TTLCache(maxsize=500, ttl=300)
+link_rules_cache = TTLCache(maxsize=1000, ttl=300)
+welcome_cache = TTLCache(maxsize=1000, ttl=300)
 
 
 async def init_group_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_zenith_new_members_joined_at ON zenith_new_members (joined_at)"))
 
 
 async def dispose_group_engine():
@@ -132,10 +136,14 @@ class SettingsRepo:
             await session.execute(delete(ScheduledMessage).where(ScheduledMessage.chat_id == chat_id))
             await session.execute(delete(WelcomeConfig).where(WelcomeConfig.chat_id == chat_id))
             await session.execute(delete(ModerationLog).where(ModerationLog.chat_id == chat_id))
+            await session.execute(delete(RaidState).where(RaidState.chat_id == chat_id))
+            await session.execute(delete(LinkRule).where(LinkRule.chat_id == chat_id))
             await session.execute(delete(GroupSettings).where(GroupSettings.chat_id == chat_id))
             await session.commit()
             settings_cache.pop(chat_id, None)
             custom_words_cache.pop(chat_id, None)
+            link_rules_cache.pop(chat_id, None)
+            welcome_cache.pop(chat_id, None)
             return True
 
 
@@ -167,33 +175,38 @@ class GroupRepo:
 class MemberRepo:
     @staticmethod
     @db_retry
-    async def register_new_member(user_id: int, chat_id: int):
-        cache_key = f"{chat_id}_{user_id}"
-        if cache_key in join_debounce:
+    async def register_new_members(chat_id: int, user_ids: list[int]):
+        fresh = [uid for uid in dict.fromkeys(user_ids) if f"{chat_id}_{uid}" not in join_debounce]
+        if not fresh:
             return
-        join_debounce[cache_key] = True
+        for uid in fresh:
+            join_debounce[f"{chat_id}_{uid}"] = True
 
+        now = utc_now()
         async with AsyncSessionLocal() as session:
-            stmt = pg_insert(NewMember).values(
-                user_id=user_id, chat_id=chat_id, joined_at=utc_now(),
-            ).on_conflict_do_update(index_elements=["user_id", "chat_id"], set_=dict(joined_at=utc_now()))
+            stmt = pg_insert(NewMember).values([
+                dict(user_id=uid, chat_id=chat_id, joined_at=now) for uid in fresh
+            ])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["user_id", "chat_id"], set_=dict(joined_at=stmt.excluded.joined_at),
+            )
             await session.execute(stmt)
             await session.commit()
-            quarantine_cache.pop(cache_key, None)
 
     @staticmethod
     @db_retry
-    async def is_restricted(user_id: int, chat_id: int) -> bool:
-        cache_key = f"{chat_id}_{user_id}"
-        if quarantine_cache.get(cache_key) == "CLEARED":
-            return False
+    async def get_members_joined_since(since: datetime) -> list[tuple[int, int, datetime]]:
         async with AsyncSessionLocal() as session:
-            stmt = select(NewMember).where(NewMember.user_id == user_id, NewMember.chat_id == chat_id)
-            record = (await session.execute(stmt)).scalar_one_or_none()
-            if record and (utc_now() - record.joined_at) < timedelta(hours=24):
-                return True
-            quarantine_cache[cache_key] = "CLEARED"
-            return False
+            stmt = select(NewMember.user_id, NewMember.chat_id, NewMember.joined_at).where(NewMember.joined_at >= since)
+            return [tuple(r) for r in (await session.execute(stmt)).all()]
+
+    @staticmethod
+    @db_retry
+    async def prune_expired(cutoff: datetime) -> int:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(delete(NewMember).where(NewMember.joined_at < cutoff))
+            await session.commit()
+            return result.rowcount or 0
 
 
 class CustomWordRepo:
@@ -243,6 +256,53 @@ class CustomWordRepo:
             return (await session.execute(stmt)).scalar() or 0
 
 
+class LinkRuleRepo:
+    @staticmethod
+    @db_retry
+    async def set_rule(chat_id: int, domain: str, action: str, added_by: int):
+        async with AsyncSessionLocal() as session:
+            stmt = pg_insert(LinkRule).values(
+                chat_id=chat_id, domain=domain, action=action, added_by=added_by,
+            ).on_conflict_do_update(
+                index_elements=["chat_id", "domain"], set_=dict(action=action, added_by=added_by),
+            )
+            await session.execute(stmt)
+            await session.commit()
+            link_rules_cache.pop(chat_id, None)
+
+    @staticmethod
+    @db_retry
+    async def remove_rule(chat_id: int, domain: str) -> bool:
+        async with AsyncSessionLocal() as session:
+            stmt = delete(LinkRule).where(LinkRule.chat_id == chat_id, LinkRule.domain == domain)
+            result = await session.execute(stmt)
+            await session.commit()
+            link_rules_cache.pop(chat_id, None)
+            return result.rowcount > 0
+
+    @staticmethod
+    @db_retry
+    async def list_rules(chat_id: int) -> list:
+        async with AsyncSessionLocal() as session:
+            stmt = select(LinkRule).where(LinkRule.chat_id == chat_id).order_by(LinkRule.domain)
+            return (await session.execute(stmt)).scalars().all()
+
+    @staticmethod
+    @db_retry
+    async def get_rules(chat_id: int) -> tuple[DomainSet, DomainSet]:
+        if chat_id in link_rules_cache:
+            return link_rules_cache[chat_id]
+        async with AsyncSessionLocal() as session:
+            stmt = select(LinkRule.domain, LinkRule.action).where(LinkRule.chat_id == chat_id)
+            rows = (await session.execute(stmt)).all()
+        rules = (
+            DomainSet(r.domain for r in rows if r.action == "allow"),
+            DomainSet(r.domain for r in rows if r.action == "block"),
+        )
+        link_rules_cache[chat_id] = rules
+        return rules
+
+
 class ScheduleRepo:
     @staticmethod
     @db_retry
@@ -290,26 +350,18 @@ class ScheduleRepo:
 
     @staticmethod
     @db_retry
-    async def get_due_messages(current_hour: int, current_minute: int) -> list:
+    async def get_active_schedules() -> list:
         async with AsyncSessionLocal() as session:
-            now = datetime.now(timezone.utc).replace(tzinfo=None)
-            one_hour_ago = now - timedelta(hours=1)
-            stmt = select(ScheduledMessage).where(
-                ScheduledMessage.is_active == True,
-                ScheduledMessage.hour == current_hour,
-                ScheduledMessage.minute == current_minute,
-            ).filter(
-                (ScheduledMessage.last_sent == None) | (ScheduledMessage.last_sent < one_hour_ago)
-            )
+            stmt = select(ScheduledMessage).where(ScheduledMessage.is_active == True)
             return (await session.execute(stmt)).scalars().all()
 
     @staticmethod
     @db_retry
-    async def mark_sent(schedule_id: int):
+    async def mark_sent_many(schedule_ids: list[int], sent_at: datetime):
         async with AsyncSessionLocal() as session:
             stmt = update(ScheduledMessage).where(
-                ScheduledMessage.id == schedule_id,
-            ).values(last_sent=datetime.now(timezone.utc).replace(tzinfo=None))
+                ScheduledMessage.id.in_(schedule_ids),
+            ).values(last_sent=sent_at)
             await session.execute(stmt)
             await session.commit()
 
@@ -328,16 +380,22 @@ class WelcomeRepo:
             )
             await session.execute(stmt)
             await session.commit()
+            welcome_cache.pop(chat_id, None)
 
     @staticmethod
     @db_retry
-    async def get_welcome(chat_id: int):
+    async def get_welcome(chat_id: int) -> WelcomeTemplate | None:
+        if chat_id in welcome_cache:
+            return welcome_cache[chat_id]
         async with AsyncSessionLocal() as session:
             stmt = select(WelcomeConfig).where(
                 WelcomeConfig.chat_id == chat_id,
                 WelcomeConfig.is_active == True,
             )
-            return (await session.execute(stmt)).scalar_one_or_none()
+            config = (await session.execute(stmt)).scalar_one_or_none()
+            template = WelcomeTemplate(config.message_template, config.send_dm) if config else None
+            welcome_cache[chat_id] = template
+            return template
 
     @staticmethod
     @db_retry
@@ -346,9 +404,33 @@ class WelcomeRepo:
             stmt = update(WelcomeConfig).where(WelcomeConfig.chat_id == chat_id).values(is_active=False)
             result = await session.execute(stmt)
             await session.commit()
+            welcome_cache.pop(chat_id, None)
             return result.rowcount > 0
 
 
+class RaidRepo:
+    @staticmethod
+    @db_retry
+    async def get_active() -> dict:
+        async with AsyncSessionLocal() as session:
+            stmt = select(RaidState).where(RaidState.is_active.is_(True))
+            rows = (await session.execute(stmt)).scalars().all()
+            return {r.chat_id: (r.source, r.activated_at) for r in rows}
+
+    @staticmethod
+    @db_retry
+    async def set_state(chat_id: int, active: bool, source: str):
+        async with AsyncSessionLocal() as session:
+            stmt = pg_insert(RaidState).values(
+                chat_id=chat_id, is_active=active, source=source, activated_at=utc_now(),
+            ).on_conflict_do_update(
+                index_elements=["chat_id"],
+                set_=dict(is_active=active, source=source, activated_at=utc_now()),
+            )
+            await session.execute(stmt)
+            await session.commit()
+
+
 class AuditLogRepo:
     @staticmethod
     @db_retry
@@ -5,6 +5,7 @@ from telegram.ext import ContextTypes
 from core.logger import setup_logger
 from zenith_crypto_bot.repository import SubscriptionRepo
 from zenith_group_bot.repository import SettingsRepo
+from zenith_group_bot import admin_roster
 
 logger = setup_logger("SETUP_FLOW")
 
@@ -34,12 +35,11 @@ async def cmd_setup(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = msg.chat_id
     user_id = msg.from_user.id
 
-    try:
-        member = await context.bot.get_chat_member(chat_id, user_id)
-        if member.status not in ("administrator", "creator"):
-            return await msg.reply_text("⛔ Only group admins can run /setup.")
-    except Exception:
+    admins = await admin_roster.get_admins(context.bot, chat_id)
+    if admins is None:
         return await msg.reply_text("⚠️ Cannot verify admin status. Make sure I'm an admin.")
+    if user_id not in admins:
+        return await msg.reply_text("⛔ Only group admins can run /setup.")
 
     is_pro = await SubscriptionRepo.is_pro(user_id)
     existing_groups = await SettingsRepo.count_owned_groups(user_id)
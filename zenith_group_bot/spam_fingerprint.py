@@ -0,0 +1,134 @@
+import re
+import time
+from collections import deque
+
+import numpy as np
+
+MIN_TOKENS = 6
+SHINGLE_SIZE = 3
+NUM_HASHES = 64
+BANDS = 16
+ROWS = NUM_HASHES // BANDS
+# With 16 bands of 4 rows, pairs at Jaccard 0.7 collide in some band ~99% of the time
+# and unrelated text (< 0.1) almost never does; candidates are then checked exactly.
+MIN_SIMILARITY = 0.5
+WINDOW_SECONDS = 3600
+CAPACITY = 20000
+# Only the most recent slots are kept per band key; older near-duplicates add nothing once
+# a campaign has been seen in enough chats.
+BUCKET_LIMIT = 64
+CHAT_THRESHOLD = 3
+USER_THRESHOLD = 5
+
+_token_re = re.compile(r"\w+", re.UNICODE)
+_rng = np.random.default_rng(0x5A4D)
+# Multiply-shift hashing: odd 64-bit multipliers, keep the high 32 bits of the wrapped product.
+_MULT = _rng.integers(1, 2 ** 63, NUM_HASHES, dtype=np.uint64) | np.uint64(1)
+_ADD = _rng.integers(0, 2 ** 63, NUM_HASHES, dtype=np.uint64)
+_SHIFT = np.uint64(32)
+
+
+def _tokens(text: str) -> list[str]:
+    # Digits are folded so rotating amounts, codes or phone numbers still match.
+    return [re.sub(r"\d", "0", t) for t in _token_re.findall(text.lower())]
+
+
+def signature(text: str) -> np.ndarray | None:
+    tokens = _tokens(text)
+    if len(tokens) < MIN_TOKENS:
+        return None
+    shingles = {" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+    hashed = np.fromiter((hash(s) & 0xFFFFFFFF for s in shingles), dtype=np.uint64, count=len(shingles))
+    return ((hashed[:, None] * _MULT + _ADD) >> _SHIFT).min(axis=0).astype(np.uint32)
+
+
+class FingerprintIndex:
+    # Recent MinHash signatures live in a fixed ring; each slot is also filed under its band
+    # keys. Overwriting a slot unfiles it and each bucket keeps only BUCKET_LIMIT slots, so both
+    # the ring and the buckets stay bounded.
+
+    def __init__(self, capacity: int = CAPACITY):
+        self.capacity = capacity
+        self._sigs = np.zeros((capacity, NUM_HASHES), dtype=np.uint32)
+        self._chats = np.zeros(capacity, dtype=np.int64)
+        self._users = np.zeros(capacity, dtype=np.int64)
+        self._times = np.zeros(capacity, dtype=np.float64)
+        self._buckets: list[dict[bytes, deque]] = [{} for _ in range(BANDS)]
+        self._next = 0
+        self._size = 0
+        self.flagged = 0
+
+    @staticmethod
+    def _bands(sig: np.ndarray):
+        for band in range(BANDS):
+            yield band, sig[band * ROWS:(band + 1) * ROWS].tobytes()
+
+    def _unfile(self, slot: int):
+        for band, key in self._bands(self._sigs[slot]):
+            bucket = self._buckets[band].get(key)
+            if bucket is None:
+                continue
+            # Slots are overwritten oldest first, so the slot is usually at the front if still filed.
+            if bucket[0] == slot:
+                bucket.popleft()
+            elif slot in bucket:
+                bucket.remove(slot)
+            if not bucket:
+                del self._buckets[band][key]
+
+    def _insert(self, sig: np.ndarray, chat_id: int, user_id: int, now: float):
+        slot = self._next
+        if self._size == self.capacity:
+            self._unfile(slot)
+        else:
+            self._size += 1
+        self._sigs[slot] = sig
+        self._chats[slot] = chat_id
+        self._users[slot] = user_id
+        self._times[slot] = now
+        for band, key in self._bands(sig):
+            bucket = self._buckets[band].get(key)
+            if bucket is None:
+                bucket = self._buckets[band][key] = deque(maxlen=BUCKET_LIMIT)
+            bucket.append(slot)
+        self._next = (slot + 1) % self.capacity
+
+    def spread(self, sig: np.ndarray, now: float, chat_id: int, user_id: int) -> tuple[set, set]:
+        """Chats and users that posted a near-duplicate of `sig` within the window, including
+        the sender. Stops as soon as either threshold is reached."""
+        chats, users = {chat_id}, {user_id}
+        seen = set()
+        for band, key in self._bands(sig):
+            bucket = self._buckets[band].get(key)
+            if not bucket:
+                continue
+            fresh = [slot for slot in bucket if slot not in seen]
+            if not fresh:
+                continue
+            seen.update(fresh)
+            slots = np.array(fresh, dtype=np.int64)
+            slots = slots[self._times[slots] >= now - WINDOW_SECONDS]
+            slots = slots[(self._sigs[slots] == sig).mean(axis=1) >= MIN_SIMILARITY]
+            chats.update(self._chats[slots].tolist())
+            users.update(self._users[slots].tolist())
+            if len(chats) >= CHAT_THRESHOLD or len(users) >= USER_THRESHOLD:
+                break
+        return chats, users
+
+    def check(self, chat_id: int, user_id: int, text: str, now: float = None) -> tuple[bool, str]:
+        sig = signature(text)
+        if sig is None:
+            return False, ""
+        now = now or time.time()
+        chats, users = self.spread(sig, now, chat_id, user_id)
+        self._insert(sig, chat_id, user_id, now)
+        if len(chats) >= CHAT_THRESHOLD or len(users) >= USER_THRESHOLD:
+            self.flagged += 1
+            return True, f"Cross-posted spam ({len(chats)} chats, {len(users)} users)"
+        return False, ""
+
+    def get_stats(self) -> dict:
+        return {"signatures": self._size, "capacity": self.capacity, "flagged": self.flagged}
+
+
+fingerprint_index = FingerprintIndex()
@@ -0,0 +1,115 @@
+import re
+import html
+import asyncio
+
+from core.logger import setup_logger
+from core.rate_limiter import TokenBucket
+
+logger = setup_logger("WELCOME")
+
+COALESCE_SECONDS = 3
+MAX_MENTIONS = 20
+DM_RATE = 20
+
+_field_re = re.compile(r"\{(name|username|group)\}")
+
+
+def _mention(member) -> str:
+    return f'<a href="tg://user?id={member.id}">{html.escape(member.first_name or "there")}</a>'
+
+
+def _handle(member) -> str:
+    return f"@{member.username}" if member.username else html.escape(member.first_name or "there")
+
+
+def _join(items: list[str], total: int) -> str:
+    if total > len(items):
+        return ", ".join(items) + f" and {total - len(items)} others"
+    if len(items) > 1:
+        return ", ".join(items[:-1]) + " and " + items[-1]
+    return items[0]
+
+
+class WelcomeTemplate:
+    # The template is split into literal chunks and field names once, when the config is
+    # loaded; rendering is a single join however many members it covers.
+
+    def __init__(self, template: str, send_dm: bool = False):
+        self.template = template
+        self.send_dm = send_dm
+        pieces = _field_re.split(template)
+        self._literals = pieces[0::2]
+        self._fields = pieces[1::2]
+
+    def render(self, members: list, group: str) -> str:
+        shown = members[:MAX_MENTIONS]
+        values = {
+            "name": _join([_mention(m) for m in shown], len(members)),
+            "username": _join([_handle(m) for m in shown], len(members)),
+            "group": html.escape(group or "our group"),
+        }
+        out = [self._literals[0]]
+        for field, literal in zip(self._fields, self._literals[1:]):
+            out.append(values[field])
+            out.append(literal)
+        return "".join(out)
+
+
+class _PendingWelcome:
+    __slots__ = ("template", "group", "members")
+
+    def __init__(self, template: WelcomeTemplate, group: str):
+        self.template = template
+        self.group = group
+        self.members: dict[int, object] = {}
+
+
+class WelcomeBatcher:
+    # Joins that land within COALESCE_SECONDS of the first one share a single group message,
+    # so an invite-link burst produces one welcome instead of one per member.
+
+    def __init__(self):
+        self._pending: dict[int, _PendingWelcome] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._dm_bucket = TokenBucket(DM_RATE)
+        self._counters = {"members": 0, "messages": 0, "failed": 0}
+
+    def queue(self, bot, chat_id: int, group: str, template: WelcomeTemplate, members: list):
+        pending = self._pending.get(chat_id)
+        if pending is None:
+            pending = self._pending[chat_id] = _PendingWelcome(template, group)
+            task = asyncio.create_task(self._flush_later(bot, chat_id))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        for member in members:
+            pending.members[member.id] = member
+        self._counters["members"] += len(members)
+
+    async def _send(self, bot, chat_id: int, text: str):
+        try:
+            await bot.send_message(chat_id=chat_id, text=text, parse_mode="HTML")
+            self._counters["messages"] += 1
+        except Exception as e:
+            self._counters["failed"] += 1
+            logger.debug(f"Welcome send failed: {e}")
+
+    async def _flush_later(self, bot, chat_id: int):
+        await asyncio.sleep(COALESCE_SECONDS)
+        pending = self._pending.pop(chat_id, None)
+        if not pending or not pending.members:
+            return
+        template = pending.template
+        members = list(pending.members.values())
+        if template.send_dm:
+            # Direct messages cannot be merged, so they are only paced.
+            for member in members:
+                await self._dm_bucket.acquire()
+                await self._send(bot, member.id, template.render([member], pending.group))
+        else:
+            await self._send(bot, chat_id, template.render(members, pending.group))
+
+    def get_stats(self) -> dict:
+        return {**self._counters, "pending_chats": len(self._pending)}
+
+
+welcome_batcher = WelcomeBatcher()